@@ -0,0 +1,102 @@
+"""
+Agent lifecycle. An agent.py may define an Agent class (a subclass of Agent
+below): the server then creates one instance per color and keeps it for all
+the games it runs, calling setup before each game, make_move at each turn and
+teardown after the game, so the agent can keep its state (caches, search
+processes) warm between moves and between games. close is called once the
+server is done with the agent.
+An agent.py with only a make_move function (and optionally set_delay and
+notify_opponent_move) is still supported, through ModuleAgent.
+"""
+from types import ModuleType
+from typing import Tuple
+
+from .othello.gamestate import GameState
+
+
+class Agent(object):
+    """
+    Base class of the agents with a lifecycle (see the module docstring)
+    """
+
+    def __init__(self):
+        self.color = None  # color played in the current game
+        self.time_control = None  # seconds to make each move in the current game
+
+    def setup(self, color: str, time_control: float) -> None:
+        """
+        Called by the server before each game
+        :param color: color this agent plays with ('B' or 'W')
+        :param time_control: seconds the server waits for each move
+        """
+        self.color = color
+        self.time_control = time_control
+
+    def make_move(self, state: GameState) -> Tuple[int, int]:
+        """
+        Returns an Othello move
+        :param state: state to make the move (a copy, the agent can modify it)
+        :return: (int, int) tuple with x, y coordinates of the move, or (-1, -1) if there are none
+        """
+        raise NotImplementedError
+
+    def notify_opponent_move(self, move: Tuple[int, int], state: GameState) -> None:
+        """
+        Called by the server after each accepted move of the opponent
+        :param move: (x, y) move of the opponent
+        :param state: state after the move (a copy)
+        """
+
+    def teardown(self) -> None:
+        """
+        Called by the server after each game (the agent may be set up again for another one)
+        """
+
+    def close(self) -> None:
+        """
+        Called by the server once it is done with the agent, after its last game:
+        frees what the agent keeps between games (e.g. search processes)
+        """
+
+
+class ModuleAgent(Agent):
+    """
+    Agent of an agent.py that only defines functions: make_move and, optionally,
+    set_delay (called by setup) and notify_opponent_move
+    """
+
+    def __init__(self, module: ModuleType):
+        """
+        :param module: the agent.py module
+        """
+        super().__init__()
+        self.module = module
+
+    def setup(self, color: str, time_control: float) -> None:
+        super().setup(color, time_control)
+        if hasattr(self.module, 'set_delay'):
+            self.module.set_delay(time_control)
+
+    def make_move(self, state: GameState) -> Tuple[int, int]:
+        return self.module.make_move(state)
+
+    def notify_opponent_move(self, move: Tuple[int, int], state: GameState) -> None:
+        if hasattr(self.module, 'notify_opponent_move'):
+            self.module.notify_opponent_move(move, state)
+
+
+def load_agents(modules: dict) -> dict:
+    """
+    Creates the agents of the players of a game
+    :param modules: maps each color to the agent.py module of its player
+    :return: maps each color to an Agent; a module without an Agent class that plays
+        both colors gets a single ModuleAgent (its functions share their state anyway)
+    """
+    agents = {}
+    for color, module in modules.items():
+        if hasattr(module, 'Agent'):
+            agents[color] = module.Agent()
+            continue
+        shared = [agent for agent in agents.values() if isinstance(agent, ModuleAgent) and agent.module is module]
+        agents[color] = shared[0] if shared else ModuleAgent(module)
+    return agents
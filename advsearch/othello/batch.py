@@ -0,0 +1,135 @@
+import numpy as np  # install with 'pip install numpy'
+
+from .board import Board, from_string
+
+# values of each tile in the batch array
+BLACK = 1
+WHITE = -1
+EMPTY = 0
+
+COLOR_VALUES = {Board.BLACK: BLACK, Board.WHITE: WHITE}
+
+
+def _shift(tiles, dy, dx):
+    """
+    Returns the tiles shifted so that result[:, y, x] == tiles[:, y+dy, x+dx],
+    with False where y+dy,x+dx falls outside the board
+    :param tiles: (N, 8, 8) boolean array
+    :param dy: row offset
+    :param dx: column offset
+    :return: (N, 8, 8) boolean array
+    """
+    shifted = np.zeros_like(tiles)
+    if abs(dy) > 7 or abs(dx) > 7:
+        return shifted
+    dst_y = slice(max(0, -dy), 8 - max(0, dy))
+    dst_x = slice(max(0, -dx), 8 - max(0, dx))
+    src_y = slice(max(0, dy), 8 - max(0, -dy))
+    src_x = slice(max(0, dx), 8 - max(0, -dx))
+    shifted[:, dst_y, dst_x] = tiles[:, src_y, src_x]
+    return shifted
+
+
+class BoardBatch(object):
+    """
+    A batch of N boards stored as a (N, 8, 8) int8 array, for evaluating
+    many positions at once. Tiles are BLACK (1), WHITE (-1) or EMPTY (0)
+    and are indexed as [board, y, x], like Board.tiles.
+    Legal moves, piece counts, mobility and weighted-square scores are
+    computed with vectorized operations over the whole batch.
+    """
+
+    def __init__(self, tiles):
+        """
+        Initializes the batch with the given tiles
+        :param tiles: array-like with shape (N, 8, 8)
+        """
+        self.tiles = np.asarray(tiles, dtype=np.int8)
+        if self.tiles.ndim != 3 or self.tiles.shape[1:] != (8, 8):
+            raise ValueError("Tiles must have shape (N, 8, 8), got %s" % str(self.tiles.shape))
+
+    @classmethod
+    def from_boards(cls, boards) -> 'BoardBatch':
+        """
+        Creates a batch from a list of boards (of any Board implementation)
+        :param boards: list of Board
+        :return: BoardBatch
+        """
+        chars = np.frombuffer(''.join(str(b).replace('\n', '') for b in boards).encode(), dtype=np.uint8)
+        chars = chars.reshape(len(boards), 8, 8)
+        tiles = np.zeros(chars.shape, dtype=np.int8)
+        tiles[chars == ord(Board.BLACK)] = BLACK
+        tiles[chars == ord(Board.WHITE)] = WHITE
+        return cls(tiles)
+
+    def to_boards(self) -> list:
+        """
+        Returns the boards of this batch as a list of Board
+        :return: list of Board
+        """
+        chars = np.full(self.tiles.shape, ord(Board.EMPTY), dtype=np.uint8)
+        chars[self.tiles == BLACK] = ord(Board.BLACK)
+        chars[self.tiles == WHITE] = ord(Board.WHITE)
+        return [
+            from_string('\n'.join(row.tobytes().decode() for row in board))
+            for board in chars
+        ]
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def __getitem__(self, index) -> 'BoardBatch':
+        """
+        Returns the sub-batch selected by index (int, slice, mask or list of indexes)
+        """
+        return BoardBatch(self.tiles[index].reshape(-1, 8, 8))
+
+    def legal_moves(self, color) -> np.ndarray:
+        """
+        Returns a boolean (N, 8, 8) array where [i, y, x] is True
+        if x,y is a legal move for color on the i-th board
+        :param color: Board.BLACK or Board.WHITE
+        :return: np.ndarray
+        """
+        player = self.tiles == COLOR_VALUES[color]
+        opponent = self.tiles == -COLOR_VALUES[color]
+        moves = np.zeros(self.tiles.shape, dtype=bool)
+
+        for dx, dy in Board.DIRECTIONS:
+            # run: tiles 1..k-1 in this direction are all opponent pieces
+            run = _shift(opponent, dy, dx)
+            for k in range(2, 8):
+                moves |= run & _shift(player, k * dy, k * dx)
+                run &= _shift(opponent, k * dy, k * dx)
+                if not run.any():
+                    break
+
+        return moves & (self.tiles == EMPTY)
+
+    def piece_count(self, color) -> np.ndarray:
+        """
+        Returns the number of pieces of color (or Board.EMPTY) in each board
+        :param color:
+        :return: (N,) int array
+        """
+        value = EMPTY if color == Board.EMPTY else COLOR_VALUES[color]
+        return np.count_nonzero(self.tiles == value, axis=(1, 2))
+
+    def mobility(self, color) -> np.ndarray:
+        """
+        Returns the number of legal moves of color in each board
+        :param color:
+        :return: (N,) int array
+        """
+        return np.count_nonzero(self.legal_moves(color), axis=(1, 2))
+
+    def weighted_squares(self, weights, color) -> np.ndarray:
+        """
+        Returns the sum of the weights of the tiles of color minus
+        the sum of the weights of the opponent's tiles, in each board
+        :param weights: (8, 8) array-like with the weight of each tile, indexed by [y][x]
+        :param color:
+        :return: (N,) array
+        """
+        weights = np.asarray(weights)
+        return np.einsum('nyx,yx->n', self.tiles * COLOR_VALUES[color], weights)
@@ -0,0 +1,641 @@
+from .board import BOARD_STRUCT, BaseBoard, Board, MOVES, NO_FLIPS, RAYS, ZOBRIST, ZOBRIST_FLIP, popcount, squares
+
+# the board is stored as two 64-bit integers, one per color.
+# Bit i corresponds to the tile at row i // 8 and column i % 8,
+# i.e. (x, y) board coordinates map to bit y * 8 + x
+FULL = 0xFFFFFFFFFFFFFFFF
+NOT_COL_0 = 0xFEFEFEFEFEFEFEFE  # all tiles except the ones in the leftmost column
+NOT_COL_7 = 0x7F7F7F7F7F7F7F7F  # all tiles except the ones in the rightmost column
+
+# (shift amount, mask applied after shifting) for each direction.
+# Positive shifts move towards higher bits (<<), negative ones towards lower bits (>>).
+# The masks discard the bits that wrapped around a row after the shift
+SHIFTS = [
+    (1, NOT_COL_0),    # RIGHT
+    (-1, NOT_COL_7),   # LEFT
+    (8, FULL),         # DOWN
+    (-8, FULL),        # UP
+    (9, NOT_COL_0),    # DOWN_RIGHT
+    (7, NOT_COL_7),    # DOWN_LEFT
+    (-7, NOT_COL_0),   # UP_RIGHT
+    (-9, NOT_COL_7),   # UP_LEFT
+]
+
+INITIAL_BLACK = (1 << 28) | (1 << 35)  # (4,3) and (3,4)
+INITIAL_WHITE = (1 << 27) | (1 << 36)  # (3,3) and (4,4)
+
+
+def move_mask(player: int, opponent: int) -> int:
+    """
+    Returns a bitmask with the legal moves of player, using
+    shift-and-mask propagation along the eight directions
+    :param player: bitboard of the player to move
+    :param opponent: bitboard of the opponent
+    :return: int
+    """
+    empty = ~(player | opponent) & FULL
+    moves = 0
+    for shift, mask in SHIFTS:
+        opp = opponent & mask
+        if shift > 0:
+            x = (player << shift) & opp
+            x |= (x << shift) & opp
+            x |= (x << shift) & opp
+            x |= (x << shift) & opp
+            x |= (x << shift) & opp
+            x |= (x << shift) & opp
+            moves |= (x << shift) & mask
+        else:
+            shift = -shift
+            x = (player >> shift) & opp
+            x |= (x >> shift) & opp
+            x |= (x >> shift) & opp
+            x |= (x >> shift) & opp
+            x |= (x >> shift) & opp
+            x |= (x >> shift) & opp
+            moves |= (x >> shift) & mask
+    return moves & empty
+
+
+def flip_mask(square: int, player: int, opponent: int) -> int:
+    """
+    Returns a bitmask with the opponent tiles that are flipped
+    when player places a tile on the given square.
+    Legality is not checked (an illegal move flips nothing)
+    :param square: bit index of the move (y * 8 + x)
+    :param player: bitboard of the player making the move
+    :param opponent: bitboard of the opponent
+    :return: int
+    """
+    origin = 1 << square
+    flips = 0
+    for shift, mask in SHIFTS:
+        line = 0
+        if shift > 0:
+            x = (origin << shift) & mask
+            while x & opponent:
+                line |= x
+                x = (x << shift) & mask
+        else:
+            x = (origin >> -shift) & mask
+            while x & opponent:
+                line |= x
+                x = (x >> -shift) & mask
+        if x & player:
+            flips |= line
+    return flips
+
+
+def _line_masks(dy, dx):
+    """
+    Returns the masks of all lines of the board in the given direction
+    (e.g. the 8 rows for dy,dx = 0,1 or the 15 diagonals for 1,1)
+    :param dy: row step
+    :param dx: column step
+    :return: list of int
+    """
+    lines = []
+    for start in range(64):
+        y, x = start >> 3, start & 7
+        if 0 <= y - dy <= 7 and 0 <= x - dx <= 7:
+            continue  # not the first tile of its line
+        line = 0
+        while 0 <= y <= 7 and 0 <= x <= 7:
+            line |= 1 << (y * 8 + x)
+            y, x = y + dy, x + dx
+        lines.append(line)
+    return lines
+
+
+# lines along each axis (rows, columns, diagonals and anti-diagonals), with
+# the shifts to the neighbors along the axis and the tiles that have no
+# neighbor on one of its sides (the disc is protected by the border)
+BORDER = 0xFF000000000000FF | 0x8181818181818181
+STABILITY_AXES = [
+    (_line_masks(0, 1), (1, NOT_COL_0), (-1, NOT_COL_7), 0x8181818181818181),
+    (_line_masks(1, 0), (8, FULL), (-8, FULL), 0xFF000000000000FF),
+    (_line_masks(1, 1), (9, NOT_COL_0), (-9, NOT_COL_7), BORDER),
+    (_line_masks(1, -1), (7, NOT_COL_7), (-7, NOT_COL_0), BORDER),
+]
+
+
+def full_lines(occupied: int):
+    """
+    Returns, for each stability axis, the mask of the tiles whose line along the axis is full
+    :param occupied: bitboard with all pieces
+    :return: list of 4 ints
+    """
+    return [sum(line for line in lines if occupied & line == line) for lines, _, _, _ in STABILITY_AXES]
+
+
+def stable_mask(player: int, opponent: int) -> int:
+    """
+    Returns the bitmask of stable discs of player (discs that can not be flipped anymore).
+    A disc is stable if, along each of the four axes, its line is full or one of its
+    neighbors is the border or a stable disc of the same color. Stability is propagated
+    from the corners and edges until no more stable discs are found.
+    This is a lower bound on the exact number of stable discs (the usual one in othello engines)
+    :param player:
+    :param opponent:
+    :return: int
+    """
+    if player == 0:
+        return 0
+
+    # tiles protected along each axis regardless of other stable discs
+    protected = [
+        full | border
+        for full, (_, _, _, border) in zip(full_lines(player | opponent), STABILITY_AXES)
+    ]
+
+    stable = 0
+    while True:
+        new_stable = player
+        for (_, (left, left_mask), (right, right_mask), _), axis_protected in zip(STABILITY_AXES, protected):
+            neighbors = ((stable << left) & left_mask) | ((stable >> -right) & right_mask)
+            new_stable &= axis_protected | neighbors
+        if new_stable == stable:
+            return stable
+        stable = new_stable
+
+
+def _zobrist_row_table(keys):
+    """
+    Splits zobrist keys of the 64 tiles in 8 tables (one per row)
+    with the xor of the keys of every combination of tiles in the row,
+    so that the key of any bitmask is computed with 8 lookups (see mask_key)
+    :param keys: list with the 64 zobrist keys
+    :return: list of 8 lists of 256 ints
+    """
+    table = []
+    for row in range(8):
+        entries = [0] * 256
+        for byte in range(1, 256):
+            low = byte & -byte
+            entries[byte] = entries[byte ^ low] ^ keys[row * 8 + low.bit_length() - 1]
+        table.append(entries)
+    return table
+
+
+ZOBRIST_ROWS = {color: _zobrist_row_table(keys) for color, keys in ZOBRIST.items()}
+ZOBRIST_FLIP_ROWS = _zobrist_row_table(ZOBRIST_FLIP)
+
+
+def mask_key(mask: int, table) -> int:
+    """
+    Returns the xor of the zobrist keys of the tiles in the bitmask
+    :param mask: bitmask of tiles
+    :param table: one of ZOBRIST_ROWS or ZOBRIST_FLIP_ROWS
+    :return: int
+    """
+    key = 0
+    row = 0
+    while mask:
+        key ^= table[row][mask & 0xFF]
+        mask >>= 8
+        row += 1
+    return key
+
+
+# the 8 symmetries of the board (rotations and reflections) are numbered 0-7:
+# bit 2 transposes the board (x, y -> y, x), then bit 0 mirrors the columns
+# (x -> 7 - x) and bit 1 mirrors the rows (y -> 7 - y); 0 is the identity
+SYMMETRIES = range(8)
+
+
+def mirror_columns(bits: int) -> int:
+    """
+    Returns the bitboard mirrored left to right (x -> 7 - x)
+    """
+    bits = ((bits >> 1) & 0x5555555555555555) | ((bits & 0x5555555555555555) << 1)
+    bits = ((bits >> 2) & 0x3333333333333333) | ((bits & 0x3333333333333333) << 2)
+    return ((bits >> 4) & 0x0F0F0F0F0F0F0F0F) | ((bits & 0x0F0F0F0F0F0F0F0F) << 4)
+
+
+def mirror_rows(bits: int) -> int:
+    """
+    Returns the bitboard mirrored top to bottom (y -> 7 - y)
+    """
+    return int.from_bytes(bits.to_bytes(8, 'little'), 'big')
+
+
+def transpose(bits: int) -> int:
+    """
+    Returns the bitboard mirrored along the main diagonal (x, y -> y, x)
+    """
+    t = 0x0F0F0F0F00000000 & (bits ^ (bits << 28))
+    bits ^= t ^ (t >> 28)
+    t = 0x3333000033330000 & (bits ^ (bits << 14))
+    bits ^= t ^ (t >> 14)
+    t = 0x5500550055005500 & (bits ^ (bits << 7))
+    return bits ^ t ^ (t >> 7)
+
+
+def transform(bits: int, symmetry: int) -> int:
+    """
+    Returns the bitboard transformed by one of the SYMMETRIES
+    """
+    if symmetry & 4:
+        bits = transpose(bits)
+    if symmetry & 1:
+        bits = mirror_columns(bits)
+    if symmetry & 2:
+        bits = mirror_rows(bits)
+    return bits
+
+
+def transform_square(square: int, symmetry: int) -> int:
+    """
+    Returns the bit index of a square after transforming the board by one of the SYMMETRIES
+    """
+    y, x = square >> 3, square & 7
+    if symmetry & 4:
+        x, y = y, x
+    if symmetry & 1:
+        x = 7 - x
+    if symmetry & 2:
+        y = 7 - y
+    return y * 8 + x
+
+
+def inverse_square(square: int, symmetry: int) -> int:
+    """
+    Returns the bit index of a square before the board was transformed by one of the SYMMETRIES
+    """
+    y, x = square >> 3, square & 7
+    if symmetry & 2:
+        y = 7 - y
+    if symmetry & 1:
+        x = 7 - x
+    if symmetry & 4:
+        x, y = y, x
+    return y * 8 + x
+
+
+def canonical(player: int, opponent: int):
+    """
+    Returns the smallest (player, opponent) pair among the 8 symmetric positions,
+    which is the same for all of them, and the symmetry that gives it
+    :param player: bitboard of the player to move
+    :param opponent: bitboard of the opponent
+    :return: ((int, int), int)
+    """
+    best, best_symmetry = (player, opponent), 0
+    transposed = (transpose(player), transpose(opponent))
+    for base, offset in (((player, opponent), 0), (transposed, 4)):
+        p, o = base
+        for symmetry in (0, 1, 3, 2):  # mirrors one axis at a time
+            if symmetry == 1 or symmetry == 2:
+                p, o = mirror_columns(p), mirror_columns(o)
+            elif symmetry == 3:
+                p, o = mirror_rows(p), mirror_rows(o)
+            if (p, o) < best:
+                best, best_symmetry = (p, o), symmetry + offset
+    return best, best_symmetry
+
+
+def from_string(string):
+    """
+    Generates a bitboard from the string representation
+    (same format accepted by board.from_string)
+    :param string:
+    :return: BitBoard object
+    """
+    black = white = 0
+    for lineno, line in enumerate(string.strip().split('\n')):
+        for colno, col in enumerate(line.strip()):
+            if col == Board.BLACK:
+                black |= 1 << (lineno * 8 + colno)
+            elif col == Board.WHITE:
+                white |= 1 << (lineno * 8 + colno)
+    return BitBoard(black, white)
+
+
+def from_board(board: BaseBoard) -> 'BitBoard':
+    """
+    Converts a matrix-backed Board into a BitBoard
+    :param board:
+    :return: BitBoard object
+    """
+    if isinstance(board, BitBoard):
+        return board.copy()
+    return BitBoard(*board.bitboards(Board.BLACK))
+
+
+class BitBoard(BaseBoard):
+    """
+    Bitboard-backed implementation of the board (see BaseBoard).
+    Black and white tiles are kept in two 64-bit integers and
+    legal moves and flips are computed with shift-and-mask operations
+    over all tiles at once. The public API is the same as Board's:
+    the character matrix in 'tiles' is built lazily, only when read,
+    and 'piece_count' is derived from the bitboards.
+    Caches are only allocated when used, so that a BitBoard
+    is compact enough to keep many positions in memory.
+    """
+
+    __slots__ = ('black', 'white', '_black_moves', '_white_moves', '_tiles')
+
+    def __init__(self, black=INITIAL_BLACK, white=INITIAL_WHITE):
+        """
+        Initializes the board with the given bitboards (defaults to othello's initial board)
+        :param black: bitboard with black tiles
+        :param white: bitboard with white tiles
+        """
+        self.black = black
+        self.white = white
+
+        # caches legal move masks of each color
+        self._black_moves = None
+        self._white_moves = None
+
+        # caches legal move sets, as Board does (the dict is only created when needed)
+        self._legal_moves = None
+
+        # materialized character matrix (see tiles)
+        self._tiles = None
+
+        # stores the flipped tiles at the last process_move, if track_flipped is set
+        self.flipped = NO_FLIPS
+        self.track_flipped = True
+
+        # undo records of the moves done with make_move (see unmake_move)
+        self._undo = []
+
+        # zobrist hash of the tiles, updated at each move (see Board.key)
+        self._hash = self.compute_key()
+
+    @classmethod
+    def from_bitboards(cls, black: int, white: int) -> 'BitBoard':
+        """
+        Creates a bitboard from the black and white bitboards
+        :param black:
+        :param white:
+        :return: BitBoard object
+        """
+        if black & white:
+            raise ValueError("Black and white pieces overlap: %016x" % (black & white))
+        return cls(black, white)
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns the 16-byte binary representation of the board (see Board.to_bytes)
+        :return: bytes
+        """
+        return BOARD_STRUCT.pack(self.black, self.white)
+
+    def compute_key(self) -> int:
+        """
+        Computes the zobrist hash of the board tiles from scratch
+        :return: int
+        """
+        return mask_key(self.black, ZOBRIST_ROWS[self.BLACK]) ^ mask_key(self.white, ZOBRIST_ROWS[self.WHITE])
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, BitBoard):
+            return self.black == other.black and self.white == other.white
+        return super().__eq__(other)
+
+    @property
+    def tiles(self):
+        """
+        Character matrix of the board, built on demand and cached until the next move
+        :return: list of 8 lists of 8 characters
+        """
+        if self._tiles is None:
+            black, white = self.black, self.white
+            self._tiles = [
+                [self.BLACK if black >> (y * 8 + x) & 1 else self.WHITE if white >> (y * 8 + x) & 1 else self.EMPTY
+                 for x in range(8)]
+                for y in range(8)
+            ]
+        return self._tiles
+
+    @property
+    def piece_count(self):
+        """
+        Number of pieces of each color and of empty tiles, as in Board.piece_count.
+        The dict is built at each access, prefer num_pieces in loops
+        :return: dict
+        """
+        black, white = popcount(self.black), popcount(self.white)
+        return {self.BLACK: black, self.WHITE: white, self.EMPTY: 64 - black - white}
+
+    def num_pieces(self, color: str) -> int:
+        """
+        Returns the number of pieces of the given color (or of empty tiles)
+        :param color:
+        :return:
+        """
+        if color == self.BLACK:
+            return popcount(self.black)
+        if color == self.WHITE:
+            return popcount(self.white)
+        return 64 - popcount(self.black | self.white)
+
+    def winner(self):
+        """
+        Returns the color that has won the match, or None if it is a draw
+        This only makes sense if self is a terminal state (not checked here)
+        :return:
+        """
+        black, white = popcount(self.black), popcount(self.white)
+        if black > white:
+            return self.BLACK
+        elif black < white:
+            return self.WHITE
+        else:
+            return None
+
+    def bitboards(self, color):
+        """
+        Returns the (player, opponent) bitboards from the point of view of color
+        :param color:
+        :return: (int, int)
+        """
+        if color == self.BLACK:
+            return self.black, self.white
+        return self.white, self.black
+
+    def move_mask(self, color) -> int:
+        """
+        Returns the bitmask of legal moves for the given color
+        :param color:
+        :return: int
+        """
+        if color == self.BLACK:
+            if self._black_moves is None:
+                self._black_moves = move_mask(self.black, self.white)
+            return self._black_moves
+        if self._white_moves is None:
+            self._white_moves = move_mask(self.white, self.black)
+        return self._white_moves
+
+    def legal_moves(self, color: str) -> set:
+        """
+        Returns a set of legal moves (x,y coordinates) for the given color
+        :param color:str
+        :return:
+        """
+        if self._legal_moves is None:
+            self._legal_moves = {}
+        moves = self._legal_moves.get(color)
+        if moves is None:
+            moves = self._legal_moves[color] = {MOVES[sq] for sq in squares(self.move_mask(color))}
+        return moves
+
+    def has_legal_move(self, color):
+        """
+        Returns whether the given color has any legal move
+        :param color:
+        :return:bool
+        """
+        return self.move_mask(color) != 0
+
+    def is_legal(self, move, color):
+        """
+        Returns whether the move is legal for the given color
+        :param move: (int,int) tile position (x,y coords) to place the disk
+        :param color: color of the player making the move
+        :return: bool
+        """
+        x, y = move
+        return 0 <= x < 8 and 0 <= y < 8 and self.move_mask(color) >> (y * 8 + x) & 1 == 1
+
+    def is_terminal_state(self):
+        """
+        Returns whether the current state is terminal (game finished) or not
+        :return:
+        """
+        if self.black | self.white == FULL:  # full board, no need to look for moves
+            return True
+        return self.move_mask(self.BLACK) == 0 and self.move_mask(self.WHITE) == 0
+
+    def compute_frontier(self) -> int:
+        """
+        Computes the frontier (empty tiles adjacent to any piece), as Board.compute_frontier
+        :return: bitmask of the tiles (bit y * 8 + x)
+        """
+        occupied = self.black | self.white
+        adjacent = 0
+        for shift, mask in SHIFTS:
+            adjacent |= (occupied << shift if shift > 0 else occupied >> -shift) & mask
+        return adjacent & ~occupied & FULL
+
+    def _place(self, square, color) -> int:
+        """
+        Places a tile of color on the square, flipping the surrounded tiles
+        and updating the hash. Resets the caches. Legality is not checked
+        :param square: bit index of the move (y * 8 + x)
+        :param color:
+        :return: the bitmask of flipped tiles
+        """
+        player, opponent = self.bitboards(color)
+        flips = flip_mask(square, player, opponent)
+        if color == self.BLACK:
+            self.black, self.white = player | flips | (1 << square), opponent & ~flips
+        else:
+            self.white, self.black = player | flips | (1 << square), opponent & ~flips
+
+        self._hash ^= ZOBRIST[color][square] ^ mask_key(flips, ZOBRIST_FLIP_ROWS)
+
+        self._black_moves = self._white_moves = None
+        self._legal_moves = None
+        self._tiles = None
+        return flips
+
+    def process_move(self, move_xy, color) -> bool:
+        """
+        Executes the placement of a tile of a given color
+        in a given position. Note that this is done in-place,
+        changing the current board object! If you want to do lookahead searches,
+        make sure to copy the 'original' board first
+        :param move_xy: position to place the tile in x,y (col,row) coordinates
+        :param color:color of the tile to be placed
+        :return: bool
+        """
+        self.flipped = NO_FLIPS  # resets flipped tiles
+
+        if color not in [self.WHITE, self.BLACK]:
+            raise ValueError("Move must be made by BLACK or WHITE player")
+
+        if not self.is_legal(move_xy, color):
+            return False  # guards against illegal moves
+
+        x, y = move_xy
+        flips = self._place(y * 8 + x, color)
+
+        # for highlighting purposes (see decorated_str), in y,x (row,col) coordinates:
+        # the flipped tiles and, as in Board.process_move, the tile that brackets each line of them
+        if self.track_flipped:
+            self.flipped = {(sq >> 3, sq & 7) for sq in squares(flips)}
+            for ray in RAYS[y * 8 + x]:
+                length = 0
+                while flips >> (ray[length][0] * 8 + ray[length][1]) & 1:
+                    length += 1
+                if length > 0:
+                    self.flipped.add(ray[length])
+        return True
+
+    def make_move(self, move_xy, color) -> bool:
+        """
+        Executes the move in-place like process_move, but records what is needed
+        to revert it with unmake_move. Flipped tiles are not stored in self.flipped
+        :param move_xy: position to place the tile in x,y (col,row) coordinates
+        :param color: color of the tile to be placed
+        :return: bool
+        """
+        if color not in [self.WHITE, self.BLACK]:
+            raise ValueError("Move must be made by BLACK or WHITE player")
+
+        if not self.is_legal(move_xy, color):
+            return False  # guards against illegal moves
+
+        # the undo record: previous bitboards, cached legal moves and hash (counts are derived from the bitboards)
+        self._undo.append((
+            self.black, self.white, self._black_moves, self._white_moves, self._legal_moves, self._hash
+        ))
+
+        x, y = move_xy
+        self._place(y * 8 + x, color)
+        return True
+
+    def unmake_move(self):
+        """
+        Reverts the last move done with make_move, restoring tiles
+        and the legal moves cached before it
+        :return:
+        """
+        self.black, self.white, self._black_moves, self._white_moves, self._legal_moves, self._hash = self._undo.pop()
+        self._tiles = None
+
+    def copy(self, keep_legal_moves=True) -> 'BitBoard':
+        """
+        Returns a copy of this board object, carrying over the
+        legal moves already computed unless keep_legal_moves is False
+        :param keep_legal_moves: whether the copy reuses the legal moves cached on this board
+        :return:
+        """
+        new = BitBoard.__new__(BitBoard)
+        new.black, new.white = self.black, self.white
+        if keep_legal_moves:
+            new._black_moves, new._white_moves = self._black_moves, self._white_moves
+            new._legal_moves = None if self._legal_moves is None else self._legal_moves.copy()
+        else:
+            new._black_moves = new._white_moves = new._legal_moves = None
+        new._tiles = None
+        new.flipped = NO_FLIPS
+        new.track_flipped = self.track_flipped
+        new._undo = []
+        new._hash = self._hash
+        return new
+
+    def __str__(self):
+        """
+        Returns the string representation of the board
+        :return: str
+        """
+        return ''.join('%s\n' % ''.join(row) for row in self.tiles)
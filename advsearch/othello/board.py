@@ -1,3 +1,7 @@
+import random
+import struct
+
+
 def from_file(path_to_file):
     """
     Generates a board from the string representation
@@ -24,38 +28,51 @@ def from_string(string):
             b.tiles[lineno][colno] = col
             b.piece_count[col] += 1
 
+    b._hash = b.compute_key()
+    b._frontier = b.compute_frontier()
     return b
 
 
-class Board(object):
+def from_bytes(data):
     """
-    Board implementation strongly inspired by: http://dhconnelly.com/paip-python/docs/paip/othello.html
-    The internal representation is an 8x8 matrix of characters. Each character represents a tile
-    and can be either 'B' for a black piece, 'W' for a white piece or '.' for an empty place, where
-    a piece can be played. For example, the initial board is the following:
-    ........
-    ........
-    ........
-    ...WB...
-    ...BW...
-    ........
-    ........
-    ........
+    Generates a board from its binary representation (see Board.to_bytes)
+    :param data: 16 bytes
+    :return: Board object
+    """
+    return Board.from_bytes(data)
 
-    Coordinate system is such that x grows from left to right and y from top to bottom:
-      01234567 --> x axis
-    0 ........
-    1 ........
-    2 ........
-    3 ...WB...
-    4 ...BW...
-    5 ........
-    6 ........
-    7 ........
-    |
-    |
-    v
-    y axis
+
+def pack_boards(boards) -> bytes:
+    """
+    Packs a sequence of boards (of any Board implementation) into a single
+    bytes object, with the 16-byte representation of each board one after another.
+    The result can be read as a (N, 2) array of black and white bitboards with
+    numpy.frombuffer(data, dtype='<u8').reshape(-1, 2)
+    :param boards:
+    :return: bytes
+    """
+    return b''.join(board.to_bytes() for board in boards)
+
+
+def unpack_boards(data, board_class=None) -> list:
+    """
+    Unpacks the boards packed with pack_boards
+    :param data: bytes-like object with a multiple of 16 bytes
+    :param board_class: Board implementation of the returned boards (defaults to Board)
+    :return: list of Board
+    """
+    if len(data) % BOARD_STRUCT.size != 0:
+        raise ValueError("Data size is not a multiple of %d: %d" % (BOARD_STRUCT.size, len(data)))
+    board_class = board_class or Board
+    return [board_class.from_bitboards(black, white) for black, white in BOARD_STRUCT.iter_unpack(data)]
+
+
+class BaseBoard(object):
+    """
+    Interface shared by the board implementations (Board below and bitboard.BitBoard):
+    colors, directions, zobrist key, binary representation and printing.
+    Implementations provide tiles (the 8x8 matrix of characters, see Board),
+    the piece counts and the moves, each with its own slots
     """
 
     BLACK = 'B'
@@ -82,24 +99,30 @@ class Board(object):
         EMPTY: '-'
     }
 
-    def __init__(self):
+    # no per-instance __dict__, keeps boards small when many of them are in memory
+    __slots__ = ('_legal_moves', 'flipped', 'track_flipped', '_undo', '_hash')
+
+    def key(self) -> int:
         """
-        Initializes the 8x8 board with all tiles empty, except the center
-        that are initialized according to othello's initial board
-        :return:
+        Returns the 64-bit zobrist hash of the board tiles. It is maintained
+        incrementally at each move, so this is O(1) and can be used to
+        index transposition tables, evaluation caches and opening books.
+        Note that the player to move is not part of it (see GameState.key)
+        :return: int
         """
-        self.tiles = [[self.EMPTY] * 8 for i in range(8)]
+        return self._hash
 
-        self.tiles[3][3], self.tiles[3][4] = self.WHITE, self.BLACK
-        self.tiles[4][3], self.tiles[4][4] = self.BLACK, self.WHITE
-
-        # cache legal moves in attempt to reduce function calls
-        self._legal_moves = {self.BLACK: None, self.WHITE: None}
-
-        self.piece_count = {self.BLACK: 2, self.WHITE: 2, self.EMPTY: 60}
+    def __hash__(self):
+        return self.key()
 
-        # stores the flipped tiles at each move
-        self.flipped = set()
+    def __eq__(self, other):
+        """
+        Boards are equal if they have the same tiles
+        (regardless of implementation)
+        """
+        if not isinstance(other, BaseBoard):
+            return NotImplemented
+        return self.key() == other.key() and self.tiles == other.tiles
 
     def is_within_bounds(self, move):
         """
@@ -119,23 +142,22 @@ class Board(object):
         # move is queried row,col but stored col,row in legal_moves
         return move in self.legal_moves(color)
 
-    def is_terminal_state(self):
+    def bitboards(self, color):
         """
-        Returns whether the current state is terminal (game finished) or not
-        :return:
+        Returns the (player, opponent) bitboards from the point of view of color,
+        where bit y*8+x is set if the tile x,y holds a piece of that player
+        :param color:
+        :return: (int, int)
         """
-        no_moves_black = len(self.legal_moves(self.BLACK)) == 0
-        no_moves_white = len(self.legal_moves(self.WHITE)) == 0
-
-        return no_moves_black and no_moves_white
+        raise NotImplementedError
 
     def num_pieces(self, color: str) -> int:
         """
-        Returns the number of pieces of the given color
+        Returns the number of pieces of the given color (or of empty tiles)
         :param color:
         :return:
         """
-        return self.piece_count[color]
+        raise NotImplementedError
 
     def winner(self):
         """
@@ -143,218 +165,114 @@ class Board(object):
         This only makes sense if self is a terminal state (not checked here)
         :return:
         """
-        if self.piece_count[self.BLACK] > self.piece_count[self.WHITE]:
-            return self.BLACK
-        elif self.piece_count[self.BLACK] < self.piece_count[self.WHITE]:
-            return self.WHITE
-        else:
-            return None
+        raise NotImplementedError
 
-    def find_bracket(self, move, color, direction):
+    def legal_moves(self, color: str) -> set:
         """
-        Traverses the board in given direction trying to
-        find a tile of the given color that surrounds opponent tiles, returns
-        :param move: (int, int)
-        :param color: color of player making the move
-        :param direction: one of eight directions of tile neighborhood
-        :return: (int,int)
+        Returns a set of legal moves (x,y coordinates) for the given color
+        :param color:str
+        :return:
         """
-        # performing inline boundary check to avoid calls for is_within_bounds
-        # this saves some time
-        dx, dy = direction
-        tx, ty = move
-        tx += dx
-        ty += dy
-
-        opp = self.BLACK if color == self.WHITE else self.WHITE  # inline opponent calc.
-
-        if not (0 <= tx <= 7 and 0 <= ty <= 7) or self.tiles[tx][ty] != opp:
-            return False
+        raise NotImplementedError
 
-        while self.tiles[tx][ty] == opp:  # putting is_within_bounds here yields more calls
-            tx += dx
-            ty += dy
-            if not (0 <= tx <= 7 and 0 <= ty <= 7):  # self.is_within_bounds((tx, ty)):
-                return False
-
-        if self.tiles[tx][ty] == self.EMPTY:
-            return False
-        return tx, ty
-
-    def find_where_to_play_from_owned(self, owned, color, direction):
+    def has_legal_move(self, color):
         """
-        Traverses the board in given direction trying to
-        find an empty tile that surrounds opponent tiles, returns it.
-        This is the dual of find_bracket, which goes from empty to
-        the piece of the desired color
-        :param owned: (int, int), col, row coordination of owned tile
-        :param color: color of owned tile
-        :param direction: one of eight directions of tile neighborhood
-        :return: (int,int) or False if not found
-        """
-        # performing inline boundary check to avoid calls for is_within_bounds
-        # this saves some time
-        dx, dy = direction
-        tx, ty = owned
-        tx += dx
-        ty += dy
-        opp = self.BLACK if color == self.WHITE else self.WHITE  # inline opponent calc.
-
-        if not (0 <= tx <= 7 and 0 <= ty <= 7) or self.tiles[tx][ty] != opp:  # color:
-            return False
-
-        while self.tiles[tx][ty] == opp:
-            tx += dx
-            ty += dy
-            if not (0 <= tx <= 7 and 0 <= ty <= 7):
-                return False
-
-        if self.tiles[tx][ty] != self.EMPTY:
-            return False
-        return tx, ty
+        Returns whether the given color has any legal move
+        :param color:
+        :return:bool
+        """
+        raise NotImplementedError
 
-    def copy(self) -> 'Board':
+    def is_terminal_state(self):
         """
-        Returns a copy of this board object
+        Returns whether the current state is terminal (game finished) or not
         :return:
         """
-        return from_string(self.__str__())
+        raise NotImplementedError
 
-    def process_move(self, move_xy, color) -> bool:
+    def stable_discs(self, color):
         """
-        Executes the placement of a tile of a given color
-        in a given position. Note that this is done in-place,
-        changing the current board object! If you want to do lookahead searches,
-        make sure to copy the 'original' board first
-        :param move_xy: position to place the tile in x,y (col,row) coordinates
-        :param color:color of the tile to be placed
-        :return: bool
+        Returns the number and the bitmask (bit y*8+x for tile x,y) of the stable discs
+        of color, i.e. discs that can not be flipped for the rest of the game.
+        See bitboard.stable_mask for the details (it is a lower bound on the exact count)
+        :param color:
+        :return: (int, int)
         """
+        from .bitboard import stable_mask  # bitboard imports this module
+        mask = stable_mask(*self.bitboards(color))
+        return popcount(mask), mask
 
-        self.flipped = set()  # resets flipped tiles
-
-        if color not in [self.WHITE, self.BLACK]:
-            raise ValueError("Move must be made by BLACK or WHITE player")
-
-        if self.is_legal(move_xy, color):
-            # places the piece and update piece counts
-            x, y = move_xy  
-            move_yx = y, x  # move is received in x,y but tiles are indexded by y,x
-
-            self.tiles[y][x] = color
-            self.piece_count[color] += 1
-            self.piece_count[self.EMPTY] -= 1
-
-            # TODO put this inside flip_tiles
-            for direc in self.DIRECTIONS:
-                self.flip_tiles(move_yx, color, direc)  # flip tiles receives moves in y,x
-
-            # resets legal moves
-            self._legal_moves[self.BLACK], self._legal_moves[self.WHITE] = None, None
-            return True
-
-        return False  # guards against illegal moves
-
-    def flip_tiles(self, origin, color, direction):
+    def to_bytes(self) -> bytes:
         """
-        Traverses the board in the given direction,
-        transforming the color of appropriate tiles
-        :param origin: y,x coordinates where the traversal will begin (y,x for matrix indexing)
-        :param color: new color of the pieces
-        :param direction: direction of traversal (see the constants on the beginning of the class)
-        :return:
+        Returns the binary representation of the board: the black and white
+        bitboards (bit y * 8 + x set for a piece at x,y) as two
+        little-endian unsigned 64-bit integers, 16 bytes in total
+        :return: bytes
         """
-        destination = self.find_bracket(origin, color, direction)  # move, player, board, direction)
-        if not destination:
-            return
-        self.flipped.add(destination)  # for highlighting purposes (see decorated_str)
-        ox, oy = origin
-        dx, dy = direction
-
-        nx, ny = ox + dx, oy + dy  # n stands for 'next'
+        return BOARD_STRUCT.pack(*self.bitboards(self.BLACK))
 
-        opp = self.opponent(color)
-
-        while (nx, ny) != destination:
-            # flips the tile and updates piece counts
-            self.flipped.add((nx, ny))
-            self.tiles[nx][ny] = color
-            self.piece_count[color] += 1
-            self.piece_count[opp] -= 1
-            nx, ny = nx + dx, ny + dy
-
-    def legal_moves(self, color:str) -> set:
+    @classmethod
+    def from_bytes(cls, data) -> 'BaseBoard':
         """
-        Returns a set of legal moves for the given color
-        :param color:str
-        :return:
+        Creates a board from its binary representation (see to_bytes)
+        :param data: 16 bytes
+        :return: board object of this class
         """
-        if self._legal_moves[color] is None:
-            # construct the set of legal moves 
-            self._legal_moves[color] = set()
-
-            # the functions called below fill self._legal_moves[color]
-            if self.piece_count[color] > self.piece_count[self.EMPTY]:
-                self.find_legal_moves_dense(color)
-            else:
-                self.find_legal_moves_sparse(color)
-               
-        return self._legal_moves[color]
+        if len(data) != BOARD_STRUCT.size:
+            raise ValueError("A board has %d bytes, got %d" % (BOARD_STRUCT.size, len(data)))
+        return cls.from_bitboards(*BOARD_STRUCT.unpack(data))
 
-    def find_legal_moves_dense(self, color):
+    @classmethod
+    def from_bitboards(cls, black: int, white: int) -> 'BaseBoard':
         """
-        Finds the legal moves for a given color in a dense board.
-        A dense board has less empty tiles than pieces of the given color.
-        :param color:
+        Creates a board from the black and white bitboards
+        (bit y * 8 + x set for a piece at x,y)
+        :param black:
+        :param white:
+        :return: board object
         """
-        # test if every empty tile on the board is a legal move
-        tiles = [(x, y) for x in range(8) for y in range(8) if self.tiles[x][y] == self.EMPTY]
+        raise NotImplementedError
 
-        for x, y in tiles:
-            if self.tiles[x][y] == self.EMPTY:  # and any(map(hasbracket, self.DIRECTIONS)):
-                # performs the 'inline' any:
-                for direc in self.DIRECTIONS:
-                    if self.find_bracket((x, y), color, direc):
-                        # flips x,y because of the way tiles are stored and the x,y coords in real world
-                        self._legal_moves[color].add((y,x))
-                        break
-
-    def find_legal_moves_sparse(self, color):
+    def copy(self, keep_legal_moves=True) -> 'BaseBoard':
         """
-        Finds the legal moves for a given color in a sparse board.
-        A sparse board has more empty tiles than pieces of the given color
-        :param color:
+        Returns a copy of this board object, carrying over the
+        legal moves already computed unless keep_legal_moves is False
+        :param keep_legal_moves: whether the copy reuses the legal moves cached on this board
         :return:
         """
-        # test if every empty tile on the board is a legal move
-        tiles = [(x, y) for x in range(8) for y in range(8) if self.tiles[x][y] == color]
+        raise NotImplementedError
 
-        for y, x in tiles:
-            if self.tiles[y][x] == color:
-                for direc in self.DIRECTIONS:
-                    move_yx = self.find_where_to_play_from_owned((y, x), color, direc)
-                    if move_yx:
-                        # flips x,y because of matrix indexing vs board coords
-                        m_y, m_x = move_yx
-                        self._legal_moves[color].add((m_x, m_y))
+    def __copy__(self):
+        return self.copy()
 
-    def has_legal_move(self, color):
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def process_move(self, move_xy, color) -> bool:
         """
-        Returns whether the given color has any legal move
-        :param color:
-        :return:bool
+        Executes the placement of a tile of a given color in a given position, in-place
+        :param move_xy: position to place the tile in x,y (col,row) coordinates
+        :param color:color of the tile to be placed
+        :return: bool
         """
-        # test if every empty tile on the board is a legal move
-        tiles = [(x, y) for x in range(8) for y in range(8) if self.tiles[x][y] == self.EMPTY]
-
-        for x, y in tiles:
-            # self._legal_moves[color] = [(y, x) for x, y in tiles if self.is_legal((x, y), color)]
+        raise NotImplementedError
 
-            hasbracket = lambda direction: self.find_bracket((x, y), color, direction)
+    def make_move(self, move_xy, color) -> bool:
+        """
+        Executes the move in-place like process_move, but records what is needed
+        to revert it with unmake_move
+        :param move_xy: position to place the tile in x,y (col,row) coordinates
+        :param color: color of the tile to be placed
+        :return: bool
+        """
+        raise NotImplementedError
 
-            if self.tiles[x][y] == self.EMPTY and any(map(hasbracket, self.DIRECTIONS)):
-                return True
-        return False
+    def unmake_move(self):
+        """
+        Reverts the last move done with make_move
+        :return:
+        """
+        raise NotImplementedError
 
     @staticmethod
     def opponent(color):
@@ -363,13 +281,13 @@ class Board(object):
         :param color:
         :return:
         """
-        if color == Board.EMPTY:
+        if color == BaseBoard.EMPTY:
             raise ValueError('Empty has no opponent.')
 
-        if color == Board.WHITE:
-            return Board.BLACK
+        if color == BaseBoard.WHITE:
+            return BaseBoard.BLACK
         else:
-            return Board.WHITE
+            return BaseBoard.WHITE
 
     def print_board(self):
         """
@@ -431,3 +349,522 @@ class Board(object):
             string += '%s\n' % ''.join(row)
 
         return string
+
+
+class Board(BaseBoard):
+    """
+    Board implementation strongly inspired by: http://dhconnelly.com/paip-python/docs/paip/othello.html
+    The internal representation is an 8x8 matrix of characters. Each character represents a tile
+    and can be either 'B' for a black piece, 'W' for a white piece or '.' for an empty place, where
+    a piece can be played. For example, the initial board is the following:
+    ........
+    ........
+    ........
+    ...WB...
+    ...BW...
+    ........
+    ........
+    ........
+
+    Coordinate system is such that x grows from left to right and y from top to bottom:
+      01234567 --> x axis
+    0 ........
+    1 ........
+    2 ........
+    3 ...WB...
+    4 ...BW...
+    5 ........
+    6 ........
+    7 ........
+    |
+    |
+    v
+    y axis
+    """
+
+    __slots__ = ('tiles', 'piece_count', '_frontier')
+
+    def __init__(self):
+        """
+        Initializes the 8x8 board with all tiles empty, except the center
+        that are initialized according to othello's initial board
+        :return:
+        """
+        self.tiles = [[self.EMPTY] * 8 for i in range(8)]
+
+        self.tiles[3][3], self.tiles[3][4] = self.WHITE, self.BLACK
+        self.tiles[4][3], self.tiles[4][4] = self.BLACK, self.WHITE
+
+        # cache legal moves in attempt to reduce function calls
+        self._legal_moves = {self.BLACK: None, self.WHITE: None}
+
+        self.piece_count = {self.BLACK: 2, self.WHITE: 2, self.EMPTY: 60}
+
+        # stores the flipped tiles at each move, if track_flipped is set.
+        # Only needed for highlighting (see decorated_str), searches can turn it off
+        self.flipped = NO_FLIPS
+        self.track_flipped = True
+
+        # undo records of the moves done with make_move (see unmake_move)
+        self._undo = []
+
+        # zobrist hash of the tiles, updated at each move (see key)
+        self._hash = INITIAL_KEY
+
+        # bitmask of the empty tiles adjacent to a piece (bit y * 8 + x), updated at each move.
+        # Only these tiles can be legal moves
+        self._frontier = self.compute_frontier()
+
+    def compute_key(self) -> int:
+        """
+        Computes the zobrist hash of the board tiles from scratch
+        :return: int
+        """
+        key = 0
+        for y, row in enumerate(self.tiles):
+            for x, piece in enumerate(row):
+                if piece != self.EMPTY:
+                    key ^= ZOBRIST[piece][y * 8 + x]
+        return key
+
+    def compute_frontier(self) -> int:
+        """
+        Computes the frontier (empty tiles adjacent to any piece) from scratch
+        :return: bitmask of the tiles (bit y * 8 + x)
+        """
+        occupied = 0
+        adjacent = 0
+        square = 0
+        for row in self.tiles:
+            for piece in row:
+                if piece != self.EMPTY:
+                    occupied |= 1 << square
+                    adjacent |= NEIGHBOR_MASKS[square]
+                square += 1
+        return adjacent & ~occupied
+
+    def is_terminal_state(self):
+        """
+        Returns whether the current state is terminal (game finished) or not
+        :return:
+        """
+        if self.piece_count[self.EMPTY] == 0:  # full board, no need to look for moves
+            return True
+
+        return not self.has_legal_move(self.BLACK) and not self.has_legal_move(self.WHITE)
+
+    def num_pieces(self, color: str) -> int:
+        """
+        Returns the number of pieces of the given color
+        :param color:
+        :return:
+        """
+        return self.piece_count[color]
+
+    def winner(self):
+        """
+        Returns the color that has won the match, or None if it is a draw
+        This only makes sense if self is a terminal state (not checked here)
+        :return:
+        """
+        if self.piece_count[self.BLACK] > self.piece_count[self.WHITE]:
+            return self.BLACK
+        elif self.piece_count[self.BLACK] < self.piece_count[self.WHITE]:
+            return self.WHITE
+        else:
+            return None
+
+    def bitboards(self, color):
+        """
+        Returns the (player, opponent) bitboards from the point of view of color,
+        where bit y*8+x is set if the tile x,y holds a piece of that player
+        :param color:
+        :return: (int, int)
+        """
+        opponent = self.opponent(color)
+        player_mask = opponent_mask = 0
+        bit = 1
+        for row in self.tiles:
+            for piece in row:
+                if piece == color:
+                    player_mask |= bit
+                elif piece == opponent:
+                    opponent_mask |= bit
+                bit <<= 1
+        return player_mask, opponent_mask
+
+    def find_bracket(self, move, color, direction):
+        """
+        Traverses the board in given direction trying to
+        find a tile of the given color that surrounds opponent tiles, returns
+        :param move: (int, int)
+        :param color: color of player making the move
+        :param direction: one of eight directions of tile neighborhood
+        :return: (int,int)
+        """
+        # walks the precomputed ray, so no boundary checks are needed
+        opp = self.BLACK if color == self.WHITE else self.WHITE  # inline opponent calc.
+        tiles = self.tiles
+        surrounds = False
+        for tx, ty in DIRECTION_RAYS[move[0] * 8 + move[1]][direction]:
+            piece = tiles[tx][ty]
+            if piece != opp:
+                return (tx, ty) if surrounds and piece == color else False
+            surrounds = True
+        return False
+
+    @classmethod
+    def from_bitboards(cls, black: int, white: int) -> 'Board':
+        """
+        Creates a board from the black and white bitboards
+        (bit y * 8 + x set for a piece at x,y)
+        :param black:
+        :param white:
+        :return: Board object
+        """
+        if black & white:
+            raise ValueError("Black and white pieces overlap: %016x" % (black & white))
+
+        b = cls()
+        for y, row in enumerate(b.tiles):
+            black_row, white_row = (black >> (y * 8)) & 0xFF, (white >> (y * 8)) & 0xFF
+            for x in range(8):
+                if black_row >> x & 1:
+                    row[x] = cls.BLACK
+                elif white_row >> x & 1:
+                    row[x] = cls.WHITE
+                else:
+                    row[x] = cls.EMPTY
+
+        black_count, white_count = popcount(black), popcount(white)
+        b.piece_count = {cls.BLACK: black_count, cls.WHITE: white_count, cls.EMPTY: 64 - black_count - white_count}
+        b._hash = b.compute_key()
+        b._frontier = b.compute_frontier()
+        return b
+
+    def copy(self, keep_legal_moves=True) -> 'Board':
+        """
+        Returns a copy of this board object.
+        Tiles and piece counts are cloned directly (no string round-trip)
+        and the legal moves already computed are carried over, unless keep_legal_moves is False.
+        Cached legal move sets are shared with the copy, so they must not be modified
+        :param keep_legal_moves: whether the copy reuses the legal moves cached on this board
+        :return:
+        """
+        new = Board.__new__(Board)
+        new.tiles = [row[:] for row in self.tiles]
+        new.piece_count = self.piece_count.copy()
+        if keep_legal_moves:
+            new._legal_moves = self._legal_moves.copy()
+        else:
+            new._legal_moves = {self.BLACK: None, self.WHITE: None}
+        new.flipped = NO_FLIPS
+        new.track_flipped = self.track_flipped
+        new._undo = []
+        new._hash = self._hash
+        new._frontier = self._frontier
+        return new
+
+    def process_move(self, move_xy, color) -> bool:
+        """
+        Executes the placement of a tile of a given color
+        in a given position. Note that this is done in-place,
+        changing the current board object! If you want to do lookahead searches,
+        make sure to copy the 'original' board first
+        :param move_xy: position to place the tile in x,y (col,row) coordinates
+        :param color:color of the tile to be placed
+        :return: bool
+        """
+
+        self.flipped = set() if self.track_flipped else NO_FLIPS  # resets flipped tiles
+
+        if color not in [self.WHITE, self.BLACK]:
+            raise ValueError("Move must be made by BLACK or WHITE player")
+
+        if self.is_legal(move_xy, color):
+            # places the piece and update piece counts
+            x, y = move_xy  # move is received in x,y but tiles are indexded by y,x
+            tiles = self.tiles
+            opp = self.opponent(color)
+
+            tiles[y][x] = color
+            key = self._hash ^ ZOBRIST[color][y * 8 + x]
+            flipped = []
+
+            # flips the tiles surrounded along each ray leaving the move
+            for ray in RAYS[y * 8 + x]:
+                for length, (ny, nx) in enumerate(ray):
+                    piece = tiles[ny][nx]
+                    if piece != opp:
+                        break
+                else:
+                    continue  # reached the border without finding a bracket
+                if piece != color or length == 0:
+                    continue
+
+                if self.track_flipped:  # for highlighting purposes (see decorated_str)
+                    self.flipped.add((ny, nx))
+                    self.flipped.update(ray[:length])
+                for ny, nx in ray[:length]:
+                    tiles[ny][nx] = color
+                    key ^= ZOBRIST_FLIP[ny * 8 + nx]
+                flipped.extend(ray[:length])
+
+            self.piece_count[color] += len(flipped) + 1
+            self.piece_count[opp] -= len(flipped)
+            self.piece_count[self.EMPTY] -= 1
+            self._hash = key
+
+            # updates the frontier and the cached legal moves
+            self._update_after_move(y, x, flipped)
+            return True
+
+        return False  # guards against illegal moves
+
+    def make_move(self, move_xy, color) -> bool:
+        """
+        Executes the move in-place like process_move, but records what is needed
+        to revert it with unmake_move. Intended for lookahead searches, which can then
+        walk the game tree on a single board instead of copying it at every node.
+        Flipped tiles are not stored in self.flipped (no highlighting is needed in searches)
+        :param move_xy: position to place the tile in x,y (col,row) coordinates
+        :param color: color of the tile to be placed
+        :return: bool
+        """
+        if color not in [self.WHITE, self.BLACK]:
+            raise ValueError("Move must be made by BLACK or WHITE player")
+
+        if not self.is_legal(move_xy, color):
+            return False  # guards against illegal moves
+
+        x, y = move_xy
+        tiles = self.tiles
+        opp = self.opponent(color)
+        key = self._hash ^ ZOBRIST[color][y * 8 + x]
+        flipped = []
+        for ray in RAYS[y * 8 + x]:
+            for length, (ny, nx) in enumerate(ray):
+                piece = tiles[ny][nx]
+                if piece != opp:
+                    break
+            else:
+                continue  # reached the border without finding a bracket
+            if piece != color or length == 0:
+                continue
+
+            for ny, nx in ray[:length]:
+                tiles[ny][nx] = color
+                flipped.append((ny, nx))
+                key ^= ZOBRIST_FLIP[ny * 8 + nx]
+
+        counts = self.piece_count
+        previous = (
+            counts[self.BLACK], counts[self.WHITE], counts[self.EMPTY],
+            self._legal_moves[self.BLACK], self._legal_moves[self.WHITE], self._hash
+        )
+        self._hash = key
+
+        tiles[y][x] = color
+        counts[color] += len(flipped) + 1
+        counts[opp] -= len(flipped)
+        counts[self.EMPTY] -= 1
+        added_frontier = self._update_after_move(y, x, flipped)
+
+        # the undo record: placed tile, its color, flipped tiles, previous counts,
+        # legal moves and hash, and the tiles that entered the frontier
+        self._undo.append((y, x, color, flipped) + previous + (added_frontier,))
+        return True
+
+    def unmake_move(self):
+        """
+        Reverts the last move done with make_move, restoring tiles,
+        piece counts and the legal moves cached before it
+        :return:
+        """
+        y, x, color, flipped, black, white, empty, legal_black, legal_white, self._hash, added_frontier = self._undo.pop()
+
+        tiles = self.tiles
+        opp = self.opponent(color)
+        tiles[y][x] = self.EMPTY
+        for ny, nx in flipped:
+            tiles[ny][nx] = opp
+
+        self.piece_count[self.BLACK], self.piece_count[self.WHITE], self.piece_count[self.EMPTY] = black, white, empty
+        self._legal_moves[self.BLACK], self._legal_moves[self.WHITE] = legal_black, legal_white
+        self._frontier = (self._frontier & ~added_frontier) | (1 << (y * 8 + x))
+
+    def _update_after_move(self, y, x, flipped) -> list:
+        """
+        Updates the frontier and the cached legal moves after a piece
+        was placed on y,x and the given tiles were flipped.
+        Instead of discarding the cached legal moves, only the empty tiles
+        whose rays reach a changed tile (through a contiguous line of pieces) are re-tested,
+        as the legality of the other tiles cannot have changed.
+        Cached sets are replaced, not modified, as they may be shared (see copy)
+        :param y: row of the placed piece
+        :param x: column of the placed piece
+        :param flipped: list of y,x coordinates of the flipped tiles
+        :return: bitmask of the tiles added to the frontier (bit y * 8 + x)
+        """
+        tiles = self.tiles
+        square = y * 8 + x
+
+        empty = 0
+        for ny, nx in NEIGHBORS[square]:
+            if tiles[ny][nx] == self.EMPTY:
+                empty |= 1 << (ny * 8 + nx)
+        added = empty & ~self._frontier
+        self._frontier = (self._frontier & ~(1 << square)) | added
+
+        cached = [color for color in (self.BLACK, self.WHITE) if self._legal_moves[color] is not None]
+        if not cached:
+            return added
+
+        # the first empty tile along each ray leaving a changed tile
+        candidates = set()
+        for cy, cx in [(y, x)] + flipped:
+            for ray in LINES[cy * 8 + cx]:
+                for ty, tx in ray:
+                    if tiles[ty][tx] == self.EMPTY:
+                        candidates.add(ty * 8 + tx)
+                        break
+
+        for color in cached:
+            moves = set(self._legal_moves[color])
+            moves.discard(MOVES[square])
+            for candidate in candidates:
+                if self._is_move(candidate, color):
+                    moves.add(MOVES[candidate])
+                else:
+                    moves.discard(MOVES[candidate])
+            self._legal_moves[color] = moves
+        return added
+
+    def _is_move(self, square, color) -> bool:
+        """
+        Returns whether placing a piece of color on the (empty) tile is a legal move
+        :param square: tile index (y * 8 + x)
+        :param color:
+        :return: bool
+        """
+        tiles = self.tiles
+        opp = self.BLACK if color == self.WHITE else self.WHITE  # inline opponent calc.
+        for ray in RAYS[square]:
+            for length, (ty, tx) in enumerate(ray):
+                piece = tiles[ty][tx]
+                if piece != opp:
+                    break
+            if piece == color and length > 0:
+                return True
+        return False
+
+    def legal_moves(self, color:str) -> set:
+        """
+        Returns a set of legal moves for the given color
+        :param color:str
+        :return:
+        """
+        if self._legal_moves[color] is None:
+            # construct the set of legal moves, only frontier tiles can be legal moves
+            self._legal_moves[color] = {MOVES[square] for square in squares(self._frontier) if self._is_move(square, color)}
+
+        return self._legal_moves[color]
+
+    def has_legal_move(self, color):
+        """
+        Returns whether the given color has any legal move
+        :param color:
+        :return:bool
+        """
+        if self._legal_moves[color] is not None:  # reuses the cached moves when available
+            return len(self._legal_moves[color]) > 0
+
+        # test if any frontier tile is a legal move
+        return any(self._is_move(square, color) for square in squares(self._frontier))
+
+
+def _zobrist_table(rng):
+    """
+    Returns 64 random 64-bit numbers, one for each tile
+    :param rng: random number generator
+    :return: list of int
+    """
+    return [rng.getrandbits(64) for _ in range(64)]
+
+
+# zobrist keys of each color at each tile, indexed by y * 8 + x.
+# A fixed seed keeps keys stable across runs (e.g. for opening books stored on disk)
+_zobrist_rng = random.Random(0x07E110)
+ZOBRIST = {Board.BLACK: _zobrist_table(_zobrist_rng), Board.WHITE: _zobrist_table(_zobrist_rng)}
+
+# flipping a tile replaces the key of one color by the other's
+ZOBRIST_FLIP = [black ^ white for black, white in zip(ZOBRIST[Board.BLACK], ZOBRIST[Board.WHITE])]
+
+# keys folded in by GameState for the player to move (None means the game is over)
+ZOBRIST_PLAYER = {Board.BLACK: 0, Board.WHITE: _zobrist_rng.getrandbits(64), None: _zobrist_rng.getrandbits(64)}
+
+# key of the initial board: white at (3,3) and (4,4), black at (4,3) and (3,4)
+INITIAL_KEY = (ZOBRIST[Board.WHITE][27] ^ ZOBRIST[Board.BLACK][28] ^
+               ZOBRIST[Board.BLACK][35] ^ ZOBRIST[Board.WHITE][36])
+
+
+# binary representation of a board: black and white bitboards (see Board.to_bytes)
+BOARD_STRUCT = struct.Struct('<QQ')
+
+# flipped tiles of a board that has not processed any move (or does not track them)
+NO_FLIPS = frozenset()
+
+
+def _ray(origin, direction):
+    """
+    Returns the y,x coordinates of the tiles from origin (exclusive)
+    to the border of the board, in the given direction
+    :param origin: y,x coordinates of the tile
+    :param direction: one of Board.DIRECTIONS (added to y,x as in find_bracket)
+    :return: tuple of (int, int)
+    """
+    ray = []
+    ty, tx = origin[0] + direction[0], origin[1] + direction[1]
+    while 0 <= ty <= 7 and 0 <= tx <= 7:
+        ray.append((ty, tx))
+        ty, tx = ty + direction[0], tx + direction[1]
+    return tuple(ray)
+
+
+# rays of every tile (indexed by y * 8 + x), computed once at import:
+# DIRECTION_RAYS maps each direction to its ray, whereas RAYS only lists
+# the rays with at least two tiles (an opponent piece and the one surrounding it)
+DIRECTION_RAYS = [
+    {direction: _ray((y, x), direction) for direction in Board.DIRECTIONS}
+    for y in range(8) for x in range(8)
+]
+RAYS = [tuple(ray for ray in rays.values() if len(ray) >= 2) for rays in DIRECTION_RAYS]
+
+# all non-empty rays of every tile, and its neighbors (first tile of each ray)
+LINES = [tuple(ray for ray in rays.values() if len(ray) >= 1) for rays in DIRECTION_RAYS]
+NEIGHBORS = [tuple(ray[0] for ray in rays) for rays in LINES]
+NEIGHBOR_MASKS = [sum(1 << (ny * 8 + nx) for ny, nx in neighbors) for neighbors in NEIGHBORS]
+
+# x,y coordinates of each tile (indexed by y * 8 + x), shared by all legal move sets
+MOVES = [(sq & 7, sq >> 3) for sq in range(64)]
+
+
+def squares(mask: int):
+    """
+    Yields the bit indexes set in the mask, from the lowest to the highest
+    :param mask:
+    :return:
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def popcount(mask: int) -> int:
+    """
+    Returns the number of bits set in the mask (int.bit_count needs Python 3.10)
+    :param mask:
+    :return:
+    """
+    return bin(mask).count('1')
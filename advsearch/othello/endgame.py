@@ -0,0 +1,222 @@
+"""
+Exact endgame solver: searches the game tree until the end of the game,
+computing the final disc difference (exact mode) or only whether the game
+is won, lost or drawn (WLD mode, faster since it searches with a narrow window).
+Works on the (player, opponent) bitboards of any Board implementation.
+Moves are searched fastest-first (fewest opponent replies) when many tiles are
+empty, and by parity of the empty regions (quadrants) near the end.
+Solved positions are kept in a small cache of score bounds
+(optionally shared by symmetric positions, see symmetry.py).
+"""
+import time
+from typing import Tuple
+
+from .bitboard import FULL, canonical, flip_mask, move_mask, squares
+from .board import Board, MOVES, popcount
+
+# agents switch to the solver when there are this many empty tiles or fewer
+ENDGAME_EMPTIES = 12
+
+# below this number of empty tiles, moves are ordered by parity only
+# (counting the opponent replies of every move costs more than it saves)
+FASTEST_FIRST_EMPTIES = 7
+
+# positions with fewer empty tiles than this are not cached
+CACHE_MIN_EMPTIES = 6
+
+# the cache is cleared when it reaches this number of positions
+CACHE_SIZE = 100000
+
+# quadrants of the board, used to approximate the regions of empty tiles
+QUADRANTS = [0x0F0F0F0F, 0xF0F0F0F0, 0x0F0F0F0F << 32, 0xF0F0F0F0 << 32]
+
+# the deadline is checked once every this many nodes
+CHECK_INTERVAL = 1024
+
+# score bound of a win, loss or draw in WLD mode
+WIN, DRAW, LOSS = 1, 0, -1
+
+
+def final_score(player: int, opponent: int) -> int:
+    """
+    Returns the final disc difference from the point of view of player,
+    with the empty tiles counted for the winner
+    :param player: bitboard of the player
+    :param opponent: bitboard of the opponent
+    :return: int
+    """
+    player_discs, opponent_discs = popcount(player), popcount(opponent)
+    empties = 64 - player_discs - opponent_discs
+    if player_discs > opponent_discs:
+        return player_discs - opponent_discs + empties
+    elif player_discs < opponent_discs:
+        return player_discs - opponent_discs - empties
+    return 0
+
+
+def should_solve(board: Board, empties: int = ENDGAME_EMPTIES) -> bool:
+    """
+    Returns whether the board is close enough to the end to be solved
+    :param board:
+    :param empties: maximum number of empty tiles
+    :return: bool
+    """
+    return board.num_pieces(Board.EMPTY) <= empties
+
+
+class SolverTimeout(Exception):
+    """
+    Raised inside the solver when its time limit has passed
+    """
+    pass
+
+
+class EndgameSolver(object):
+    """
+    Negamax alpha-beta search until the end of the game.
+    The cache of solved positions is kept between calls to solve
+    (positions of the same game are often reached again one move later).
+    """
+
+    def __init__(self, cache_size: int = CACHE_SIZE, symmetric: bool = False):
+        """
+        :param cache_size: maximum number of cached positions
+        :param symmetric: whether positions are cached in their canonical orientation
+            (bitboard.canonical), so that symmetric positions share one entry
+        """
+        self.cache_size = cache_size
+        self.symmetric = symmetric
+        self.cache = {}  # (player, opponent) -> (lower bound, upper bound)
+        self.nodes = 0
+        self.deadline = None
+
+    def solve(self, board: Board, color: str, exact: bool = True, time_limit: float = None):
+        """
+        Solves the board with color to move.
+        In exact mode, the score is the final disc difference with perfect play;
+        in WLD mode, it is WIN, DRAW or LOSS
+        :param board: board to solve (of any Board implementation, it is not modified)
+        :param color: player to move
+        :param exact: whether to compute the exact disc difference or only win/draw/loss
+        :param time_limit: seconds the solver may take (no limit if None)
+        :return: (score, (x, y) best move), with (-1, -1) as move if color has no legal moves,
+            or None if the time limit was reached before the position was solved
+        """
+        self.nodes = 0
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        try:
+            return self._solve_root(board, color, exact)
+        except SolverTimeout:
+            return None
+
+    def _solve_root(self, board: Board, color: str, exact: bool) -> Tuple[int, Tuple[int, int]]:
+        """
+        Solves the root position (see solve)
+        """
+        player, opponent = board.bitboards(color)
+        moves = move_mask(player, opponent)
+        if moves == 0:
+            # a pass (or the end of the game) is solved as a regular position
+            score = -self._search(opponent, player, -64, 64, False) if move_mask(opponent, player) \
+                else final_score(player, opponent)
+            return (score if exact else _wld(score)), (-1, -1)
+
+        alpha, beta = (-64, 64) if exact else (LOSS, WIN)
+        best_score, best_move = -65, None
+        for square in self._ordered(player, opponent, moves):
+            flips = flip_mask(square, player, opponent)
+            score = -self._search(opponent ^ flips, player | flips | (1 << square), -beta, -alpha, False)
+            if score > best_score:
+                best_score, best_move = score, square
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+        return (best_score if exact else _wld(best_score)), MOVES[best_move]
+
+    def _search(self, player: int, opponent: int, alpha: int, beta: int, passed: bool) -> int:
+        """
+        Returns the score of the position with player to move, within the alpha-beta window
+        :param passed: whether the previous player passed
+        """
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % CHECK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise SolverTimeout()
+
+        moves = move_mask(player, opponent)
+        if moves == 0:
+            if passed:
+                return final_score(player, opponent)
+            return -self._search(opponent, player, -beta, -alpha, True)
+
+        empties = 64 - popcount(player | opponent)
+        key = None
+        if empties >= CACHE_MIN_EMPTIES:
+            key = canonical(player, opponent)[0] if self.symmetric else (player, opponent)
+            bounds = self.cache.get(key)
+            if bounds is not None:
+                lower, upper = bounds
+                if lower >= beta:
+                    return lower
+                if upper <= alpha:
+                    return upper
+                alpha, beta = max(alpha, lower), min(beta, upper)
+                if alpha >= beta:
+                    return alpha
+
+        original_alpha = alpha
+        best = -65
+        ordered = self._ordered(player, opponent, moves) if empties > 1 else [moves.bit_length() - 1]
+        for square in ordered:
+            flips = flip_mask(square, player, opponent)
+            score = -self._search(opponent ^ flips, player | flips | (1 << square), -beta, -alpha, False)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if key is not None:
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()
+            lower, upper = self.cache.get(key, (-64, 64))
+            if best <= original_alpha:
+                upper = min(upper, best)
+            elif best >= beta:
+                lower = max(lower, best)
+            else:
+                lower = upper = best
+            self.cache[key] = (lower, upper)
+        return best
+
+    @staticmethod
+    def _ordered(player: int, opponent: int, moves: int) -> list:
+        """
+        Returns the squares of the moves in the order they should be searched:
+        fastest-first (fewest opponent replies) with many empty tiles,
+        then moves in quadrants with an odd number of empty tiles
+        (the player moving there is likely to also make the last move in the region)
+        """
+        empty = ~(player | opponent) & FULL
+        odd = 0
+        for quadrant in QUADRANTS:
+            if popcount(empty & quadrant) & 1:
+                odd |= quadrant
+
+        if popcount(empty) <= FASTEST_FIRST_EMPTIES:
+            return list(squares(moves & odd)) + list(squares(moves & ~odd))
+
+        keyed = []
+        for square in squares(moves):
+            flips = flip_mask(square, player, opponent)
+            replies = popcount(move_mask(opponent ^ flips, player | flips | (1 << square)))
+            keyed.append((replies, not (odd >> square) & 1, square))
+        keyed.sort()
+        return [square for _, _, square in keyed]
+
+
+def _wld(score: int) -> int:
+    """
+    Returns WIN, DRAW or LOSS according to the sign of the score
+    """
+    return (score > 0) - (score < 0)
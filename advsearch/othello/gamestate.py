@@ -1,5 +1,36 @@
 from typing import Tuple, Union
-from .board import Board
+from .board import BOARD_STRUCT, Board, ZOBRIST_PLAYER
+
+# byte with the player to move in the binary representation of a state (see GameState.to_bytes)
+PLAYER_BYTES = {Board.BLACK: b'B', Board.WHITE: b'W', None: b'.'}
+BYTES_PLAYER = {value[0]: player for player, value in PLAYER_BYTES.items()}
+STATE_SIZE = BOARD_STRUCT.size + 1
+
+
+def pack_states(states) -> bytes:
+    """
+    Packs a sequence of states into a single bytes object,
+    with the STATE_SIZE-byte representation of each state one after another
+    :param states:
+    :return: bytes
+    """
+    return b''.join(state.to_bytes() for state in states)
+
+
+def unpack_states(data, board_class=None) -> list:
+    """
+    Unpacks the states packed with pack_states
+    :param data: bytes-like object with a multiple of STATE_SIZE bytes
+    :param board_class: Board implementation of the boards (defaults to Board)
+    :return: list of GameState
+    """
+    if len(data) % STATE_SIZE != 0:
+        raise ValueError("Data size is not a multiple of %d: %d" % (STATE_SIZE, len(data)))
+    return [
+        GameState.from_bytes(data[start:start + STATE_SIZE], board_class)
+        for start in range(0, len(data), STATE_SIZE)
+    ]
+
 
 class GameState(object):
     """
@@ -9,6 +40,8 @@ class GameState(object):
     board.Board class
     """
 
+    __slots__ = ('board', 'player')
+
     def __init__(self, board:Board, player:str) -> None:
         """
         Initializes the Game state with the given board and player to move.
@@ -24,6 +57,9 @@ class GameState(object):
         """
         Returns whether this state is terminal
         """
+        # the moves of the player to move are usually cached already (see next_player)
+        if self.player is not None and len(self.board.legal_moves(self.player)) > 0:
+            return False
         return self.board.is_terminal_state()
 
     def is_legal_move(self, move:Tuple[int,int]) -> bool:
@@ -45,6 +81,41 @@ class GameState(object):
         """
         return self.board.winner()
 
+    def key(self) -> int:
+        """
+        Returns the 64-bit zobrist hash of this state:
+        the board's key with the player to move folded in
+        """
+        return self.board.key() ^ ZOBRIST_PLAYER[self.player]
+
+    def __hash__(self):
+        return self.key()
+
+    def __eq__(self, other):
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return self.player == other.player and self.board == other.board
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns the binary representation of this state: the 16 bytes of
+        the board (see Board.to_bytes) followed by the player to move
+        ('B', 'W' or '.' if the game is over)
+        """
+        return self.board.to_bytes() + PLAYER_BYTES[self.player]
+
+    @classmethod
+    def from_bytes(cls, data, board_class=None) -> 'GameState':
+        """
+        Creates a state from its binary representation (see to_bytes)
+        :param data: STATE_SIZE bytes
+        :param board_class: Board implementation of the board (defaults to Board)
+        """
+        if len(data) != STATE_SIZE:
+            raise ValueError("A state has %d bytes, got %d" % (STATE_SIZE, len(data)))
+        board_class = board_class or Board
+        return cls(board_class.from_bytes(data[:BOARD_STRUCT.size]), BYTES_PLAYER[data[BOARD_STRUCT.size]])
+
     def get_board(self) -> Board:
         """
         Returns the board configuration
@@ -56,7 +127,13 @@ class GameState(object):
         Returns a copy of this state
         """
         return GameState(self.board.copy(), self.player)
-    
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
     def next_state(self, move:Tuple[int,int]) -> 'GameState':
         """
         Returns the next state given the move.
@@ -68,17 +145,75 @@ class GameState(object):
         if not next_board.process_move(move, self.player):
             raise ValueError("Invalid move: %s" % str(move))
 
-        opponent = Board.opponent(self.player)
-        
-        # alternates the player, but checkes if it has valid moves
-        # also, if neither the opponent nor the player have
-        # valid moves, then the next player is None
-        next_player = None
-        if next_board.has_legal_move(opponent):
-            next_player = opponent
-        elif next_board.has_legal_move(self.player):
-            next_player = self.player
-
-        next_state = GameState(next_board, next_player)
+        next_state = GameState(next_board, self.next_player(next_board, self.player))
 
         return next_state
+
+    @staticmethod
+    def next_player(board:Board, player:str) -> Union[str,None]:
+        """
+        Returns who moves after player has moved on the given board.
+        Alternates the player, but checks if it has valid moves;
+        if neither the opponent nor the player have valid moves, returns None.
+        The legal moves of the returned player are computed once here and
+        stay cached on the board for legal_moves, has_legal_move and is_terminal
+        :param board: the board after player's move
+        :param player: the player that has just moved
+        """
+        if board.num_pieces(Board.EMPTY) == 0:  # full board: game over, no need to look for moves
+            return None
+
+        opponent = Board.opponent(player)
+        if len(board.legal_moves(opponent)) > 0:
+            return opponent
+        if len(board.legal_moves(player)) > 0:
+            return player
+        return None
+
+
+class MutableGameState(GameState):
+    """
+    Game state that is modified in-place by push/pop instead of
+    creating a new object at every move (see next_state).
+    Lookahead searches can walk the whole game tree on a single
+    MutableGameState, as moves are reverted with the board's undo stack.
+    """
+
+    __slots__ = ('_players',)
+
+    def __init__(self, board:Board, player:str) -> None:
+        """
+        Initializes the state with the given board and player to move.
+        The board is modified by push/pop, so pass a copy if the original must be kept.
+
+        :param board: the board configuration
+        :param player: the player to move (can be none if the state is terminal)
+        """
+        super().__init__(board, player)
+        self._players = []  # player to move before each pushed move
+
+    @classmethod
+    def from_state(cls, state:GameState) -> 'MutableGameState':
+        """
+        Returns a mutable state with a copy of the given state's board
+        """
+        return cls(state.board.copy(), state.player)
+
+    def push(self, move:Tuple[int,int]) -> None:
+        """
+        Processes the move in-place and passes the turn
+        with the same rules as next_state
+        :param move: move in x,y (col,row) coordinates
+        """
+        if not self.board.make_move(move, self.player):
+            raise ValueError("Invalid move: %s" % str(move))
+
+        self._players.append(self.player)
+        self.player = self.next_player(self.board, self.player)
+
+    def pop(self) -> None:
+        """
+        Reverts the last pushed move
+        """
+        self.board.unmake_move()
+        self.player = self._players.pop()
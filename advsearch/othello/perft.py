@@ -0,0 +1,110 @@
+"""
+Perft: counts the leaf nodes of the game tree up to a given depth.
+Used to verify move generation (against known counts from the initial position)
+and to measure its speed in nodes per second for each board implementation.
+Usage: python -m advsearch.othello.perft [-d depth] [-b backend] [-f board-file] [-c color]
+"""
+import argparse
+import sys
+import time
+
+from . import board as board_module
+from . import bitboard as bitboard_module
+from .board import Board
+
+# perft counts from the initial position, black to move
+KNOWN_PERFT = {
+    1: 4,
+    2: 12,
+    3: 56,
+    4: 244,
+    5: 1396,
+    6: 8200,
+    7: 55092,
+    8: 390216,
+    9: 3005288,
+    10: 24571284,
+}
+
+# functions that build a board of each implementation from its string representation
+BACKENDS = {
+    'board': board_module.from_string,
+    'bitboard': bitboard_module.from_string,
+}
+
+
+def perft(board: Board, color: str, depth: int) -> int:
+    """
+    Returns the number of leaf nodes of the game tree below the given position,
+    walking it in-place with make_move/unmake_move.
+    As in GameState.next_state, a player without legal moves passes the turn,
+    and a position where neither player can move ends the game (it is a leaf).
+    The pass itself counts as one ply, as in the usual othello perft counts.
+    :param board: board to search from (restored when the function returns)
+    :param color: player to move
+    :param depth: number of plies
+    :return: int
+    """
+    if depth == 0:
+        return 1
+
+    opponent = Board.opponent(color)
+    moves = board.legal_moves(color)
+    if len(moves) == 0:
+        if not board.has_legal_move(opponent):
+            return 1  # game over
+        return perft(board, opponent, depth - 1)  # pass
+
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        board.make_move(move, color)
+        nodes += perft(board, opponent, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def timed_perft(board: Board, color: str, depth: int):
+    """
+    Runs perft, returning the node count and the elapsed time in seconds
+    :return: (int, float)
+    """
+    start = time.perf_counter()
+    nodes = perft(board, color, depth)
+    return nodes, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Othello perft (move generation test and benchmark).')
+    parser.add_argument('-d', '--depth', type=int, default=6,
+                        help='Maximum depth (all depths from 1 are run).')
+    parser.add_argument('-b', '--backend', choices=list(BACKENDS) + ['all'], default='all',
+                        help='Board implementation to test.')
+    parser.add_argument('-f', '--board-file', type=str, default=None,
+                        help='File with the initial board (default: othello\'s initial board). '
+                             'Counts are only checked from the initial board.')
+    parser.add_argument('-c', '--color', choices=[Board.BLACK, Board.WHITE], default=Board.BLACK,
+                        help='Player to move.')
+    args = parser.parse_args()
+
+    if args.board_file is None:
+        position = str(Board())
+    else:
+        position = open(args.board_file).read()
+    check = args.board_file is None and args.color == Board.BLACK
+
+    backends = list(BACKENDS) if args.backend == 'all' else [args.backend]
+    failed = False
+    for backend in backends:
+        print(f'---- {backend} ----')
+        for depth in range(1, args.depth + 1):
+            nodes, elapsed = timed_perft(BACKENDS[backend](position), args.color, depth)
+            status = ''
+            if check and depth in KNOWN_PERFT:
+                status = 'ok' if nodes == KNOWN_PERFT[depth] else f'MISMATCH (expected {KNOWN_PERFT[depth]})'
+                failed = failed or nodes != KNOWN_PERFT[depth]
+            print(f'depth {depth:2}: {nodes:12} nodes {elapsed:9.3f} s {nodes / max(elapsed, 1e-9):12.0f} nodes/s {status}')
+
+    sys.exit(1 if failed else 0)
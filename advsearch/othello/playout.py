@@ -0,0 +1,33 @@
+"""
+Random playouts: positions reached by playing random moves from the initial
+position, used by the tests and benchmarks as sample positions of each phase
+of the game. The moves are drawn from the sorted legal moves, so the same seed
+always gives the same positions.
+"""
+import random
+
+from .board import Board
+from .gamestate import GameState
+
+
+def random_states(count: int, min_plies: int, max_plies: int, seed: int = 0) -> list:
+    """
+    Returns non-terminal states reached by random games after a random number
+    of plies (passes are played by GameState.next_state and do not count)
+    :param count: number of states
+    :param min_plies: minimum number of plies
+    :param max_plies: maximum number of plies (exclusive)
+    :param seed: seed for the random choices
+    :return: list of GameState
+    """
+    rng = random.Random(seed)
+    states = []
+    while len(states) < count:
+        state = GameState(Board(), Board.BLACK)
+        for _ in range(rng.randrange(min_plies, max_plies)):
+            if state.is_terminal():
+                break
+            state = state.next_state(rng.choice(sorted(state.legal_moves())))
+        if not state.is_terminal():
+            states.append(state)
+    return states
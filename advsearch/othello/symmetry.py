@@ -0,0 +1,69 @@
+"""
+Symmetries of the board: the 8 rotations and reflections of a position are
+equivalent (same legal moves, up to the transformation, and same value), so
+caches and books can store one entry per class of symmetric positions, under
+the key of its canonical orientation, with moves stored in that orientation.
+The symmetries are numbered as in bitboard.SYMMETRIES.
+"""
+from typing import Tuple
+
+from .bitboard import SYMMETRIES, ZOBRIST_ROWS, canonical, mask_key, transform
+from .board import Board, ZOBRIST_PLAYER
+
+IDENTITY, MIRROR_COLUMNS, MIRROR_ROWS, ROTATE_180, TRANSPOSE, ROTATE_90, ROTATE_270, ANTI_TRANSPOSE = SYMMETRIES
+
+# inverse of each symmetry (the clockwise rotations by 90 and 270 degrees undo each other)
+INVERSE = [IDENTITY, MIRROR_COLUMNS, MIRROR_ROWS, ROTATE_180, TRANSPOSE, ROTATE_270, ROTATE_90, ANTI_TRANSPOSE]
+
+
+def transform_move(move: Tuple[int, int], symmetry: int) -> Tuple[int, int]:
+    """
+    Returns the coordinates of a move after transforming the board
+    :param move: (x, y) move
+    :param symmetry: one of the SYMMETRIES
+    :return: (x, y)
+    """
+    x, y = move
+    if symmetry & 4:
+        x, y = y, x
+    if symmetry & 1:
+        x = 7 - x
+    if symmetry & 2:
+        y = 7 - y
+    return x, y
+
+
+def inverse_move(move: Tuple[int, int], symmetry: int) -> Tuple[int, int]:
+    """
+    Returns the coordinates of a move before transforming the board (undoes transform_move)
+    :param move: (x, y) move on the transformed board
+    :param symmetry: one of the SYMMETRIES
+    :return: (x, y)
+    """
+    return transform_move(move, INVERSE[symmetry])
+
+
+def transform_board(board: Board, symmetry: int) -> Board:
+    """
+    Returns a transformed copy of the board (of the same class)
+    :param board:
+    :param symmetry: one of the SYMMETRIES
+    :return: Board
+    """
+    black, white = board.bitboards(Board.BLACK)
+    return type(board).from_bitboards(transform(black, symmetry), transform(white, symmetry))
+
+
+def canonical_key(board: Board, player: str) -> Tuple[int, int]:
+    """
+    Returns the key shared by the 8 symmetric variants of a state, and the symmetry
+    that transforms this one into the canonical orientation (the one with the
+    smallest black and white bitboards). The key is the zobrist key (GameState.key)
+    of the state in the canonical orientation
+    :param board:
+    :param player: player to move
+    :return: (key, symmetry)
+    """
+    (black, white), symmetry = canonical(*board.bitboards(Board.BLACK))
+    key = mask_key(black, ZOBRIST_ROWS[Board.BLACK]) ^ mask_key(white, ZOBRIST_ROWS[Board.WHITE])
+    return key ^ ZOBRIST_PLAYER[player], symmetry
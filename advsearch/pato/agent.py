@@ -1,7 +1,11 @@
-from multiprocessing.pool import ThreadPool
+import os
 from typing import Tuple
 from advsearch.othello.board import Board
 from advsearch.othello.gamestate import GameState
+from advsearch.search import PVS, ParallelSearch, PonderingSearch, SearchConfig, TranspositionTable, time_limit_from_delay
+from advsearch.search.agent import SearchAgent
+from advsearch.search.book import BOOK_FILE, open_book
+from advsearch.search.ordering import HistoryOrdering, SQUARE_WEIGHTS
 
 
 # Voce pode criar funcoes auxiliares neste arquivo
@@ -10,7 +14,14 @@ from advsearch.othello.gamestate import GameState
 # Nao esqueca de renomear 'your_agent' com o nome
 # do seu agente.
 
-MAX_DEPTH = 4
+MAX_DEPTH = 60  # a busca é aprofundada iterativamente até acabar o tempo
+DELAY = 5.0  # tempo (em segundos) que o servidor espera por uma jogada, atualizado por set_delay
+PROCESSES = os.cpu_count()  # processos que dividem os movimentos da raiz da busca
+ALGORITHM = PVS  # algoritmo da busca: ALPHA_BETA, PVS ou MTDF (veja benchmarks/algorithms.py)
+ASPIRATION = None  # meia largura da janela de aspiração em torno do valor da iteração anterior (None desativa)
+PONDER = False  # continua buscando no tempo do adversário (em processos auxiliares, só vale a pena com núcleos sobrando)
+BOOK = open_book(os.path.join(os.path.dirname(__file__), BOOK_FILE))  # livro de aberturas (gerado por python -m advsearch.search.book)
+ENDGAME_EMPTIES = 12  # com essa quantidade de casas vazias (ou menos) o jogo é resolvido até o fim
 
 def make_move(state: GameState) -> Tuple[int, int]:
     """
@@ -18,60 +29,32 @@ def make_move(state: GameState) -> Tuple[int, int]:
     :param state: state to make the move
     :return: (int, int) tuple with x, y coordinates of the move (remember: 0 is the first row/column)
     """
-    # o codigo abaixo apenas retorna um movimento aleatorio valido para
-    # a primeira jogada com as pretas.
-    # Remova-o e coloque a sua implementacao da poda alpha-beta
-    global AGENT_COLOR 
-    AGENT_COLOR =  state.player
-    move = minimax(state)
-    return move
-
-
-def minimax(state: GameState) -> Tuple[int, int]:
-    best_move = (-1, -1) # sem movimentos por padrão
-    legal_moves = state.legal_moves()
-    pool = ThreadPool(len(legal_moves))
-
-    # inicia uma thread pra cada sucessor
-    moves_values = pool.starmap(min_move, [(state.next_state(successor), float("-inf"), float("inf"), 1) for successor in legal_moves])
-    pool.close()
-    pool.join()
-
-    max_value = float("-inf")
-    # desempacota os valores, considerando que as threads retornam os valores na ordem original passada pra elas,
-    for i, move_value in enumerate(moves_values):
-        if move_value > max_value:
-            max_value = move_value
-            best_move = i
-
-    return list(legal_moves)[best_move]
-
-def max_move(state: GameState, alpha: float, beta: float, depth=0):
-    if depth >= MAX_DEPTH or state.is_terminal():
-        return __mixed_heuristic(state)
-
-    value = float("-inf")
-    for successor in state.legal_moves():
-        value = max(value, min_move(state.next_state(successor), alpha, beta, depth+1))
-        alpha = max(alpha, value)
-        if alpha >= beta:
-            break
-    return alpha
-
-
-def min_move(state: GameState, alpha: float, beta: float, depth=0):
-    if depth >= MAX_DEPTH or state.is_terminal():
-        return __mixed_heuristic(state)
-
-    value = float("inf")
-    for successor in state.legal_moves():
-        value = min(value, max_move(state.next_state(successor), alpha, beta, depth+1))
-        beta = min(beta, value)
-        if beta <= alpha:
-            break
-    return beta
-
-def __simple_points_heuristic(state: GameState) -> int:
+    if AGENT.search is None:
+        AGENT.setup(state.player, DELAY)  # a busca é criada na primeira jogada
+    return AGENT.make_move(state)
+
+
+def notify_opponent_move(move: Tuple[int, int], state: GameState) -> None:
+    """
+    Called by the server after the opponent's move
+    :param move: (x, y) move of the opponent
+    :param state: state after the move
+    """
+    AGENT.notify_opponent_move(move, state)
+
+
+def set_delay(delay: float) -> None:
+    """
+    Called by the server with the time limit to make a move
+    :param delay: seconds
+    """
+    global DELAY
+    DELAY = delay
+    if AGENT.search is not None:
+        AGENT.setup(AGENT.color, delay)
+
+
+def __simple_points_heuristic(state: GameState, color: str) -> int:
     """
     Cálcula a heuristíca simplesmente pela quantidade de peças do jogador
     contra a quantidade de peças do inimigo.
@@ -87,46 +70,64 @@ def __simple_points_heuristic(state: GameState) -> int:
 
     result = black_count - white_count
 
-    return result if AGENT_COLOR == Board.BLACK else -result
+    return result if color == Board.BLACK else -result
 
-def __mobility_heuristic(state: GameState):
+def __mobility_heuristic(state: GameState, color: str):
     if state.is_terminal():
         return 0.0
     else:
-        player_move_total : int = len(state.board.legal_moves(AGENT_COLOR))
-        opponent_move_total : int = len(state.board.legal_moves(Board.opponent(AGENT_COLOR)))
+        player_move_total : int = len(state.board.legal_moves(color))
+        opponent_move_total : int = len(state.board.legal_moves(Board.opponent(color)))
         return 100 * (player_move_total - opponent_move_total)/(player_move_total + opponent_move_total)
 
 
-__POINT_MAP = [
-    [120, -20, 20, 5, 5, 20, -20, 120],
-    [-20, -40, -5, -5, -5, -5, -40, -20],
-    [20, -5, 15, 3, 3, 15, -5, 20],
-    [5, -5, 3, 3, 3, 3, -5, 5],
-    [5, -5, 3, 3, 3, 3, -5, 5],
-    [20, -5, 15, 3, 3, 15, -5, 20],
-    [-20, -40, -5, -5, -5, -5, -40, -20],
-    [120, -20, 20, 5, 5, 20, -20, 120],
-]
+__POINT_MAP = SQUARE_WEIGHTS  # pesos estáticos de cada casa, também usados na ordenação dos movimentos
 
 
-def __point_map_heuristic(state: GameState):
+def __point_map_heuristic(state: GameState, color: str):
     player_points = 0
     enemy_points = 0
     for x, tile in enumerate(state.board.tiles):
         for y, piece in enumerate(tile):
-            if piece == AGENT_COLOR:
+            if piece == color:
                 player_points += __POINT_MAP[x][y]
-            elif piece == Board.opponent(AGENT_COLOR):
+            elif piece == Board.opponent(color):
                 enemy_points += __POINT_MAP[x][y]
 
     return player_points - enemy_points
 
 
-def __mixed_heuristic(state: GameState) -> int:
+def __mixed_heuristic(state: GameState, color: str) -> int:
     if state.is_terminal():
-        return __simple_points_heuristic(state)
+        return __simple_points_heuristic(state, color)
+
+    point_map_heuristic_result = __point_map_heuristic(state, color)
+    mobility_heuristic_result = __mobility_heuristic(state, color)
+    return point_map_heuristic_result * 0.4 + mobility_heuristic_result * 0.6
+
+
+def new_search():
+    """
+    Returns a new search with the settings above (each Agent has its own)
+    """
+    return (PonderingSearch if PONDER else ParallelSearch)(__mixed_heuristic, processes=PROCESSES, config=SearchConfig(
+        max_depth=MAX_DEPTH,
+        time_limit=time_limit_from_delay(DELAY),
+        cache=TranspositionTable(),
+        ordering=HistoryOrdering(),
+        algorithm=ALGORITHM,
+        aspiration=ASPIRATION,
+        endgame_empties=ENDGAME_EMPTIES,
+    ))
+
+
+class Agent(SearchAgent):
+    """
+    Agent created by the server for each color it plays, kept for all its games
+    """
+
+    def __init__(self):
+        super().__init__(new_search, BOOK, ponder=PONDER)
+
 
-    point_map_heuristic_result = __point_map_heuristic(state)
-    mobility_heuristic_result = __mobility_heuristic(state)
-    return point_map_heuristic_result * 0.4 + mobility_heuristic_result * 0.6
\ No newline at end of file
+AGENT = Agent()  # agente usado pelas funções do módulo (make_move, set_delay, notify_opponent_move)
@@ -1,7 +1,11 @@
-from multiprocessing.pool import ThreadPool
+import os
 from typing import Tuple
 from advsearch.othello.board import Board
 from advsearch.othello.gamestate import GameState
+from advsearch.search import PVS, ParallelSearch, PonderingSearch, SearchConfig, TranspositionTable, time_limit_from_delay
+from advsearch.search.agent import SearchAgent
+from advsearch.search.book import BOOK_FILE, open_book
+from advsearch.search.ordering import HistoryOrdering
 
 
 # Voce pode criar funcoes auxiliares neste arquivo
@@ -10,7 +14,14 @@ from advsearch.othello.gamestate import GameState
 # Nao esqueca de renomear 'your_agent' com o nome
 # do seu agente.
 
-MAX_DEPTH = 4
+MAX_DEPTH = 60  # a busca é aprofundada iterativamente até acabar o tempo
+DELAY = 5.0  # tempo (em segundos) que o servidor espera por uma jogada, atualizado por set_delay
+PROCESSES = os.cpu_count()  # processos que dividem os movimentos da raiz da busca
+ALGORITHM = PVS  # algoritmo da busca: ALPHA_BETA, PVS ou MTDF (veja benchmarks/algorithms.py)
+ASPIRATION = None  # meia largura da janela de aspiração em torno do valor da iteração anterior (None desativa)
+PONDER = False  # continua buscando no tempo do adversário (em processos auxiliares, só vale a pena com núcleos sobrando)
+BOOK = open_book(os.path.join(os.path.dirname(__file__), BOOK_FILE))  # livro de aberturas (gerado por python -m advsearch.search.book)
+ENDGAME_EMPTIES = 12  # com essa quantidade de casas vazias (ou menos) o jogo é resolvido até o fim
 
 def make_move(state: GameState) -> Tuple[int, int]:
     """
@@ -18,64 +29,35 @@ def make_move(state: GameState) -> Tuple[int, int]:
     :param state: state to make the move
     :return: (int, int) tuple with x, y coordinates of the move (remember: 0 is the first row/column)
     """
-    # o codigo abaixo apenas retorna um movimento aleatorio valido para
-    # a primeira jogada com as pretas.
-    # Remova-o e coloque a sua implementacao da poda alpha-beta
-    global AGENT_COLOR 
-    AGENT_COLOR = state.player
-    move = minimax(state)
-    return move
-
-
-def minimax(state: GameState) -> Tuple[int, int]:
-    best_move = (-1, -1) # sem movimentos por padrão
-    legal_moves = state.legal_moves()
-    pool = ThreadPool(len(legal_moves))
-
-    # inicia uma thread pra cada sucessor
-    moves_values = pool.starmap(min_move, [(state.next_state(successor), float("-inf"), float("inf"), 1) for successor in legal_moves])
-    pool.close()
-    pool.join()
-
-    max_value = float("-inf")
-    # desempacota os valores, considerando que as threads retornam os valores na ordem original passada pra elas,
-    for i, move_value in enumerate(moves_values):
-        if move_value > max_value:
-            max_value = move_value
-            best_move = i
-
-    return list(legal_moves)[best_move]
-
-def max_move(state: GameState, alpha: float, beta: float, depth=0):
-    if depth >= MAX_DEPTH or state.is_terminal():
-        return state_evaluation(state)
-
-    value = float("-inf")
-    for successor in state.legal_moves():
-        value = max(value, min_move(state.next_state(successor), alpha, beta, depth+1))
-        alpha = max(alpha, value)
-        if alpha >= beta:
-            break
-    return alpha
-
-
-def min_move(state: GameState, alpha: float, beta: float, depth=0):
-    if depth >= MAX_DEPTH or state.is_terminal():
-        return state_evaluation(state)
-
-    value = float("inf")
-    for successor in state.legal_moves():
-        value = min(value, max_move(state.next_state(successor), alpha, beta, depth+1))
-        beta = min(beta, value)
-        if beta <= alpha:
-            break
-    return beta
+    if AGENT.search is None:
+        AGENT.setup(state.player, DELAY)  # a busca é criada na primeira jogada
+    return AGENT.make_move(state)
+
+
+def notify_opponent_move(move: Tuple[int, int], state: GameState) -> None:
+    """
+    Called by the server after the opponent's move
+    :param move: (x, y) move of the opponent
+    :param state: state after the move
+    """
+    AGENT.notify_opponent_move(move, state)
+
+
+def set_delay(delay: float) -> None:
+    """
+    Called by the server with the time limit to make a move
+    :param delay: seconds
+    """
+    global DELAY
+    DELAY = delay
+    if AGENT.search is not None:
+        AGENT.setup(AGENT.color, delay)
 
 
 # Heuristicas baseadas em: https://courses.cs.washington.edu/courses/cse573/04au/Project/mini1/RUSSIA/Final_Paper.pdf
-def coin_parity(state: GameState) -> float:
-    max_player_sum : int = state.board.num_pieces(AGENT_COLOR)
-    min_player_sum : int = state.board.num_pieces(Board.opponent(AGENT_COLOR))
+def coin_parity(state: GameState, color: str) -> float:
+    max_player_sum : int = state.board.num_pieces(color)
+    min_player_sum : int = state.board.num_pieces(Board.opponent(color))
 
     if max_player_sum - min_player_sum == 0:
         return 0.0
@@ -83,7 +65,7 @@ def coin_parity(state: GameState) -> float:
     return 100 * (max_player_sum - min_player_sum)/(max_player_sum + min_player_sum)
 
 
-def corners_captured(state: GameState) -> float:
+def corners_captured(state: GameState, color: str) -> float:
     max_player_corners : int = 0
     min_player_corners : int = 0
     common_player_corners : int = 0
@@ -94,29 +76,29 @@ def corners_captured(state: GameState) -> float:
     ur_corner = state.board.tiles[0][-1]
     br_corner = state.board.tiles[-1][-1]
 
-    if ul_corner == AGENT_COLOR:
+    if ul_corner == color:
         max_player_corners += 1
-    elif ul_corner == Board.opponent(AGENT_COLOR):
+    elif ul_corner == Board.opponent(color):
         min_player_corners += 1
 
-    if bl_corner == AGENT_COLOR:
+    if bl_corner == color:
         max_player_corners += 1
-    elif bl_corner == Board.opponent(AGENT_COLOR):
+    elif bl_corner == Board.opponent(color):
         min_player_corners += 1
 
-    if ur_corner == AGENT_COLOR:
+    if ur_corner == color:
         max_player_corners += 1
-    elif ur_corner == Board.opponent(AGENT_COLOR):
+    elif ur_corner == Board.opponent(color):
         min_player_corners += 1
 
-    if br_corner == AGENT_COLOR:
+    if br_corner == color:
         max_player_corners += 1
-    elif br_corner == Board.opponent(AGENT_COLOR):
+    elif br_corner == Board.opponent(color):
         min_player_corners += 1
     
     # Potencial corners
-    max_legal_moves : set = state.board.legal_moves(AGENT_COLOR)
-    min_legal_moves : set = state.board.legal_moves(Board.opponent(AGENT_COLOR))
+    max_legal_moves : set = state.board.legal_moves(color)
+    min_legal_moves : set = state.board.legal_moves(Board.opponent(color))
     
     if (0, 0) in max_legal_moves and (0, 0) in min_legal_moves:
         common_player_corners += 3
@@ -155,16 +137,16 @@ def corners_captured(state: GameState) -> float:
     return 100 * numerator/denominator
 
 
-def mobility(state: GameState):
+def mobility(state: GameState, color: str):
     if state.is_terminal():
         return 0.0
     else:
-        player_move_total : int = len(state.board.legal_moves(AGENT_COLOR))
-        opponent_move_total : int = len(state.board.legal_moves(Board.opponent(AGENT_COLOR)))
+        player_move_total : int = len(state.board.legal_moves(color))
+        opponent_move_total : int = len(state.board.legal_moves(Board.opponent(color)))
         return 100 * (player_move_total - opponent_move_total)/(player_move_total + opponent_move_total)
 
 
-def state_evaluation(state: GameState) -> float:
+def state_evaluation(state: GameState, color: str) -> float:
     # Estimate game progress in a range from [0, 10]
     game_progress = 100 * (1 - state.board.num_pieces(Board.EMPTY)/64)
     if game_progress > 90:
@@ -180,4 +162,31 @@ def state_evaluation(state: GameState) -> float:
         mobility_w = 0.6
         corners_w = 0.2
     
-    return coin_parity(state) * coin_parity_w + mobility(state) * mobility_w + corners_captured(state)*corners_w
\ No newline at end of file
+    return coin_parity(state, color) * coin_parity_w + mobility(state, color) * mobility_w + corners_captured(state, color)*corners_w
+
+
+def new_search():
+    """
+    Returns a new search with the settings above (each Agent has its own)
+    """
+    return (PonderingSearch if PONDER else ParallelSearch)(state_evaluation, processes=PROCESSES, config=SearchConfig(
+        max_depth=MAX_DEPTH,
+        time_limit=time_limit_from_delay(DELAY),
+        cache=TranspositionTable(),
+        ordering=HistoryOrdering(),
+        algorithm=ALGORITHM,
+        aspiration=ASPIRATION,
+        endgame_empties=ENDGAME_EMPTIES,
+    ))
+
+
+class Agent(SearchAgent):
+    """
+    Agent created by the server for each color it plays, kept for all its games
+    """
+
+    def __init__(self):
+        super().__init__(new_search, BOOK, ponder=PONDER)
+
+
+AGENT = Agent()  # agente usado pelas funções do módulo (make_move, set_delay, notify_opponent_move)
@@ -0,0 +1,7 @@
+from .engine import (
+    ALPHA_BETA, CacheEntry, MTDF, MoveOrdering, NO_MOVE, PVS, Search, SearchConfig, SearchTimeout, time_limit_from_delay
+)
+from .transposition import TranspositionTable
+from .parallel import ParallelSearch
+from .smp import LazySMPSearch, SharedTranspositionTable
+from .ponder import PonderingSearch
@@ -0,0 +1,59 @@
+"""
+Agent (see advsearch.agent) that plays the moves of an opening book and then
+the ones of a Search, which it keeps between moves and games: its transposition
+table, move ordering statistics and worker processes stay warm.
+"""
+from typing import Callable, Tuple
+
+from .book import OpeningBook
+from .engine import Search, time_limit_from_delay
+from ..agent import Agent
+from ..othello.gamestate import GameState
+
+
+class SearchAgent(Agent):
+    """
+    Agent that plays the book move if there is one, otherwise the best move of its search
+    """
+
+    def __init__(self, new_search: Callable[[], Search], book: OpeningBook = None, ponder: bool = False):
+        """
+        :param new_search: creates the search of the agent, at the first setup (its time limit is set by setup)
+        :param book: opening book, or None
+        :param ponder: whether to search on the opponent's time (the search must be a PonderingSearch)
+        """
+        super().__init__()
+        self.new_search = new_search
+        self.search = None  # created by setup, so agents that never play allocate no tables
+        self.book = book
+        self.ponder = ponder
+
+    def setup(self, color: str, time_control: float) -> None:
+        super().setup(color, time_control)
+        if self.search is None:
+            self.search = self.new_search()
+        self.search.set_time_limit(time_limit_from_delay(time_control))
+
+    def make_move(self, state: GameState) -> Tuple[int, int]:
+        move = self.book.move(state) if self.book is not None else None  # book positions need no search
+        if move is not None:
+            return move
+        move = self.search.best_move(state)
+        if self.ponder and move in state.legal_moves():
+            self.search.ponder(state.next_state(move))  # predicts the opponent's reply and searches while it thinks
+        return move
+
+    def notify_opponent_move(self, move: Tuple[int, int], state: GameState) -> None:
+        if self.ponder and self.search is not None:
+            self.search.opponent_moved(state)  # stops pondering if the opponent did not play the predicted move
+
+    def teardown(self) -> None:
+        if self.ponder and self.search is not None:
+            self.search.stop_pondering()  # frees the helpers until the next game
+
+    def close(self) -> None:
+        """
+        Terminates the processes of the search, if it has any (the agent can not be used afterwards)
+        """
+        if self.search is not None and hasattr(self.search, 'close'):
+            self.search.close()
@@ -0,0 +1,186 @@
+"""
+Opening book: best moves of the first positions of the game, computed ahead
+of time by deeper searches than the ones that fit in a move's time.
+Positions are stored once per symmetry class (see bitboard.canonical), so
+the book also knows the moves of the rotated and mirrored positions.
+The book file is a header (magic, number of entries) followed by fixed-width
+entries sorted by position: the bitboards of the player to move and of the
+opponent in canonical orientation, the square of the best move (in the same
+orientation) and its score. It is read through mmap and searched by bisection,
+so opening it is instantaneous and a lookup takes microseconds.
+Build a book with: python -m advsearch.search.book [-a agent] [-w width] [-p plies] [-d depth] [-o file]
+"""
+import mmap
+import os
+import struct
+from typing import Callable, Optional, Tuple
+
+from .engine import PVS, Search, SearchConfig
+from .ordering import HistoryOrdering
+from .transposition import TranspositionTable
+from ..othello.bitboard import canonical, inverse_square, transform_square
+from ..othello.board import Board, MOVES
+from ..othello.gamestate import GameState
+
+MAGIC = b'OBK1'
+HEADER = struct.Struct('<4sI')  # magic, number of entries
+ENTRY = struct.Struct('<QQB3xf')  # player, opponent, move square, score
+
+# name of the book file in the directory of each agent
+BOOK_FILE = 'book.bin'
+
+
+class OpeningBook(object):
+    """
+    Read-only opening book backed by a memory-mapped file
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: book file (see write_book)
+        """
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size = HEADER.unpack_from(self.data)
+        if magic != MAGIC or len(self.data) != HEADER.size + self.size * ENTRY.size:
+            self.data.close()
+            raise ValueError(f'{path} is not an opening book')
+
+    def close(self) -> None:
+        self.data.close()
+
+    def __len__(self):
+        return self.size
+
+    def probe(self, player: int, opponent: int) -> Optional[Tuple[int, float]]:
+        """
+        Returns the (square, score) stored for a position in canonical orientation, or None
+        :param player: bitboard of the player to move
+        :param opponent: bitboard of the opponent
+        :return: (int, float) or None
+        """
+        data = self.data
+        key = (player, opponent)
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            entry = ENTRY.unpack_from(data, HEADER.size + middle * ENTRY.size)
+            if entry[:2] < key:
+                low = middle + 1
+            elif entry[:2] > key:
+                high = middle
+            else:
+                return entry[2], entry[3]
+        return None
+
+    def lookup(self, state: GameState) -> Optional[Tuple[Tuple[int, int], float]]:
+        """
+        Returns the book move for the player to move in state and its score, or None
+        if the position is not in the book
+        :param state:
+        :return: ((x, y), score) or None
+        """
+        key, symmetry = canonical(*state.board.bitboards(state.player))
+        found = self.probe(*key)
+        if found is None:
+            return None
+        return MOVES[inverse_square(found[0], symmetry)], found[1]
+
+    def move(self, state: GameState) -> Optional[Tuple[int, int]]:
+        """
+        Returns the book move for the player to move in state, or None
+        if the position is not in the book
+        :param state:
+        :return: (x, y) or None
+        """
+        found = self.lookup(state)
+        if found is None or found[0] not in state.legal_moves():
+            return None
+        return found[0]
+
+
+def open_book(path: str) -> Optional[OpeningBook]:
+    """
+    Returns the opening book in path, or None if the file does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    return OpeningBook(path)
+
+
+def write_book(path: str, book: dict) -> None:
+    """
+    Writes an opening book file. The file is replaced, not overwritten,
+    so books already opened from it keep reading the old one
+    :param path:
+    :param book: maps canonical (player, opponent) bitboards to (square, score)
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(book)))
+        for (player, opponent), (square, score) in sorted(book.items()):
+            file.write(ENTRY.pack(player, opponent, square, score))
+    os.replace(temporary, path)
+
+
+def build_book(evaluate: Callable[[GameState, str], float], width: int, plies: int, depth: int,
+               progress: Callable[[int, int], None] = None) -> dict:
+    """
+    Searches the positions of the first plies of the game. All moves are
+    followed during the first width plies, then only the best one (the search
+    plays against itself) until plies
+    :param evaluate: evaluation function of the agent that will use the book
+    :param width: plies where every move is followed
+    :param plies: plies of the book
+    :param depth: search depth of each position
+    :param progress: called with (ply, positions in the book) after each ply
+    :return: dict for write_book
+    """
+    search = Search(evaluate, SearchConfig(
+        max_depth=depth, cache=TranspositionTable(), ordering=HistoryOrdering(), algorithm=PVS,
+    ))
+    book = {}
+    frontier = [GameState(Board(), Board.BLACK)]
+    for ply in range(plies):
+        children = []
+        for state in frontier:
+            if state.is_terminal() or len(state.legal_moves()) == 0:
+                continue
+            key, symmetry = canonical(*state.board.bitboards(state.player))
+            if key in book:
+                continue
+            score, move = search.iterative_deepening(state, depth)
+            book[key] = (transform_square(move[1] * 8 + move[0], symmetry), score)
+            moves = state.legal_moves() if ply < width else [move]
+            children.extend(state.next_state(move) for move in moves)
+        frontier = children
+        if progress is not None:
+            progress(ply + 1, len(book))
+    return book
+
+
+if __name__ == '__main__':
+    import argparse
+    import importlib
+    import time
+
+    parser = argparse.ArgumentParser(description='Builds the opening book of an agent.')
+    parser.add_argument('-a', '--agent', default='robert_rogers',
+                        help='Agent (package in advsearch) whose evaluation is used.')
+    parser.add_argument('-w', '--width', type=int, default=4,
+                        help='Plies where every move is in the book.')
+    parser.add_argument('-p', '--plies', type=int, default=14,
+                        help='Plies of the book (only the best moves after the width).')
+    parser.add_argument('-d', '--depth', type=int, default=6,
+                        help='Search depth of each position.')
+    parser.add_argument('-o', '--output',
+                        help=f'Book file (defaults to {BOOK_FILE} in the directory of the agent).')
+    args = parser.parse_args()
+
+    agent = importlib.import_module(f'advsearch.{args.agent}.agent')
+    output = args.output or os.path.join(os.path.dirname(agent.__file__), BOOK_FILE)
+    start = time.perf_counter()
+    book = build_book(agent.new_search().evaluate, args.width, args.plies, args.depth,
+                      lambda ply, size: print(f'ply {ply:2}: {size:6} positions {time.perf_counter() - start:8.1f} s'))
+    write_book(output, book)
+    print(f'{len(book)} positions written to {output}')
@@ -0,0 +1,506 @@
+"""
+Negamax alpha-beta search shared by the agents.
+Agents provide an evaluation function and a SearchConfig; the engine
+walks the game tree in-place on a MutableGameState (push/pop).
+"""
+import struct
+import time
+from typing import Callable, NamedTuple, Tuple
+
+from ..othello.board import Board
+from ..othello.endgame import EndgameSolver, should_solve
+from ..othello.gamestate import GameState, MutableGameState
+from ..othello.symmetry import IDENTITY, canonical_key, inverse_move, transform_move
+
+# move returned when the player has no legal moves
+NO_MOVE = (-1, -1)
+
+# kinds of score stored in the cache: the exact value, a lower bound
+# (the search failed high) or an upper bound (it failed low)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# the deadline is checked once every this many nodes
+CHECK_INTERVAL = 256
+
+# iterative deepening does not start an iteration if the last one, multiplied
+# by this factor (a rough estimate of the effective branching factor), does not fit before the deadline
+BRANCHING_FACTOR = 4
+
+# share of the server's delay used by the search, and time kept for
+# the server's overhead (copying the state, starting the agent's thread)
+DELAY_SHARE = 0.9
+DELAY_MARGIN = 0.1
+
+INFINITY = float('inf')
+
+# root search algorithms (see SearchConfig.algorithm)
+ALPHA_BETA, PVS, MTDF = 'alphabeta', 'pvs', 'mtdf'
+ALGORITHMS = (ALPHA_BETA, PVS, MTDF)
+
+
+def time_limit_from_delay(delay: float) -> float:
+    """
+    Returns the time a search can take when the server waits delay seconds for a move
+    :param delay: the server's delay
+    :return: float
+    """
+    return max(delay * DELAY_SHARE - DELAY_MARGIN, 0.01)
+
+
+def _next_float(value: float, toward: float) -> float:
+    """
+    Returns the float next to value in the direction of toward, the bound of the
+    narrowest window of floats (math.nextafter needs Python 3.9)
+    :param value:
+    :param toward:
+    :return: float
+    """
+    if value == toward or value != value:
+        return value
+    if value == 0:
+        return 5e-324 if toward > 0 else -5e-324  # the smallest subnormal
+    # the bits of a float, read as an integer, grow with its magnitude
+    bits = struct.unpack('<q', struct.pack('<d', value))[0]
+    bits += 1 if (toward > value) == (value > 0) else -1
+    return struct.unpack('<d', struct.pack('<q', bits))[0]
+
+
+class CacheEntry(NamedTuple):
+    """
+    Result of a search stored in the cache, from the point of view of the player to move
+    """
+    depth: int
+    bound: int
+    score: float
+    move: Tuple[int, int]
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the deadline has passed
+    """
+    pass
+
+
+class MoveOrdering(object):
+    """
+    Decides the order in which the moves of a node are searched.
+    This default tries the cached best move first (if any) and keeps the others in
+    the order of the legal move set; subclasses can use the feedback from update.
+    """
+
+    def order(self, state: GameState, moves, ply: int, hash_move=None) -> list:
+        """
+        Returns the moves in the order they should be searched
+        :param state: state whose moves are ordered
+        :param moves: legal moves of the state
+        :param ply: distance from the root of the search
+        :param hash_move: best move of a previous search of the state, if any
+        :return: list of moves
+        """
+        if hash_move is not None and hash_move in moves:
+            return [hash_move] + [move for move in moves if move != hash_move]
+        return list(moves)
+
+    def update(self, state: GameState, move, ply: int, depth: int) -> None:
+        """
+        Called when move caused a beta cutoff in state
+        :param state: state where the cutoff happened
+        :param move: the move that refuted the previous move
+        :param ply: distance from the root of the search
+        :param depth: remaining depth of the search at the node
+        """
+        pass
+
+    def clear(self) -> None:
+        """
+        Called before each new search
+        """
+        pass
+
+
+class SearchConfig(NamedTuple):
+    """
+    Settings of a search:
+    max_depth: depth (plies) of the search
+    time_limit: seconds the search may take; when it runs out, the best move found so far is returned
+    ordering: MoveOrdering used at every node (defaults to MoveOrdering())
+    cache: mapping from state keys (GameState.key) to CacheEntry, kept between searches
+        (e.g. a dict, or a bounded transposition table implementing get, __setitem__ and clear)
+    endgame_empties: with this many empty tiles or fewer, the game is solved exactly
+        with the endgame solver (None disables it)
+    algorithm: ALPHA_BETA searches every move with the full window; PVS searches the
+        moves after the first of each node with a null window, and again with the full
+        one only if they turn out better; MTDF finds the score of the root by a sequence
+        of null-window searches, starting from the score of the previous iteration (it needs a cache)
+    aspiration: with ALPHA_BETA or PVS, iterative deepening searches the root with a window
+        of this half-width around the score of the previous iteration, and again with a full
+        window on the side it fails (None always uses the full window)
+    symmetric: cache states by their symmetry.canonical_key, so that the 8 symmetric
+        variants of a state share one entry (computing the key is slower than GameState.key)
+    """
+    max_depth: int = 4
+    time_limit: float = None
+    ordering: MoveOrdering = None
+    cache: object = None
+    endgame_empties: int = None
+    algorithm: str = ALPHA_BETA
+    aspiration: float = None
+    symmetric: bool = False
+
+
+class Search(object):
+    """
+    Negamax search with alpha-beta pruning.
+    Scores are from the point of view of the player to move at each node.
+    Leaves are always evaluated for the player to move at the root (the agents'
+    heuristics are not symmetric), and negated for the opponent's nodes.
+    A player without moves passes, as in GameState.next_state.
+    """
+
+    def __init__(self, evaluate: Callable[[GameState, str], float], config: SearchConfig = SearchConfig()):
+        """
+        :param evaluate: evaluate(state, color) returns the value of state for color (higher is better)
+        :param config: search settings
+        """
+        if config.algorithm not in ALGORITHMS:
+            raise ValueError(f'Unknown search algorithm: {config.algorithm}')
+        if config.algorithm == MTDF and config.cache is None:
+            raise ValueError('MTD(f) needs a cache')
+        self.evaluate = evaluate
+        self.config = config
+        self.ordering = config.ordering or MoveOrdering()
+        self.cache = config.cache
+        self.pvs = config.algorithm == PVS
+        self.symmetric = config.symmetric
+        self.nodes = 0  # nodes visited in the last search
+        self.deadline = None
+        self.depth = 0  # depth of the last completed iteration of iterative deepening
+        self.root_color = None  # player to move at the root of the last search
+        self.root_scores = {}  # score of each root move in the last search
+        self.endgame = EndgameSolver()
+
+    def set_time_limit(self, time_limit: float) -> None:
+        """
+        Changes the time limit of the next searches (see SearchConfig.time_limit)
+        :param time_limit: seconds, or None for no limit
+        """
+        self.config = self.config._replace(time_limit=time_limit)
+
+    def best_move(self, state: GameState) -> Tuple[int, int]:
+        """
+        Returns the best move for the player to move in state.
+        With a time limit, the search is deepened iteratively until the time runs out
+        (or max_depth is reached), otherwise it goes straight to max_depth.
+        Close to the end of the game (see SearchConfig.endgame_empties) the exact
+        endgame solver is tried first, with half of the time
+        :param state: state to search from (not modified)
+        :return: (x, y) move, or (-1, -1) if there are no legal moves
+        """
+        self.start(state)
+        if self.config.endgame_empties is not None and should_solve(state.board, self.config.endgame_empties):
+            time_limit = None if self.deadline is None else (self.deadline - time.perf_counter()) / 2
+            solved = self.endgame.solve(state.board, state.player, time_limit=time_limit)
+            if solved is not None:
+                return solved[1]
+
+        if self.deadline is None:
+            return self._search(state, self.config.max_depth)[1]
+        return self._iterative_deepening(state, self.config.max_depth)[1]
+
+    def search(self, state: GameState, depth: int) -> Tuple[float, Tuple[int, int]]:
+        """
+        Searches state to the given depth
+        :param state: state to search from (not modified)
+        :param depth: depth in plies
+        :return: (score, move) for the player to move; if the time runs out,
+            the best move among the ones searched so far
+        """
+        self.start(state)
+        return self._search(state, depth)
+
+    def _search(self, state: GameState, depth: int) -> Tuple[float, Tuple[int, int]]:
+        root = self._root(state)
+        if len(root.legal_moves()) == 0:
+            return self.evaluate(root, self.root_color), NO_MOVE
+
+        best = [-INFINITY, None]
+        entry = self.cache.get(self._cache_key(root)[0]) if self.cache is not None else None
+        try:
+            self.search_iteration(root, depth, entry.score if entry is not None else None, best)
+        except SearchTimeout:
+            pass
+        if best[1] is None:  # not even the first move was searched
+            best[1] = self.ordering.order(state, state.legal_moves(), 0)[0]
+        return best[0], best[1]
+
+    def iterative_deepening(self, state: GameState, depth: int) -> Tuple[float, Tuple[int, int]]:
+        """
+        Searches state at depth 1, 2, ... up to the given depth (or until the time limit)
+        :param state: state to search from (not modified)
+        :param depth: maximum depth in plies
+        :return: (score, move) of the deepest completed iteration
+        """
+        self.start(state)
+        return self._iterative_deepening(state, depth)
+
+    def _iterative_deepening(self, state: GameState, max_depth: int) -> Tuple[float, Tuple[int, int]]:
+        """
+        Searches state at depth 1, 2, ... until max_depth or the deadline,
+        returning the result of the deepest completed iteration.
+        The root moves of each iteration are searched in the order of the
+        scores of the previous one, so the best move so far is searched first,
+        and the score of the previous one is the guess of the next (see search_iteration).
+        An iteration is not started if it is not expected to finish in time
+        """
+        root = self._root(state)
+        moves = self.ordering.order(state, root.legal_moves(), 0, self._hash_move(state))
+        if len(moves) == 0:
+            return self.evaluate(root, self.root_color), NO_MOVE
+
+        result = (-INFINITY, moves[0])
+        guess = None
+        for depth in range(1, max_depth + 1):
+            iteration_start = time.perf_counter()
+            best = [-INFINITY, None]
+            try:
+                guess = self.search_iteration(root, depth, guess, best, moves)
+            except SearchTimeout:
+                break
+            result = (best[0], best[1])
+            self.depth = depth
+
+            now = time.perf_counter()
+            if self.deadline is not None and now + (now - iteration_start) * BRANCHING_FACTOR > self.deadline:
+                break  # the next iteration would not finish in time
+            moves = sorted(moves, key=lambda move: self.root_scores.get(move, -INFINITY), reverse=True)
+            moves.remove(result[1])
+            moves.insert(0, result[1])  # the other scores can be bounds above its score (MTD(f))
+        return result
+
+    def search_iteration(self, state: MutableGameState, depth: int, guess: float, best: list, moves=None) -> float:
+        """
+        Searches the root at the given depth with the configured algorithm
+        (SearchConfig.algorithm and aspiration), storing the best score and move in best
+        :param guess: expected score of the root (e.g. the one of the previous iteration), or None
+        :return: the score of the root
+        """
+        if self.config.algorithm == MTDF:
+            if guess is None:
+                guess = self.evaluate(state, self.root_color)
+            return self.mtdf(state, depth, guess, best, moves)
+
+        aspiration = self.config.aspiration
+        if aspiration is None or guess is None:
+            return self.search_root(state, depth, -INFINITY, INFINITY, best, moves)
+
+        alpha, beta = guess - aspiration, guess + aspiration
+        while True:
+            score = self.search_root(state, depth, alpha, beta, best, moves)
+            if score <= alpha:  # failed low: the best move is not known
+                alpha = -INFINITY
+                best[0], best[1] = -INFINITY, None
+            elif score >= beta:
+                beta = INFINITY
+            else:
+                return score
+
+    def mtdf(self, state: MutableGameState, depth: int, guess: float, best: list, moves=None) -> float:
+        """
+        MTD(f): narrows the bounds of the score of the root with null-window searches
+        that each test whether the score is at least some value, starting from guess.
+        The cache keeps the results of the previous passes, so each one is cheap.
+        Windows are (_next_float(value, -inf), value), the narrowest window of floats
+        :param guess: expected score of the root
+        :return: the score of the root
+        """
+        lower, upper = -INFINITY, INFINITY
+        score = guess
+        while lower < upper:
+            beta = _next_float(score, INFINITY) if score == lower else score
+            searched = [-INFINITY, None]
+            score = self.search_root(state, depth, _next_float(beta, -INFINITY), beta, searched, moves)
+            if score < beta:
+                upper = score
+            else:
+                lower = score
+                best[0], best[1] = searched  # a move that scores at least lower
+        if best[1] is None:  # every pass failed low (only possible with no finite scores)
+            best[0], best[1] = searched
+        return lower
+
+    def start(self, state: GameState) -> None:
+        """
+        Resets the counters and the deadline before a search of state
+        """
+        self.nodes = 0
+        self.depth = 0
+        self.ordering.clear()
+        if self.cache is not None:
+            if state.player != self.root_color:
+                self.cache.clear()  # the cached scores depend on the point of view of the evaluation
+            if hasattr(self.cache, 'new_search'):
+                self.cache.new_search()
+        self.root_color = state.player
+        if self.config.time_limit is not None:
+            self.deadline = time.perf_counter() + self.config.time_limit
+        else:
+            self.deadline = None
+
+    def should_stop(self) -> bool:
+        """
+        Returns whether the search must stop now (checked every CHECK_INTERVAL nodes)
+        """
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
+    @staticmethod
+    def _root(state: GameState) -> MutableGameState:
+        """
+        Returns the mutable copy of state walked by the search
+        """
+        root = MutableGameState.from_state(state)
+        root.board.track_flipped = False  # the search does not need to highlight flipped tiles
+        return root
+
+    def search_root(self, state: MutableGameState, depth: int, alpha: float, beta: float, best: list,
+                    moves=None) -> float:
+        """
+        Searches the moves of the root, storing the best score and move found so far in best
+        (so that they are available if the search times out) and the score of each move in root_scores
+        :param moves: root moves in the order they are searched (defaults to the order given by the MoveOrdering)
+        :return: the score of the root
+        """
+        color = state.player
+        original_alpha = alpha
+        if moves is None:
+            moves = self.ordering.order(state, state.legal_moves(), 0, self._hash_move(state))
+        self.root_scores = {}
+        for index, move in enumerate(moves):
+            state.push(move)
+            score = self._child_score(state, depth - 1, alpha, beta, color, 1, index)
+            state.pop()
+            self.root_scores[move] = score
+            if score > best[0] or best[1] is None:
+                best[0], best[1] = score, move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        self._store(state, depth, best[0], original_alpha, beta, best[1])
+        return best[0]
+
+    def negamax(self, state: MutableGameState, depth: int, alpha: float, beta: float, color: str, ply: int) -> float:
+        """
+        Returns the value of state for color, which is the player to move (or the
+        opponent of the player that moved last, if state is terminal), searched depth plies ahead
+        :param state: state to search (restored when the function returns)
+        :param depth: remaining plies
+        :param alpha: lower bound of the window
+        :param beta: upper bound of the window
+        :param color: point of view of the score
+        :param ply: distance from the root
+        :return: float
+        """
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0 and self.should_stop():
+            raise SearchTimeout()
+
+        if depth <= 0 or state.is_terminal():
+            value = self.evaluate(state, self.root_color)
+            return value if color == self.root_color else -value
+
+        original_alpha = alpha
+        hash_move = None
+        if self.cache is not None:
+            key, symmetry = self._cache_key(state)
+            entry = self.cache.get(key)
+            if entry is not None:
+                hash_move = entry.move
+                if symmetry != IDENTITY and hash_move is not None:
+                    hash_move = inverse_move(hash_move, symmetry)
+                if entry.depth >= depth:
+                    if entry.bound == EXACT:
+                        return entry.score
+                    if entry.bound == LOWER:
+                        alpha = max(alpha, entry.score)
+                    else:
+                        beta = min(beta, entry.score)
+                    if alpha >= beta:
+                        return entry.score
+
+        best_score, best_move = -INFINITY, None
+        for index, move in enumerate(self.ordering.order(state, state.legal_moves(), ply, hash_move)):
+            state.push(move)
+            score = self._child_score(state, depth - 1, alpha, beta, color, ply + 1, index)
+            state.pop()
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.ordering.update(state, move, ply, depth)
+                        break
+
+        if self.cache is not None:
+            self._store_key(key, symmetry, depth, best_score, original_alpha, beta, best_move)
+        return best_score
+
+    def _child_score(self, state: MutableGameState, depth: int, alpha: float, beta: float, color: str, ply: int,
+                     index: int = 0) -> float:
+        """
+        Returns the score for color of the state reached after color's move.
+        With PVS, moves after the first (index > 0) are searched with a null window
+        first, and again with the full window only if they score above alpha
+        """
+        if self.pvs and index > 0:
+            score = self._child_score(state, depth, alpha, _next_float(alpha, INFINITY), color, ply)
+            if score <= alpha or score >= beta:
+                return score
+        if state.player == color:  # the opponent passed
+            return self.negamax(state, depth, alpha, beta, color, ply)
+        return -self.negamax(state, depth, -beta, -alpha, Board.opponent(color), ply)
+
+    def _cache_key(self, state: GameState) -> Tuple[int, int]:
+        """
+        Returns the key of state in the cache and the symmetry from state to the orientation
+        of the cached moves (always IDENTITY, unless SearchConfig.symmetric is set)
+        """
+        if self.symmetric:
+            return canonical_key(state.board, state.player)
+        return state.key(), IDENTITY
+
+    def _hash_move(self, state: GameState):
+        """
+        Returns the best move stored in the cache for state, if any
+        """
+        if self.cache is None:
+            return None
+        key, symmetry = self._cache_key(state)
+        entry = self.cache.get(key)
+        if entry is None or entry.move is None or symmetry == IDENTITY:
+            return entry.move if entry is not None else None
+        return inverse_move(entry.move, symmetry)
+
+    def _store(self, state: GameState, depth: int, score: float, alpha: float, beta: float, move) -> None:
+        """
+        Stores the result of the search of state in the cache, with the bound
+        given by the window (alpha, beta) the state was searched with
+        """
+        if self.cache is None:
+            return
+        key, symmetry = self._cache_key(state)
+        self._store_key(key, symmetry, depth, score, alpha, beta, move)
+
+    def _store_key(self, key: int, symmetry: int, depth: int, score: float, alpha: float, beta: float, move) -> None:
+        """
+        Stores a search result in the cache under the given key (see _store),
+        with the move transformed by symmetry into the orientation of the key
+        """
+        if symmetry != IDENTITY and move is not None:
+            move = transform_move(move, symmetry)
+        if score <= alpha:
+            bound = UPPER
+        elif score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.cache[key] = CacheEntry(depth, bound, score, move)
@@ -0,0 +1,100 @@
+"""
+Move ordering for the search: the sooner the best move of a node is searched,
+the more alpha-beta prunes. Moves are tried in this order: the cached best move
+(hash move), corners, killer moves of the ply, then by history score and by
+static square weights.
+"""
+from .engine import MoveOrdering
+from ..othello.board import Board
+from ..othello.gamestate import GameState
+
+# static value of each tile, indexed by [y][x] (also used by pato's heuristic)
+SQUARE_WEIGHTS = [
+    [120, -20, 20, 5, 5, 20, -20, 120],
+    [-20, -40, -5, -5, -5, -5, -40, -20],
+    [20, -5, 15, 3, 3, 15, -5, 20],
+    [5, -5, 3, 3, 3, 3, -5, 5],
+    [5, -5, 3, 3, 3, 3, -5, 5],
+    [20, -5, 15, 3, 3, 15, -5, 20],
+    [-20, -40, -5, -5, -5, -5, -40, -20],
+    [120, -20, 20, 5, 5, 20, -20, 120],
+]
+
+CORNERS = frozenset([(0, 0), (7, 0), (0, 7), (7, 7)])
+
+# number of killer moves kept per ply
+KILLERS = 2
+
+# priority of each kind of move (compared before the history score)
+HASH_MOVE, CORNER, KILLER, QUIET = 3, 2, 1, 0
+
+
+class StaticOrdering(MoveOrdering):
+    """
+    Hash move first, then the others by static square weight
+    """
+
+    def __init__(self, weights=None):
+        """
+        :param weights: 8x8 weights indexed by [y][x] (defaults to SQUARE_WEIGHTS)
+        """
+        self.weights = weights or SQUARE_WEIGHTS
+
+    def order(self, state: GameState, moves, ply: int, hash_move=None) -> list:
+        weights = self.weights
+        ordered = sorted(moves, key=lambda move: weights[move[1]][move[0]], reverse=True)
+        if hash_move is not None and hash_move in moves:
+            ordered.remove(hash_move)
+            ordered.insert(0, hash_move)
+        return ordered
+
+
+class HistoryOrdering(StaticOrdering):
+    """
+    Hash move, corners, killer moves (the last moves that caused a cutoff
+    at the same ply), then by history score (how often and how deep each
+    move caused cutoffs for each color) with static weights breaking ties.
+    Killers are reset at each search; history scores are halved, so
+    that the ones of previous searches still count but fade away.
+    """
+
+    def __init__(self, weights=None):
+        super().__init__(weights)
+        self.killers = []
+        self.history = {Board.BLACK: [[0] * 8 for _ in range(8)], Board.WHITE: [[0] * 8 for _ in range(8)]}
+
+    def order(self, state: GameState, moves, ply: int, hash_move=None) -> list:
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history[state.player]
+        weights = self.weights
+
+        def priority(move):
+            if move == hash_move:
+                kind = HASH_MOVE
+            elif move in CORNERS:
+                kind = CORNER
+            elif move in killers:
+                kind = KILLER
+            else:
+                kind = QUIET
+            x, y = move
+            return kind, history[y][x], weights[y][x]
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def update(self, state: GameState, move, ply: int, depth: int) -> None:
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLERS:]
+
+        x, y = move
+        self.history[state.player][y][x] += depth * depth
+
+    def clear(self) -> None:
+        self.killers = []
+        for table in self.history.values():
+            for row in table:
+                row[:] = [value // 2 for value in row]
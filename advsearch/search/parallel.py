@@ -0,0 +1,180 @@
+"""
+Root parallelism: the moves of the root are searched by a pool of worker
+processes (threads would not help, the GIL runs one Python thread at a time).
+The pool is created at the first search and kept for the next ones, so its
+start-up cost is paid once per agent. Positions are sent to the workers in
+their binary form (GameState.to_bytes) and the best score found so far is
+shared through a multiprocessing.Value, so that each root move is searched
+with the alpha bound found by its siblings, even in other processes. Another
+shared Value stops the workers when they are late for the deadline.
+"""
+import multiprocessing
+import os
+import time
+from typing import Callable
+
+from .engine import INFINITY, Search, SearchConfig, SearchTimeout
+from ..othello.gamestate import GameState, MutableGameState
+
+class _WorkerSearch(Search):
+    """
+    Search run by the worker processes: it also stops when the main process sets the stop flag
+    """
+
+    def __init__(self, evaluate, config, stop):
+        super().__init__(evaluate, config)
+        self.stop = stop
+
+    def should_stop(self) -> bool:
+        return self.stop.value or super().should_stop()
+
+
+# search of each worker process, the alpha bound shared by all of them (see _init_worker)
+# and the root state of the last move searched by the worker
+_worker_search = None
+_shared_alpha = None
+_worker_root = None
+
+
+def _init_worker(evaluate, config, shared_alpha, stop) -> None:
+    """
+    Creates the search of a worker process
+    """
+    global _worker_search, _shared_alpha
+    _worker_search = _WorkerSearch(evaluate, config, stop)
+    _shared_alpha = shared_alpha
+
+
+def _search_root_move(data: bytes, move, depth: int, beta: float, deadline: float):
+    """
+    Searches one root move in a worker process
+    :param data: binary representation of the root state (GameState.to_bytes)
+    :param move: root move to search
+    :param depth: depth of the root
+    :param beta: upper bound of the root window
+    :param deadline: time.time() at which the search must stop (None for no limit)
+    :return: (move, score, alpha the move was searched with, nodes), with None as score if the time ran out
+    """
+    global _worker_root
+    search = _worker_search
+    if search.stop.value:  # queued before the main process gave up on this search
+        return move, None, _shared_alpha.value, 0
+    state = MutableGameState.from_bytes(data)
+    state.board.track_flipped = False
+    if data != _worker_root:  # keeps the killers and history of the other moves of the same root
+        search.start(state)
+        _worker_root = data
+    search.nodes = 0
+    # the deadline of the main search is sent with each task (the time limit of the worker's
+    # config is the one of when the pool was created), as wall-clock time: perf_counter
+    # is not comparable between processes
+    search.deadline = None if deadline is None else time.perf_counter() + (deadline - time.time())
+
+    alpha = _shared_alpha.value
+    color = state.player
+    state.push(move)
+    try:
+        score = search._child_score(state, depth - 1, alpha, beta, color, 1)
+    except SearchTimeout:
+        return move, None, alpha, search.nodes
+
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    return move, score, alpha, search.nodes
+
+
+class ParallelSearch(Search):
+    """
+    Search that splits the root moves among worker processes.
+    The first root move (the best one of the previous iteration, with iterative
+    deepening) is searched alone, to get a good alpha bound; then the other moves
+    are searched in parallel. Each worker has its own cache and move ordering,
+    kept between searches. With a single process it is a regular Search.
+    """
+
+    def __init__(self, evaluate: Callable[[GameState, str], float], config: SearchConfig = SearchConfig(),
+                 processes: int = None):
+        """
+        :param evaluate: evaluation function; it must be defined at the top level of a
+            module, to be sent to the worker processes
+        :param config: search settings (each worker gets a copy)
+        :param processes: number of worker processes (defaults to the number of cores)
+        """
+        super().__init__(evaluate, config)
+        self.processes = processes or os.cpu_count() or 1
+        self.pool = None
+        self.shared_alpha = None
+        self.stop = None
+
+    def start_pool(self) -> None:
+        """
+        Creates the worker processes (done at the first search if not called before)
+        """
+        if self.pool is None and self.processes > 1:
+            self.shared_alpha = multiprocessing.Value('d', -INFINITY)
+            self.stop = multiprocessing.Value('b', 0)
+            self.pool = multiprocessing.Pool(
+                self.processes, _init_worker, (self.evaluate, self.config, self.shared_alpha, self.stop)
+            )
+
+    def close(self) -> None:
+        """
+        Terminates the worker processes
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def search_root(self, state: MutableGameState, depth: int, alpha: float, beta: float, best: list,
+                    moves=None) -> float:
+        if self.processes <= 1 or depth <= 1:
+            return super().search_root(state, depth, alpha, beta, best, moves)
+
+        self.start_pool()
+        if moves is None:
+            moves = self.ordering.order(state, state.legal_moves(), 0, self._hash_move(state))
+        original_alpha = alpha
+        self.shared_alpha.value = alpha
+        self.stop.value = 0
+        data = state.to_bytes()
+        deadline = None if self.deadline is None else time.time() + (self.deadline - time.perf_counter())
+
+        # the first move is searched before the others, which then start with its score as alpha
+        first = self.pool.apply(_search_root_move, (data, moves[0], depth, beta, deadline))
+        pending = self.pool.starmap_async(_search_root_move, [(data, move, depth, beta, deadline) for move in moves[1:]])
+        timeout = None if self.deadline is None else max(self.deadline - time.perf_counter(), 0)
+        try:
+            results = [first] + pending.get(timeout)
+        except multiprocessing.TimeoutError:
+            # the workers are late: they are stopped, so that the tasks still queued
+            # return at once instead of delaying the next move
+            self.stop.value = 1
+            results = [first] + pending.get()
+
+        timed_out = False
+        self.root_scores = {}
+        exact = []
+        upper_bounds = []
+        for move, score, searched_alpha, nodes in results:
+            self.nodes += nodes
+            if score is None:
+                timed_out = True
+                continue
+            self.root_scores[move] = score
+            if score > searched_alpha:
+                exact.append((score, move))  # not an upper bound: it beat the alpha it was searched with
+            else:
+                upper_bounds.append((score, move))
+
+        # if every move failed low (as in the null-window passes of MTD(f)), the root
+        # fails low too, with the largest of the bounds, as in the sequential search
+        for score, move in exact or upper_bounds:  # in the order of moves, so that ties go to the first one
+            if score > best[0] or best[1] is None:
+                best[0], best[1] = score, move
+        if timed_out:
+            raise SearchTimeout()
+
+        self._store(state, depth, best[0], original_alpha, beta, best[1])
+        return best[0]
@@ -0,0 +1,108 @@
+"""
+Pondering: searching on the opponent's time. After the agent moves, the helper
+processes of a LazySMPSearch search the positions after the opponent's most
+likely replies (by the hash move of the last search, then by move ordering),
+filling the shared transposition table. If the opponent plays one of them, the
+next search starts with the table full of its results; otherwise pondering is
+stopped as soon as the agent is told about the opponent's move.
+Helpers run in their own processes, so pondering does not take the GIL of the
+process where the server runs the opponent's make_move (it does take CPU time:
+it is only useful with spare cores).
+"""
+import time
+from typing import Callable
+
+from .engine import SearchConfig
+from .smp import DEFAULT_MEGABYTES, LazySMPSearch, _helper_search
+from ..othello.gamestate import GameState
+
+
+class PonderingSearch(LazySMPSearch):
+    """
+    LazySMPSearch that ponders (see ponder) between its searches.
+    Any search stops the pondering first, so the helpers are free for Lazy SMP
+    """
+
+    def __init__(self, evaluate: Callable[[GameState, str], float], config: SearchConfig = SearchConfig(),
+                 processes: int = None, megabytes: float = DEFAULT_MEGABYTES, replies: int = 1,
+                 ponder_time: float = None):
+        """
+        :param evaluate: evaluation function (see LazySMPSearch)
+        :param config: search settings
+        :param processes: number of searching processes, including this one (at least 2,
+            at most processes - 1 replies are pondered at the same time)
+        :param megabytes: memory budget of the shared table
+        :param replies: number of opponent replies pondered
+        :param ponder_time: seconds after which pondering stops by itself (defaults to
+            the search time limit: the opponent has as much time as this agent)
+        """
+        super().__init__(evaluate, config, processes, megabytes)
+        self.processes = max(self.processes, 2)
+        self.replies = max(min(replies, self.processes - 1), 1)
+        self.ponder_time = ponder_time
+        self.pondering = None  # pending result of the helpers while pondering
+        self.pondered = set()  # keys of the pondered states
+        self.ponder_nodes = 0  # nodes searched by the last pondering
+
+    def start(self, state: GameState) -> None:
+        self.stop_pondering()
+        super().start(state)
+
+    def ponder(self, state: GameState) -> None:
+        """
+        Starts pondering the state after this agent's move (the opponent to move)
+        and returns immediately
+        :param state: state after the agent's move
+        """
+        self.stop_pondering()
+        if state.is_terminal():
+            return
+
+        if state.player == self.root_color:  # the opponent must pass
+            targets = [state]
+        else:
+            moves = self.ordering.order(state, state.legal_moves(), 0, self._hash_move(state))
+            targets = [state.next_state(move) for move in moves[:self.replies]]
+        # replies after which this agent must pass would be searched for the opponent: they are skipped
+        targets = [target for target in targets if target.player == self.root_color]
+        if len(targets) == 0:
+            return
+
+        self.start_pool()
+        self.stop.value = 0
+        time_limit = self.ponder_time if self.ponder_time is not None else self.config.time_limit
+        deadline = None if time_limit is None else time.time() + time_limit
+        self.pondered = {target.key() for target in targets}
+        self.pondering = self.pool.starmap_async(
+            _helper_search,
+            [(target.to_bytes(), self.config.max_depth, index, deadline) for index, target in enumerate(targets, 1)]
+        )
+
+    def opponent_moved(self, state: GameState) -> bool:
+        """
+        Called with the state after the opponent's move: pondering goes on until the
+        next search if the state was pondered, otherwise it is stopped
+        :param state: state after the opponent's move
+        :return: whether the state was pondered
+        """
+        if self.pondering is not None and state.key() in self.pondered:
+            return True
+        self.stop_pondering()
+        return False
+
+    def stop_pondering(self) -> None:
+        """
+        Stops the helpers if they are pondering and waits for them
+        """
+        if self.pondering is None:
+            return
+        self.stop.value = 1
+        self.ponder_nodes = sum(self.pondering.get())
+        self.pondering = None
+        self.pondered = set()
+
+    def close(self) -> None:
+        if self.pool is not None and self.pondering is not None:
+            self.stop.value = 1
+            self.pondering = None
+        super().close()
@@ -0,0 +1,332 @@
+"""
+Lazy SMP: several processes search the same root at the same time, sharing
+one transposition table in shared memory. Helper processes search in a
+slightly different way than the main one (other depths and root move orders),
+so they fill the table with results the main search then reuses.
+The table entries are written without locks: each one stores its data and
+the position key xor the data, so an entry torn by concurrent writes does not
+match any key and is just a miss.
+"""
+import multiprocessing
+import os
+import random
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Callable
+
+from .engine import CacheEntry, INFINITY, Search, SearchConfig, SearchTimeout
+from ..othello.board import MOVES
+from ..othello.gamestate import GameState
+
+# bytes taken by one entry (three 64-bit words: key xor the other two, data, score)
+ENTRY_BYTES = 24
+
+# default memory budget of a shared table
+DEFAULT_MEGABYTES = 32
+
+# words of a bucket: the entry of the depth-preferred tier, then the one of the always-replace tier
+BUCKET_WORDS = 6
+
+# layout of the data word of an entry: depth (8 bits), bound (2 bits),
+# move square + 1 (7 bits, 0 for no move) and generation (8 bits);
+# the top bit marks the entry as used
+BOUND_SHIFT, MOVE_SHIFT, GENERATION_SHIFT = 8, 10, 17
+USED = 1 << 63
+
+DOUBLE = struct.Struct('<d')
+UINT64 = struct.Struct('<Q')
+
+
+def _pack(entry: CacheEntry, generation: int) -> int:
+    """
+    Returns the data word of an entry (everything but the score)
+    """
+    move = 0 if entry.move is None else entry.move[1] * 8 + entry.move[0] + 1
+    return USED | min(entry.depth, 255) | entry.bound << BOUND_SHIFT | move << MOVE_SHIFT \
+        | generation << GENERATION_SHIFT
+
+
+def _unpack(data: int, score: int) -> CacheEntry:
+    """
+    Returns the entry stored in a data and a score word
+    """
+    move = (data >> MOVE_SHIFT) & 0x7F
+    return CacheEntry(
+        data & 0xFF,
+        (data >> BOUND_SHIFT) & 0x3,
+        DOUBLE.unpack(UINT64.pack(score))[0],
+        None if move == 0 else MOVES[move - 1],
+    )
+
+
+class SharedTranspositionTable(object):
+    """
+    Transposition table in a multiprocessing.shared_memory block, with the same
+    two-tier buckets (depth-preferred and always-replace), replacement policy
+    and interface as TranspositionTable.
+    The process that creates the table owns it: only the owner clears it and
+    starts new searches (the generation is kept in shared memory), and it must
+    call close() when done. Other processes attach to it by its name.
+    Statistics are counted by each process.
+    """
+
+    def __init__(self, megabytes: float = DEFAULT_MEGABYTES, name: str = None):
+        """
+        :param megabytes: memory budget of the table
+        :param name: name of an existing table to attach to (creates a new one if None)
+        """
+        self.size = max(int(megabytes * 2 ** 20) // (2 * ENTRY_BYTES), 1)  # number of buckets
+        nbytes = 8 + self.size * 2 * ENTRY_BYTES  # a header word with the generation, then the buckets
+        self.megabytes = megabytes
+        self.owner = name is None
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=nbytes if self.owner else 0)
+        self.name = self.memory.name
+        self.words = self.memory.buf.cast('Q')
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def close(self) -> None:
+        """
+        Detaches from the shared memory, which is freed if this process owns the table
+        """
+        if self.words is not None:
+            self.words.release()
+            self.words = None
+            self.memory.close()
+            if self.owner:
+                self.memory.unlink()
+
+    def clear(self) -> None:
+        """
+        Removes all entries (only in the owner process) and resets the statistics of this process
+        """
+        if self.owner:
+            self.memory.buf[:] = bytes(len(self.memory.buf))
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def new_search(self) -> None:
+        """
+        Starts a new generation (only in the owner process): entries of previous
+        generations can then be replaced in the depth-preferred tier
+        """
+        if self.owner:
+            self.words[0] = (self.words[0] + 1) & 0xFF
+
+    def _read(self, index: int, key: int) -> CacheEntry:
+        """
+        Returns the entry starting at words[index] if it is the one of the key
+        (and was not torn by concurrent writes), None otherwise
+        """
+        words = self.words
+        data = words[index + 1]
+        score = words[index + 2]
+        if data and words[index] ^ data ^ score == key:
+            return _unpack(data, score)
+        return None
+
+    def get(self, key: int, default=None) -> CacheEntry:
+        """
+        Returns the entry stored for the key, or default if there is none
+        :param key: zobrist key of the state
+        :param default:
+        :return: CacheEntry
+        """
+        base = 1 + BUCKET_WORDS * (key % self.size)
+        entry = self._read(base, key) or self._read(base + 3, key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry
+
+    def __setitem__(self, key: int, entry: CacheEntry) -> None:
+        """
+        Stores the entry for the key, following the replacement policy
+        :param key: zobrist key of the state
+        :param entry:
+        """
+        words = self.words
+        generation = words[0]
+        base = 1 + BUCKET_WORDS * (key % self.size)
+        data = _pack(entry, generation)
+        score = UINT64.unpack(DOUBLE.pack(entry.score))[0]
+
+        deep_data = words[base + 1]
+        deep_score = words[base + 2]
+        deep_key = words[base] ^ deep_data ^ deep_score
+        if not deep_data or deep_key == key or entry.depth >= deep_data & 0xFF \
+                or (deep_data >> GENERATION_SHIFT) & 0xFF != generation:
+            if self._read(base + 3, key) is not None:
+                words[base + 4] = 0  # it would be stale
+            if deep_data and deep_key != key:
+                # the replaced entry is still useful: it goes to the always-replace tier
+                self._write(base + 3, deep_key, deep_data, deep_score)
+            self._write(base, key, data, score)
+        else:
+            self._write(base + 3, key, data, score)
+
+    def _write(self, index: int, key: int, data: int, score: int) -> None:
+        """
+        Writes an entry starting at words[index], counting the entries of other states it replaces
+        """
+        words = self.words
+        old_data = words[index + 1]
+        if index % BUCKET_WORDS == 4 and old_data and words[index] ^ old_data ^ words[index + 2] != key:
+            self.collisions += 1
+        words[index + 1] = data
+        words[index + 2] = score
+        words[index] = key ^ data ^ score
+
+    def __contains__(self, key: int) -> bool:
+        base = 1 + BUCKET_WORDS * (key % self.size)
+        return self._read(base, key) is not None or self._read(base + 3, key) is not None
+
+    def __len__(self):
+        words = self.words
+        return sum(1 for index in range(2, len(words), 3) if words[index])
+
+    def stats(self) -> dict:
+        """
+        Returns the statistics of this process since the table was created or
+        cleared (see TranspositionTable.stats); entries are the ones of all processes
+        :return: dict
+        """
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / probes if probes > 0 else 0.0,
+            'collisions': self.collisions,
+            'entries': len(self),
+            'capacity': 2 * self.size,
+        }
+
+
+class _HelperSearch(Search):
+    """
+    Search run by the helper processes: it also stops when the main search is over
+    """
+
+    def __init__(self, evaluate, config, stop):
+        super().__init__(evaluate, config)
+        self.stop = stop
+
+    def should_stop(self) -> bool:
+        return self.stop.value or super().should_stop()
+
+
+# search of each helper process (see _init_helper)
+_helper = None
+
+
+def _init_helper(evaluate, config, table_name, megabytes, stop) -> None:
+    """
+    Creates the search of a helper process, attached to the shared table
+    """
+    global _helper
+    table = SharedTranspositionTable(megabytes, table_name)
+    _helper = _HelperSearch(evaluate, config._replace(cache=table), stop)
+
+
+def _helper_search(data: bytes, max_depth: int, index: int, deadline: float) -> int:
+    """
+    Searches the root state by iterative deepening until the main search is over.
+    Helpers with an odd index start one ply deeper, and the root moves after
+    the first are shuffled differently by each helper
+    :param data: binary representation of the root state (GameState.to_bytes)
+    :param max_depth: maximum depth
+    :param index: number of the helper (1, 2, ...)
+    :param deadline: time.time() at which the search must stop (None for no limit)
+    :return: number of nodes searched
+    """
+    search = _helper
+    state = GameState.from_bytes(data)
+    search.start(state)
+    search.deadline = None if deadline is None else time.perf_counter() + (deadline - time.time())
+
+    rng = random.Random(index)
+    root = search._root(state)
+    moves = search.ordering.order(root, root.legal_moves(), 0, search._hash_move(root))
+    for depth in range(1 + index % 2, max_depth + 2):
+        moves = moves[:1] + rng.sample(moves[1:], len(moves) - 1)
+        try:
+            search.search_root(root, depth, -INFINITY, INFINITY, [-INFINITY, None], moves)
+        except SearchTimeout:
+            break
+        moves = sorted(moves, key=lambda move: search.root_scores.get(move, -INFINITY), reverse=True)
+    return search.nodes
+
+
+class LazySMPSearch(Search):
+    """
+    Search where processes - 1 helper processes search the same root as this
+    (main) process, all sharing a SharedTranspositionTable. The move is the
+    one of the main search; helpers are stopped when it is over.
+    The helper processes are created at the first search and kept.
+    """
+
+    def __init__(self, evaluate: Callable[[GameState, str], float], config: SearchConfig = SearchConfig(),
+                 processes: int = None, megabytes: float = DEFAULT_MEGABYTES):
+        """
+        :param evaluate: evaluation function; it must be defined at the top level of a
+            module, to be sent to the helper processes
+        :param config: search settings (its cache is replaced by the shared table)
+        :param processes: number of searching processes, including this one (defaults to the number of cores)
+        :param megabytes: memory budget of the shared table
+        """
+        super().__init__(evaluate, config._replace(cache=SharedTranspositionTable(megabytes)))
+        self.processes = processes or os.cpu_count() or 1
+        self.pool = None
+        self.stop = None
+        self.helper_nodes = 0  # nodes searched by the helpers in the last search
+
+    def start_pool(self) -> None:
+        """
+        Creates the helper processes (done at the first search if not called before)
+        """
+        if self.pool is None and self.processes > 1:
+            self.stop = multiprocessing.Value('b', 0)
+            self.pool = multiprocessing.Pool(
+                self.processes - 1, _init_helper,
+                (self.evaluate, self.config._replace(cache=None), self.cache.name, self.cache.megabytes, self.stop)
+            )
+
+    def close(self) -> None:
+        """
+        Terminates the helper processes and frees the shared table
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self.cache.close()
+
+    def _search(self, state: GameState, depth: int):
+        return self._with_helpers(state, depth, super()._search)
+
+    def _iterative_deepening(self, state: GameState, max_depth: int):
+        return self._with_helpers(state, max_depth, super()._iterative_deepening)
+
+    def _with_helpers(self, state: GameState, depth: int, search):
+        """
+        Runs search(state, depth) in this process while the helpers search the same state
+        """
+        if self.processes <= 1 or len(state.legal_moves()) == 0:
+            return search(state, depth)
+
+        self.start_pool()
+        self.stop.value = 0
+        data = state.to_bytes()
+        deadline = None if self.deadline is None else time.time() + (self.deadline - time.perf_counter())
+        helpers = self.pool.starmap_async(
+            _helper_search, [(data, depth, index, deadline) for index in range(1, self.processes)]
+        )
+        try:
+            return search(state, depth)
+        finally:
+            self.stop.value = 1
+            self.helper_nodes = sum(helpers.get())
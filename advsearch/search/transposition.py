@@ -0,0 +1,124 @@
+"""
+Transposition table: a fixed-size cache of search results indexed by the
+zobrist key of the states (GameState.key), used as SearchConfig.cache.
+"""
+from .engine import CacheEntry
+
+# approximate memory taken by one stored entry: the list slots, the key and
+# the CacheEntry with its score (moves are shared tuples, see board.MOVES)
+ENTRY_BYTES = 160
+
+# default memory budget of a table
+DEFAULT_MEGABYTES = 32
+
+
+class TranspositionTable(object):
+    """
+    Transposition table with a two-tier bucket per index:
+    the depth-preferred tier keeps the entry searched the deepest
+    (unless it is left over from a previous search), the always-replace
+    tier keeps the most recent entry that did not fit in the first one.
+    The number of buckets is fixed when the table is created, so its
+    memory use is bounded. Implements the mapping methods used by
+    the search (get, __setitem__ and clear).
+    """
+
+    def __init__(self, megabytes: float = DEFAULT_MEGABYTES):
+        """
+        :param megabytes: approximate memory budget of the table
+        """
+        self.size = max(int(megabytes * 2 ** 20) // (2 * ENTRY_BYTES), 1)  # number of buckets
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Removes all entries and resets the statistics
+        """
+        self.deep_keys = [None] * self.size
+        self.deep_entries = [None] * self.size
+        self.deep_generations = [0] * self.size
+        self.recent_keys = [None] * self.size
+        self.recent_entries = [None] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def new_search(self) -> None:
+        """
+        Called before each search: entries of previous searches
+        can then be replaced in the depth-preferred tier
+        """
+        self.generation += 1
+
+    def get(self, key: int, default=None) -> CacheEntry:
+        """
+        Returns the entry stored for the key, or default if there is none
+        :param key: zobrist key of the state
+        :param default:
+        :return: CacheEntry
+        """
+        index = key % self.size
+        if self.deep_keys[index] == key:
+            self.hits += 1
+            return self.deep_entries[index]
+        if self.recent_keys[index] == key:
+            self.hits += 1
+            return self.recent_entries[index]
+        self.misses += 1
+        return default
+
+    def __setitem__(self, key: int, entry: CacheEntry) -> None:
+        """
+        Stores the entry for the key, following the replacement policy
+        :param key: zobrist key of the state
+        :param entry:
+        """
+        index = key % self.size
+        deep_key = self.deep_keys[index]
+        if deep_key is None or deep_key == key or entry.depth >= self.deep_entries[index].depth \
+                or self.deep_generations[index] != self.generation:
+            if self.recent_keys[index] == key:
+                self.recent_keys[index] = self.recent_entries[index] = None  # it would be stale
+            if deep_key is not None and deep_key != key:
+                # the replaced entry is still useful: it goes to the always-replace tier
+                self._store_recent(index, deep_key, self.deep_entries[index])
+            self.deep_keys[index] = key
+            self.deep_entries[index] = entry
+            self.deep_generations[index] = self.generation
+        else:
+            self._store_recent(index, key, entry)
+
+    def _store_recent(self, index: int, key: int, entry: CacheEntry) -> None:
+        """
+        Stores the entry in the always-replace tier, counting the entries of other states it replaces
+        """
+        recent_key = self.recent_keys[index]
+        if recent_key is not None and recent_key != key:
+            self.collisions += 1
+        self.recent_keys[index] = key
+        self.recent_entries[index] = entry
+
+    def __contains__(self, key: int) -> bool:
+        index = key % self.size
+        return self.deep_keys[index] == key or self.recent_keys[index] == key
+
+    def __len__(self):
+        return sum(key is not None for key in self.deep_keys) + sum(key is not None for key in self.recent_keys)
+
+    def stats(self) -> dict:
+        """
+        Returns the statistics of the table since it was created or cleared:
+        hits and misses of get, collisions (entries of a state overwritten
+        by another state) and the number of stored entries
+        :return: dict
+        """
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / probes if probes > 0 else 0.0,
+            'collisions': self.collisions,
+            'entries': len(self),
+            'capacity': 2 * self.size,
+        }
@@ -0,0 +1,63 @@
+"""
+Node counts of the search at a fixed depth with each root algorithm
+(alpha-beta, PVS, aspiration windows and MTD(f)), on the positions of
+benchmarks.ordering. Every algorithm uses a transposition table and the
+history move ordering, and searches by iterative deepening up to the depth,
+so that the guesses of aspiration windows and MTD(f) come from the previous iteration.
+Usage: python -m benchmarks.algorithms [-d depth] [-n positions] [-a aspiration]
+"""
+import argparse
+import time
+
+from advsearch.robert_rogers.agent import state_evaluation
+from advsearch.search import ALPHA_BETA, MTDF, PVS, Search, SearchConfig, TranspositionTable
+from advsearch.search.ordering import HistoryOrdering
+from benchmarks.ordering import sample_states
+from benchmarks.report import Baseline, row
+
+
+def count_nodes(states, depth, algorithm, aspiration):
+    """
+    Searches each state up to depth, returning the total number of nodes,
+    the elapsed time and the scores found
+    :return: (int, float, list)
+    """
+    search = Search(state_evaluation, SearchConfig(
+        max_depth=depth, ordering=HistoryOrdering(), cache=TranspositionTable(),
+        algorithm=algorithm, aspiration=aspiration,
+    ))
+    nodes = 0
+    scores = []
+    start = time.perf_counter()
+    for state in states:
+        scores.append(search.iterative_deepening(state, depth)[0])
+        nodes += search.nodes
+    return nodes, time.perf_counter() - start, scores
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Search algorithm benchmark.')
+    parser.add_argument('-d', '--depth', type=int, default=5,
+                        help='Search depth.')
+    parser.add_argument('-n', '--positions', type=int, default=20,
+                        help='Number of positions.')
+    parser.add_argument('-a', '--aspiration', type=float, default=10,
+                        help='Half-width of the aspiration windows.')
+    args = parser.parse_args()
+
+    states = sample_states(args.positions)
+    candidates = [
+        ('alpha-beta', ALPHA_BETA, None),
+        ('alpha-beta + aspiration', ALPHA_BETA, args.aspiration),
+        ('PVS', PVS, None),
+        ('PVS + aspiration', PVS, args.aspiration),
+        ('MTD(f)', MTDF, None),
+    ]
+
+    baseline = Baseline()
+    expected = None
+    for name, algorithm, aspiration in candidates:
+        nodes, elapsed, scores = count_nodes(states, args.depth, algorithm, aspiration)
+        expected = expected or scores
+        check = '' if scores == expected else '(different scores!)'
+        row(name, f'{nodes:10} nodes', baseline.percent(nodes), f'{elapsed:8.2f} s', check)
@@ -0,0 +1,61 @@
+"""
+Microbenchmark of Board.copy against the former string round-trip copy
+(from_string(str(board))), on boards taken along a random game.
+Usage: python -m benchmarks.copy_board [-n number]
+"""
+import argparse
+import random
+import timeit
+
+from advsearch.othello.board import Board, from_string
+from advsearch.othello.bitboard import from_board
+from benchmarks.report import Baseline, row
+
+
+def sample_boards(count, seed=0):
+    """
+    Returns boards from random games (with their legal moves cached),
+    to copy positions from all phases of the game
+    :param count: number of boards
+    :param seed: seed for the random move choices
+    :return: list of Board
+    """
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board, color = Board(), Board.BLACK
+        while not board.is_terminal_state() and len(boards) < count:
+            moves = board.legal_moves(color)
+            board.legal_moves(Board.opponent(color))
+            if moves:
+                boards.append(board.copy())
+                board.process_move(rng.choice(sorted(moves)), color)
+            color = Board.opponent(color)
+    return boards
+
+
+def string_round_trip(board):
+    return from_string(str(board))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Board copy microbenchmark.')
+    parser.add_argument('-n', '--number', type=int, default=20,
+                        help='How many times each board is copied.')
+    args = parser.parse_args()
+
+    boards = sample_boards(100)
+    bitboards = [from_board(b) for b in boards]
+
+    candidates = [
+        ('from_string(str(board))', lambda: [string_round_trip(b) for b in boards]),
+        ('Board.copy()', lambda: [b.copy() for b in boards]),
+        ('Board.copy(keep_legal_moves=False)', lambda: [b.copy(keep_legal_moves=False) for b in boards]),
+        ('BitBoard.copy()', lambda: [b.copy() for b in bitboards]),
+    ]
+
+    copies = args.number * len(boards)
+    baseline = Baseline()
+    for name, func in candidates:
+        elapsed = timeit.timeit(func, number=args.number)
+        row(name, f'{1e6 * elapsed / copies:8.2f} us/copy', baseline.speedup(elapsed))
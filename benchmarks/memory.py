@@ -0,0 +1,76 @@
+"""
+Per-object memory of boards and game states, measured with tracemalloc
+as the average allocation of many copies of a midgame position, next to
+the figures of the same position before the compact layouts (see BEFORE).
+Usage: python -m benchmarks.memory [-n number]
+"""
+import argparse
+import tracemalloc
+
+from advsearch.othello.board import Board
+from advsearch.othello.bitboard import from_board
+from advsearch.othello.gamestate import GameState
+from advsearch.othello.playout import random_states
+from benchmarks.report import row
+
+# bytes per object measured the same way, on the same position, before the
+# boards and states had __slots__ (each instance carried a __dict__ and BitBoard
+# allocated its caches upfront)
+BEFORE = {
+    'Board': 1848,
+    'Board (legal moves cached)': 4422,
+    'BitBoard': 1010,
+    'BitBoard (legal moves cached)': 3654,
+    'GameState(Board)': 1934,
+    'GameState(BitBoard)': 1098,
+}
+
+
+def bytes_per_object(factory, number):
+    """
+    Returns the average number of bytes allocated by each call to factory
+    :param factory: function that creates one object
+    :param number: number of objects to create
+    :return: float
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory() for _ in range(number)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # discounts the list that keeps the objects alive
+    return (after - before - objects.__sizeof__()) / number
+
+
+def with_legal_moves(board):
+    """
+    Computes (and caches) the legal moves of both players, as searches do
+    """
+    board.legal_moves(Board.BLACK)
+    board.legal_moves(Board.WHITE)
+    return board
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Board/GameState memory report.')
+    parser.add_argument('-n', '--number', type=int, default=10000,
+                        help='How many objects are created for each measure.')
+    args = parser.parse_args()
+
+    state = random_states(1, 20, 21)[0]  # a midgame position
+    board = state.board
+    bitboard = from_board(board)
+
+    candidates = [
+        ('Board', lambda: board.copy(keep_legal_moves=False)),
+        ('Board (legal moves cached)', lambda: with_legal_moves(board.copy(keep_legal_moves=False))),
+        ('BitBoard', lambda: bitboard.copy(keep_legal_moves=False)),
+        ('BitBoard (legal moves cached)', lambda: with_legal_moves(bitboard.copy(keep_legal_moves=False))),
+        ('GameState(Board)', lambda: GameState(board.copy(keep_legal_moves=False), state.player)),
+        ('GameState(BitBoard)', lambda: GameState(bitboard.copy(keep_legal_moves=False), state.player)),
+    ]
+
+    row('', '   after', '  before')
+    for name, factory in candidates:
+        after = bytes_per_object(factory, args.number)
+        row(name, f'{after:8.0f}', f'{BEFORE[name]:8d} bytes', f'{100 * after / BEFORE[name]:6.1f}%')
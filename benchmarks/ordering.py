@@ -0,0 +1,62 @@
+"""
+Node counts of the search at a fixed depth with each move ordering,
+with and without a transposition table, on a fixed set of positions.
+Each position is searched by iterative deepening up to the depth (so that
+the hash move of the previous iteration is available), with robert_rogers' evaluation.
+Usage: python -m benchmarks.ordering [-d depth] [-n positions]
+"""
+import argparse
+import time
+
+from advsearch.othello.playout import random_states
+from advsearch.robert_rogers.agent import state_evaluation
+from advsearch.search import MoveOrdering, Search, SearchConfig, TranspositionTable
+from advsearch.search.ordering import HistoryOrdering, StaticOrdering
+from benchmarks.report import Baseline, row
+
+
+def sample_states(count, seed=0):
+    """
+    Returns states from random games, between the 10th and the 40th move
+    :param count: number of states
+    :param seed: seed for the random move choices
+    :return: list of GameState
+    """
+    return random_states(count, 10, 40, seed)
+
+
+def count_nodes(states, depth, ordering, cache):
+    """
+    Searches each state up to depth, returning the total number of nodes and the elapsed time
+    :return: (int, float)
+    """
+    search = Search(state_evaluation, SearchConfig(max_depth=depth, ordering=ordering, cache=cache))
+    nodes = 0
+    start = time.perf_counter()
+    for state in states:
+        search.iterative_deepening(state, depth)
+        nodes += search.nodes
+    return nodes, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Move ordering benchmark.')
+    parser.add_argument('-d', '--depth', type=int, default=5,
+                        help='Search depth.')
+    parser.add_argument('-n', '--positions', type=int, default=20,
+                        help='Number of positions.')
+    args = parser.parse_args()
+
+    states = sample_states(args.positions)
+    candidates = [
+        ('legal move set order', MoveOrdering),
+        ('static weights', StaticOrdering),
+        ('hash/corners/killers/history', HistoryOrdering),
+    ]
+
+    baseline = Baseline()
+    for use_cache in (False, True):
+        for name, ordering_class in candidates:
+            cache = TranspositionTable() if use_cache else None
+            nodes, elapsed = count_nodes(states, args.depth, ordering_class(), cache)
+            row(f'{name}{" + TT" if use_cache else ""}', f'{nodes:10} nodes', baseline.percent(nodes), f'{elapsed:8.2f} s')
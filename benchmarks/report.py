@@ -0,0 +1,37 @@
+"""
+Output of the benchmarks: one row per candidate, with the label aligned
+and the measures compared to the ones of the first candidate.
+"""
+
+# width of the label column
+LABEL_WIDTH = 40
+
+
+def row(label: str, *columns: str) -> None:
+    """
+    Prints a row of the table: the label, then the (non-empty) columns separated by spaces
+    """
+    print(f'{label:{LABEL_WIDTH}} ' + ' '.join(column for column in columns if column))
+
+
+class Baseline(object):
+    """
+    The first value measured, which the next ones are compared to
+    """
+
+    def __init__(self):
+        self.value = None
+
+    def percent(self, value: float) -> str:
+        """
+        Returns the value as a percentage of the baseline (the first value given)
+        """
+        self.value = self.value or value
+        return f'{100 * value / self.value:6.1f}%'
+
+    def speedup(self, value: float) -> str:
+        """
+        Returns how many times the value (a time) is faster than the baseline
+        """
+        self.value = self.value or value
+        return f'{self.value / value:6.1f}x'
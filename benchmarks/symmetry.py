@@ -0,0 +1,74 @@
+"""
+Effect of caching positions by their symmetric canonical key (symmetry.canonical_key)
+on the search, in the opening (where symmetric positions are common) and in the
+midgame, and on the endgame solver. Reports nodes, cached entries, hit rate and time.
+Usage: python -m benchmarks.symmetry [-d depth] [-n positions] [-e empties]
+"""
+import argparse
+import time
+
+from advsearch.othello.endgame import EndgameSolver
+from advsearch.othello.playout import random_states
+from advsearch.robert_rogers.agent import state_evaluation
+from advsearch.search import PVS, Search, SearchConfig, TranspositionTable
+from advsearch.search.ordering import HistoryOrdering
+from benchmarks.ordering import sample_states
+from benchmarks.report import row
+
+
+def search_report(states, depth, symmetric):
+    """
+    Searches each state (with a table kept between them, as in a game), returning
+    the total nodes, the entries and hit rate of the table and the elapsed time
+    """
+    table = TranspositionTable()
+    search = Search(state_evaluation, SearchConfig(
+        max_depth=depth, cache=table, ordering=HistoryOrdering(), algorithm=PVS, symmetric=symmetric,
+    ))
+    nodes = 0
+    start = time.perf_counter()
+    for state in states:
+        search.iterative_deepening(state, depth)
+        nodes += search.nodes
+    stats = table.stats()
+    return nodes, stats['entries'], stats['hit_rate'], time.perf_counter() - start
+
+
+def endgame_report(states, symmetric):
+    """
+    Solves each state, returning the total nodes, the cached positions and the elapsed time
+    """
+    solver = EndgameSolver(symmetric=symmetric)
+    nodes = 0
+    start = time.perf_counter()
+    for state in states:
+        solver.solve(state.board, state.player)
+        nodes += solver.nodes
+    return nodes, len(solver.cache), time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Symmetric cache keys benchmark.')
+    parser.add_argument('-d', '--depth', type=int, default=5,
+                        help='Search depth.')
+    parser.add_argument('-n', '--positions', type=int, default=10,
+                        help='Number of positions of each kind.')
+    parser.add_argument('-e', '--empties', type=int, default=12,
+                        help='Empty tiles of the endgame positions.')
+    args = parser.parse_args()
+
+    kinds = [
+        ('opening (0-6 plies)', random_states(args.positions, 0, 7)),
+        ('midgame (10-40 plies)', sample_states(args.positions)),
+    ]
+    for name, states in kinds:
+        for symmetric in (False, True):
+            nodes, entries, hit_rate, elapsed = search_report(states, args.depth, symmetric)
+            row(f'{name}{" symmetric" if symmetric else ""}',
+                f'{nodes:9} nodes', f'{entries:8} entries', f'{100 * hit_rate:5.1f}% hits', f'{elapsed:7.2f} s')
+
+    endgame = random_states(args.positions, 60 - args.empties, 61 - args.empties, seed=1)
+    for symmetric in (False, True):
+        nodes, entries, elapsed = endgame_report(endgame, symmetric)
+        row(f'endgame ({args.empties} empties){" symmetric" if symmetric else ""}',
+            f'{nodes:9} nodes', f'{entries:8} entries', f'{"":10}', f'{elapsed:7.2f} s')
@@ -60,7 +60,7 @@ class FastServer(Server):
             self.l_match_data.append(match_result)
         print("Fim da simulação")
 
-    def run(self):
+    def play(self):
         self.start = time.localtime()
 
         illegal_count = {Board.BLACK: 0, Board.WHITE: 0}  # counts the number of illegal move attempts
@@ -97,7 +97,7 @@ class FastServer(Server):
 
             # calls current player's make_move function with the specified timeout
             start = time.time()
-            function_call = timer.FunctionTimer(self.player_modules[current_player].make_move, (state_copy,))  # argument must be a 1-element tuple
+            function_call = timer.FunctionTimer(self.agents[current_player].make_move, (state_copy,))  # argument must be a 1-element tuple
             
             move = function_call.run(self.delay)
                 
@@ -118,6 +118,7 @@ class FastServer(Server):
             if self.state.is_legal_move(move):   
                 self.last_player = current_player
                 self.state = self.state.next_state(move)  
+                self.notify_opponent(current_player, move)
 
             else:
                 illegal_count[current_player] += 1
@@ -178,5 +179,8 @@ if __name__ == '__main__':
     p1, p2 = args.players
 
     s = FastServer(p1, p2, args.delay, args.output, args.pace, args.matches)
-    s.run_multiple()
-    s.write_output()
\ No newline at end of file
+    try:
+        s.run_multiple()
+        s.write_output()
+    finally:
+        s.close()
\ No newline at end of file
@@ -7,7 +7,7 @@ import xml.dom.minidom
 
 from advsearch.othello.board import Board
 from advsearch.othello.gamestate import GameState
-from advsearch.robert_rogers.agent import coin_parity, make_move
+from advsearch.agent import load_agents
 import advsearch.timer as timer
 
 def player_name(player_dir:str) -> str:
@@ -69,10 +69,41 @@ class Server(object):
             Board.WHITE: importlib.import_module(f"{p2_module}.agent"),
         }
 
+        # creates the agents once: they are set up again for each game (see advsearch/agent.py)
+        self.agents = load_agents(self.player_modules)
+
     def __del__(self):
         self.history_file.close()
 
+    def notify_opponent(self, player, move):
+        """
+        Tells the opponent of player about the move player just made, with a copy of the
+        new state (an agent playing against itself is not told about its own moves)
+        :param player: color of the player that moved
+        :param move: (x, y) move
+        """
+        agent = self.agents[Board.opponent(player)]
+        if agent is not self.agents[player]:
+            agent.notify_opponent_move(move, self.state.copy())
+
     def run(self):
+        """
+        Sets the agents up, plays the game and tears the agents down
+        :return: game result (see play)
+        """
+        for color, agent in self.agents.items():
+            agent.setup(color, self.delay)
+        try:
+            return self.play()
+        finally:
+            for agent in self.agents.values():
+                agent.teardown()
+
+    def play(self):
+        """
+        Plays the game with the agents already set up
+        :return: game result (0 if the 1st player wins, 1 if the 2nd, 2 for a draw)
+        """
         self.start = time.localtime()
 
         illegal_count = {Board.BLACK: 0, Board.WHITE: 0}  # counts the number of illegal move attempts
@@ -133,7 +164,7 @@ class Server(object):
 
             # calls current player's make_move function with the specified timeout
             start = time.time()
-            function_call = timer.FunctionTimer(self.player_modules[current_player].make_move, (state_copy,))  # argument must be a 1-element tuple
+            function_call = timer.FunctionTimer(self.agents[current_player].make_move, (state_copy,))  # argument must be a 1-element tuple
             
             delay = 60 if player_name(self.player_dirs[current_player]) == "humanplayer" else self.delay
             move = function_call.run(delay)
@@ -163,6 +194,7 @@ class Server(object):
             
                 self.last_player = current_player           # records the player that just moved
                 self.state = self.state.next_state(move)  
+                self.notify_opponent(current_player, move)
 
             else:
                 print(f'Player {current_player} move {move}_ILLEGAL!')
@@ -178,6 +210,13 @@ class Server(object):
             ))
 
 
+    def close(self):
+        """
+        Closes the agents, once the server is done with them (after its last game)
+        """
+        for agent in {id(agent): agent for agent in self.agents.values()}.values():  # an agent may play both colors
+            agent.close()
+
     def write_output(self):
         """
         Writes a xml file with detailed match data
@@ -249,5 +288,8 @@ if __name__ == '__main__':
     p1, p2 = args.players
 
     s = Server(p1, p2, args.delay, args.history, args.output, args.pace)
-    s.run()
-    s.write_output()
\ No newline at end of file
+    try:
+        s.run()
+        s.write_output()
+    finally:
+        s.close()
\ No newline at end of file
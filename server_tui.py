@@ -9,6 +9,7 @@ from pytermgui import tim, ansi_interface  # for TUI (text user interface) - ins
 
 from advsearch.othello.board import Board
 from advsearch.othello.gamestate import GameState
+from advsearch.agent import load_agents
 import advsearch.timer as timer
 
 
@@ -74,9 +75,36 @@ class Server(object):
             Board.WHITE: importlib.import_module(f"{p2_module}.agent"),
         }
 
+        # creates the agents once: they are set up again for each game (see advsearch/agent.py)
+        self.agents = load_agents(self.player_modules)
+
     def __del__(self):
         self.history_file.close()
 
+    def notify_opponent(self, player, move):
+        """
+        Tells the opponent of player about the move player just made, with a copy of the
+        new state (an agent playing against itself is not told about its own moves)
+        :param player: color of the player that moved
+        :param move: (x, y) move
+        """
+        agent = self.agents[Board.opponent(player)]
+        if agent is not self.agents[player]:
+            agent.notify_opponent_move(move, self.state.copy())
+
+    def run(self):
+        """
+        Sets the agents up, plays the game and tears the agents down
+        :return: game result (see play)
+        """
+        for color, agent in self.agents.items():
+            agent.setup(color, self.delay)
+        try:
+            return self.play()
+        finally:
+            for agent in self.agents.values():
+                agent.teardown()
+
     def print_header(self):
         board = self.state.board
         tim.print(
@@ -95,9 +123,9 @@ class Server(object):
         tim.print(self.state.board.decorated_str(move=move, highlight_flipped=flipped))
         sys.stdout.flush()
 
-    def run(self) -> int:
+    def play(self) -> int:
         """
-        Runs the game and returns the winner (0 or 1)
+        Plays the game with the agents already set up and returns the winner (0 or 1)
         :return: game winner (0 for 1st player, 1 for 2nd)
         """
         self.start = time.localtime()
@@ -163,7 +191,7 @@ class Server(object):
             state_copy = self.state.copy()
 
             # calls current player's make_move function with the specified timeout
-            function_call = timer.FunctionTimer(self.player_modules[current_player].make_move, (state_copy,))  # argument must be a 1-element tuple
+            function_call = timer.FunctionTimer(self.agents[current_player].make_move, (state_copy,))  # argument must be a 1-element tuple
             
             delay = 60 if self.player_dirs[current_player] == "advsearch.humanplayer" else self.delay
             move_xy = function_call.run(delay)      # move in x,y coordinates (human convention)
@@ -200,6 +228,7 @@ class Server(object):
             
                 self.last_player = current_player           # records the player that just moved
                 self.state = self.state.next_state(move_xy)    # processes the move
+                self.notify_opponent(current_player, move_xy)
                 
                 self.display_board(move=move_yx, flipped=True)  #TODO highlight flipped positions before flipping
             
@@ -214,6 +243,13 @@ class Server(object):
             ansi_interface.clear("eos")  # clears the remainder of the screen
             ansi_interface.cursor_home()  # resets cursor to print all over
 
+    def close(self):
+        """
+        Closes the agents, once the server is done with them (after its last game)
+        """
+        for agent in {id(agent): agent for agent in self.agents.values()}.values():  # an agent may play both colors
+            agent.close()
+
     def write_output(self):
         """
         Writes a xml file with detailed match data
@@ -285,5 +321,8 @@ if __name__ == '__main__':
     p1, p2 = args.players
 
     s = Server(p1, p2, args.delay, args.history, args.output, args.pace)
-    s.run()
-    s.write_output()
+    try:
+        s.run()
+        s.write_output()
+    finally:
+        s.close()
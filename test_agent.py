@@ -2,7 +2,10 @@ import unittest
 
 import advsearch.othello.board as board
 import advsearch.othello.gamestate as gamestate
+import advsearch.randomplayer.agent as randomplayer
 import advsearch.timer as timer
+from advsearch.agent import ModuleAgent, load_agents
+from advsearch.search import time_limit_from_delay
 
 import advsearch.robert_rogers.agent as agent  # change your_agent by the name of your agent module
 
@@ -49,5 +52,45 @@ WWWWWWW."""
             self.fail("timeout")
 
 
+class TestAgentLifecycle(unittest.TestCase):
+    def test_lifecycle(self):
+        """
+        An Agent is set up for each game and plays legal moves with either color
+        """
+        a = agent.Agent()
+        try:
+            for color, delay in (('B', 1.0), ('W', 2.0)):
+                a.setup(color, delay)
+                self.assertEqual(a.color, color)
+                self.assertEqual(a.search.config.time_limit, time_limit_from_delay(delay))
+                g = gamestate.GameState(board.Board(), 'B')
+                if color == 'W':
+                    g = g.next_state((2, 3))
+                self.assertIn(a.make_move(g), g.legal_moves())
+                a.teardown()
+        finally:
+            a.close()
+
+    def test_load_agents(self):
+        """
+        Modules with an Agent class get one agent per color, modules with
+        only functions are wrapped in a single ModuleAgent
+        """
+        agents = load_agents({'B': randomplayer, 'W': randomplayer})
+        self.assertIsInstance(agents['B'], ModuleAgent)
+        self.assertIs(agents['B'], agents['W'])
+        agents['B'].close()  # nothing to free, but the server closes every agent
+
+        agents = load_agents({'B': agent, 'W': agent})
+        self.assertIsInstance(agents['B'], agent.Agent)
+        self.assertIsNot(agents['B'], agents['W'])
+        self.assertIsNone(agents['B'].search)  # created at the first setup
+        for color, a in agents.items():
+            a.setup(color, 1.0)
+        self.assertIsNot(agents['B'].search.cache, agents['W'].search.cache)
+        for a in agents.values():
+            a.close()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,425 @@
+import copy
+import random
+import unittest
+
+import advsearch.othello.board as board
+import advsearch.othello.bitboard as bitboard
+import advsearch.othello.endgame as endgame
+import advsearch.othello.gamestate as gamestate
+import advsearch.othello.perft as perft
+import advsearch.othello.playout as playout
+import advsearch.othello.symmetry as symmetry
+
+try:
+    import advsearch.othello.batch as batch
+except ImportError:  # numpy is not installed
+    batch = None
+
+
+class TestBitBoard(unittest.TestCase):
+    def test_initial_board(self):
+        b = bitboard.BitBoard()
+        self.assertEqual(str(b), str(board.Board()))
+        self.assertEqual(b.legal_moves(board.Board.BLACK), {(2, 3), (4, 5), (5, 4), (3, 2)})
+
+    def test_matches_matrix_board(self):
+        """
+        Plays the same random games on both implementations, checking that
+        they agree on every position
+        """
+        for seed in range(20):
+            rng = random.Random(seed)
+            reference, b = board.Board(), bitboard.BitBoard()
+            color = board.Board.BLACK
+            while not reference.is_terminal_state():
+                self.assertEqual(str(b), str(reference))
+                self.assertEqual(b.tiles, reference.tiles)
+                self.assertEqual(b.piece_count, reference.piece_count)
+                self.assertEqual(b.legal_moves(color), reference.legal_moves(color))
+                self.assertEqual(b.has_legal_move(color), reference.has_legal_move(color))
+                self.assertEqual(b.compute_frontier(), reference.compute_frontier())
+                if reference.has_legal_move(color):
+                    move = rng.choice(sorted(reference.legal_moves(color)))
+                    reference.process_move(move, color)
+                    self.assertTrue(b.process_move(move, color))
+                    self.assertEqual(b.flipped, reference.flipped)
+                    self.assertEqual(b.decorated_str(colors=False, move=move[::-1], highlight_flipped=True),
+                                     reference.decorated_str(colors=False, move=move[::-1], highlight_flipped=True))
+                color = board.Board.opponent(color)
+            self.assertTrue(b.is_terminal_state())
+
+    def test_from_string(self):
+        string = "WWWWWWWW\nWWWWWBBW\nWWWWBWBW\nWBWBWBBW\nWBWWBWBW\nWBBWBWBW\nWBBBWBWW\nWWWWWWW.\n"
+        b = bitboard.from_string(string)
+        self.assertEqual(str(b), string)
+        self.assertEqual(b.piece_count, board.from_string(string).piece_count)
+        self.assertFalse(b.has_legal_move(board.Board.WHITE))
+
+    def test_compact(self):
+        """
+        Boards and states have no per-instance __dict__
+        """
+        for obj in (board.Board(), bitboard.BitBoard(), gamestate.GameState(bitboard.BitBoard(), board.Board.BLACK)):
+            self.assertFalse(hasattr(obj, '__dict__'))
+            self.assertRaises(AttributeError, setattr, obj, 'unknown', 0)
+        # the matrix, piece counts and frontier slots belong to Board only
+        self.assertRaises(AttributeError, setattr, bitboard.BitBoard(), '_frontier', 0)
+
+    def test_track_flipped(self):
+        for board_class in (board.Board, bitboard.BitBoard):
+            b = board_class()
+            b.process_move((2, 3), board.Board.BLACK)
+            self.assertIn((3, 3), b.flipped)
+
+            b.track_flipped = False
+            self.assertTrue(b.process_move((2, 2), board.Board.WHITE))
+            self.assertEqual(len(b.flipped), 0)
+            self.assertEqual(b.piece_count[board.Board.WHITE], 3)
+
+    def test_illegal_move(self):
+        b = bitboard.BitBoard()
+        self.assertFalse(b.process_move((0, 0), board.Board.BLACK))
+        self.assertEqual(str(b), str(board.Board()))
+
+
+class TestCopy(unittest.TestCase):
+    def test_copy_is_independent(self):
+        for board_class in (board.Board, bitboard.BitBoard):
+            original = board_class()
+            original.legal_moves(board.Board.BLACK)
+            for duplicate in (original.copy(), copy.copy(original), copy.deepcopy(original)):
+                self.assertIsInstance(duplicate, board_class)
+                self.assertEqual(str(duplicate), str(original))
+                self.assertEqual(duplicate.legal_moves(board.Board.BLACK), original.legal_moves(board.Board.BLACK))
+                duplicate.process_move((2, 3), board.Board.BLACK)
+                self.assertEqual(str(original), str(board_class()))
+                self.assertEqual(original.piece_count, board_class().piece_count)
+
+    def test_copy_keeps_legal_moves(self):
+        original = board.Board()
+        moves = original.legal_moves(board.Board.BLACK)
+        self.assertIs(original.copy().legal_moves(board.Board.BLACK), moves)
+        self.assertIsNot(original.copy(keep_legal_moves=False).legal_moves(board.Board.BLACK), moves)
+
+
+class TestZobrist(unittest.TestCase):
+    def test_incremental_key(self):
+        """
+        Checks the incrementally maintained keys against keys computed from scratch,
+        on both implementations and with both process_move and make_move
+        """
+        for seed in range(10):
+            rng = random.Random(seed)
+            boards = [board.Board(), bitboard.BitBoard(), board.Board()]
+            color = board.Board.BLACK
+            while not boards[0].is_terminal_state():
+                for b in boards:
+                    self.assertEqual(b.key(), b.compute_key())
+                    self.assertEqual(hash(b), hash(boards[0]))
+                    self.assertEqual(b, boards[0])
+                if boards[0].has_legal_move(color):
+                    move = rng.choice(sorted(boards[0].legal_moves(color)))
+                    boards[0].process_move(move, color)
+                    boards[1].process_move(move, color)
+                    boards[2].make_move(move, color)
+                color = board.Board.opponent(color)
+
+    def test_unmake_restores_key(self):
+        b = board.Board()
+        b.make_move((2, 3), board.Board.BLACK)
+        self.assertNotEqual(b.key(), board.Board().key())
+        b.unmake_move()
+        self.assertEqual(b.key(), board.Board().key())
+
+    def test_state_key(self):
+        black_to_move = gamestate.GameState(board.Board(), board.Board.BLACK)
+        white_to_move = gamestate.GameState(board.Board(), board.Board.WHITE)
+        self.assertNotEqual(black_to_move.key(), white_to_move.key())
+        self.assertNotEqual(black_to_move, white_to_move)
+        self.assertEqual(len({black_to_move, white_to_move, black_to_move.copy()}), 2)
+
+
+class TestNextState(unittest.TestCase):
+    def test_next_state_caches_moves(self):
+        """
+        The legal moves of the next player are generated by next_state
+        and reused by legal_moves
+        """
+        state = gamestate.GameState(board.Board(), board.Board.BLACK).next_state((2, 3))
+        cached = state.board._legal_moves[board.Board.WHITE]
+        self.assertIsNotNone(cached)
+        self.assertFalse(state.is_terminal())
+        self.assertIs(state.legal_moves(), cached)
+
+    def test_full_board_is_terminal(self):
+        b = board.from_string("\n".join(["BBBBBBBB"] * 7 + ["BWWWWWW."]))
+        state = gamestate.GameState(b, board.Board.BLACK).next_state((7, 7))
+        self.assertIsNone(state.player)
+        self.assertTrue(state.is_terminal())
+        self.assertEqual(state.winner(), board.Board.BLACK)
+
+
+class TestIncrementalLegalMoves(unittest.TestCase):
+    def test_matches_full_generation(self):
+        """
+        Keeps the legal moves of both players cached along random games,
+        checking the incrementally updated frontier and moves against a fresh board
+        """
+        for seed in range(20):
+            rng = random.Random(seed)
+            b = board.Board()
+            color = board.Board.BLACK
+            while not b.is_terminal_state():
+                fresh = board.from_string(str(b))
+                self.assertEqual(b._frontier, fresh.compute_frontier())
+                for c in (board.Board.BLACK, board.Board.WHITE):
+                    self.assertEqual(b.legal_moves(c), fresh.legal_moves(c))
+                if b.has_legal_move(color):
+                    move = rng.choice(sorted(b.legal_moves(color)))
+                    if rng.random() < 0.5:
+                        b.process_move(move, color)
+                    else:
+                        b.make_move(move, color)
+                color = board.Board.opponent(color)
+
+
+class TestMakeUnmake(unittest.TestCase):
+    def test_unmake_restores_board(self):
+        """
+        Walks random lines of play with push, checking that pop
+        restores every position and that push agrees with next_state
+        """
+        for board_class in (board.Board, bitboard.BitBoard):
+            for seed in range(10):
+                rng = random.Random(seed)
+                state = gamestate.MutableGameState(board_class(), board.Board.BLACK)
+                history = []
+                while not state.is_terminal():
+                    move = rng.choice(sorted(state.legal_moves()))
+                    expected = state.next_state(move)
+                    history.append((str(state.board), dict(state.board.piece_count), state.player))
+                    state.push(move)
+                    self.assertEqual(str(state.board), str(expected.board))
+                    self.assertEqual(state.board.piece_count, expected.board.piece_count)
+                    self.assertEqual(state.player, expected.player)
+
+                while history:
+                    state.pop()
+                    string, piece_count, player = history.pop()
+                    self.assertEqual(str(state.board), string)
+                    self.assertEqual(state.board.piece_count, piece_count)
+                    self.assertEqual(state.player, player)
+                    self.assertEqual(state.legal_moves(), board.from_string(string).legal_moves(player))
+
+    def test_illegal_push(self):
+        state = gamestate.MutableGameState(board.Board(), board.Board.BLACK)
+        self.assertRaises(ValueError, state.push, (0, 0))
+        self.assertEqual(str(state.board), str(board.Board()))
+
+
+class TestStableDiscs(unittest.TestCase):
+    def test_edges_and_corners(self):
+        b = board.from_string("BBBBBBBB\n" + "B.......\n" * 6 + "W.......\n")
+        self.assertEqual(b.stable_discs(board.Board.BLACK)[0], 14)
+        self.assertEqual(b.stable_discs(board.Board.WHITE), (1, 1 << 56))
+        self.assertEqual(board.Board().stable_discs(board.Board.BLACK), (0, 0))
+
+    def test_blocked_line(self):
+        """
+        On a finished board that is not full, the discs on the lines blocked by the
+        empty tile (its row, column and diagonal) are stable through their stable neighbors
+        """
+        b = board.from_string("BBBBBBBB\n" * 7 + "WWWWWWW.\n")
+        self.assertTrue(b.is_terminal_state())
+        self.assertEqual(b.stable_discs(board.Board.BLACK)[0], 56)
+        self.assertEqual(b.stable_discs(board.Board.WHITE)[0], 7)
+
+    def test_stable_discs_never_flip(self):
+        """
+        Along random games, discs reported as stable keep their color until the end,
+        and every disc is stable on the final board if it is full
+        """
+        for seed in range(20):
+            rng = random.Random(seed)
+            b = bitboard.BitBoard()
+            color = board.Board.BLACK
+            stable = {board.Board.BLACK: 0, board.Board.WHITE: 0}
+            while not b.is_terminal_state():
+                for c in stable:
+                    self.assertEqual(stable[c] & ~b.bitboards(c)[0], 0)
+                    count, stable[c] = b.stable_discs(c)
+                    self.assertEqual((count, stable[c]), board.from_string(str(b)).stable_discs(c))
+                if b.has_legal_move(color):
+                    b.process_move(rng.choice(sorted(b.legal_moves(color))), color)
+                color = board.Board.opponent(color)
+            if b.num_pieces(board.Board.EMPTY) == 0:
+                self.assertEqual(b.stable_discs(board.Board.BLACK)[0], b.num_pieces(board.Board.BLACK))
+
+
+class TestEndgame(unittest.TestCase):
+    @staticmethod
+    def minimax(player, opponent, passed=False):
+        moves = bitboard.move_mask(player, opponent)
+        if moves == 0:
+            if passed:
+                return endgame.final_score(player, opponent)
+            return -TestEndgame.minimax(opponent, player, True)
+        best = -64
+        for square in bitboard.squares(moves):
+            flips = bitboard.flip_mask(square, player, opponent)
+            best = max(best, -TestEndgame.minimax(opponent ^ flips, player | flips | (1 << square)))
+        return best
+
+    def test_matches_minimax(self):
+        """
+        Solves positions with 7 empty tiles reached by random games,
+        comparing the scores with a plain minimax search until the end
+        """
+        solver = endgame.EndgameSolver()
+        symmetric_solver = endgame.EndgameSolver(symmetric=True)
+        for seed in range(10):
+            rng = random.Random(seed)
+            b = board.Board()
+            color = board.Board.BLACK
+            while b.num_pieces(board.Board.EMPTY) > 7 and not b.is_terminal_state():
+                if b.has_legal_move(color):
+                    b.process_move(rng.choice(sorted(b.legal_moves(color))), color)
+                color = board.Board.opponent(color)
+
+            expected = self.minimax(*b.bitboards(color))
+            score, move = solver.solve(b, color)
+            self.assertEqual(score, expected)
+            self.assertEqual(solver.solve(b, color, exact=False)[0], (expected > 0) - (expected < 0))
+            for transform in symmetry.SYMMETRIES:
+                self.assertEqual(symmetric_solver.solve(symmetry.transform_board(b, transform), color)[0], expected)
+            if b.has_legal_move(color):
+                after = b.copy()
+                after.process_move(move, color)
+                self.assertEqual(-self.minimax(*after.bitboards(board.Board.opponent(color))), expected)
+            else:
+                self.assertEqual(move, (-1, -1))
+
+
+class TestSymmetry(unittest.TestCase):
+    @staticmethod
+    def random_boards(count, seed=0):
+        return [(state.board, state.player) for state in playout.random_states(count, 0, 40, seed)]
+
+    def test_transforms(self):
+        """
+        Transformed boards have the transformed pieces and legal moves, for both board implementations
+        """
+        for b, color in self.random_boards(20):
+            for board_class in (board.Board, bitboard.BitBoard):
+                original = board_class.from_bitboards(*b.bitboards(board.Board.BLACK))
+                for transform in symmetry.SYMMETRIES:
+                    transformed = symmetry.transform_board(original, transform)
+                    self.assertIsInstance(transformed, board_class)
+                    for y in range(8):
+                        for x in range(8):
+                            tx, ty = symmetry.transform_move((x, y), transform)
+                            self.assertEqual(transformed.tiles[ty][tx], original.tiles[y][x])
+                            self.assertEqual(symmetry.inverse_move((tx, ty), transform), (x, y))
+                    self.assertEqual(transformed.legal_moves(color),
+                                     {symmetry.transform_move(move, transform) for move in b.legal_moves(color)})
+
+    def test_rotations(self):
+        b = board.from_string("\n".join(["B......."] + ["........"] * 7))
+        rotated = symmetry.transform_board(b, symmetry.ROTATE_90)
+        self.assertEqual(rotated.tiles[0][7], board.Board.BLACK)  # clockwise: top left -> top right
+        rotated = symmetry.transform_board(rotated, symmetry.ROTATE_90)
+        self.assertEqual(str(rotated), str(symmetry.transform_board(b, symmetry.ROTATE_180)))
+        self.assertEqual(str(symmetry.transform_board(rotated, symmetry.ROTATE_180)), str(b))
+
+    def test_canonical_key(self):
+        """
+        The 8 variants of a state share the key, which is the zobrist key of the canonical orientation
+        """
+        for b, color in self.random_boards(20, seed=1):
+            key, transform = symmetry.canonical_key(b, color)
+            canonical = gamestate.GameState(symmetry.transform_board(b, transform), color)
+            self.assertEqual(canonical.key(), key)
+            for other in symmetry.SYMMETRIES:
+                self.assertEqual(symmetry.canonical_key(symmetry.transform_board(b, other), color)[0], key)
+            self.assertNotEqual(symmetry.canonical_key(b, board.Board.opponent(color))[0], key)
+
+        # the four first moves lead to the same position
+        keys = {symmetry.canonical_key(gamestate.GameState(board.Board(), board.Board.BLACK).next_state(move).board,
+                                       board.Board.WHITE)[0]
+                for move in board.Board().legal_moves(board.Board.BLACK)}
+        self.assertEqual(len(keys), 1)
+
+
+class TestSerialization(unittest.TestCase):
+    def test_round_trip(self):
+        rng = random.Random(0)
+        states = []
+        state = gamestate.GameState(board.Board(), board.Board.BLACK)
+        while not state.is_terminal():
+            states.append(state)
+            state = state.next_state(rng.choice(sorted(state.legal_moves())))
+        states.append(state)
+
+        for s in states:
+            for board_class in (board.Board, bitboard.BitBoard):
+                data = s.board.to_bytes()
+                self.assertEqual(len(data), 16)
+                self.assertEqual(bitboard.from_board(s.board).to_bytes(), data)
+                restored = board_class.from_bytes(data)
+                self.assertIsInstance(restored, board_class)
+                self.assertEqual(str(restored), str(s.board))
+                self.assertEqual(restored.piece_count, s.board.piece_count)
+                self.assertEqual(restored.key(), s.board.key())
+                self.assertEqual(restored.legal_moves(board.Board.WHITE), s.board.legal_moves(board.Board.WHITE))
+
+        packed = gamestate.pack_states(states)
+        self.assertEqual(len(packed), gamestate.STATE_SIZE * len(states))
+        self.assertEqual(gamestate.unpack_states(packed), states)
+        self.assertIsNone(gamestate.unpack_states(packed, bitboard.BitBoard)[-1].player)
+        boards = board.unpack_boards(board.pack_boards(s.board for s in states), bitboard.BitBoard)
+        self.assertEqual([str(b) for b in boards], [str(s.board) for s in states])
+
+    def test_invalid_data(self):
+        self.assertRaises(ValueError, board.from_bytes, b'\x00' * 15)
+        self.assertRaises(ValueError, board.Board.from_bytes, b'\xff' * 16)  # overlapping pieces
+        self.assertRaises(ValueError, gamestate.unpack_states, b'\x00' * 16)
+
+
+class TestPerft(unittest.TestCase):
+    def test_known_counts(self):
+        for backend, from_string in perft.BACKENDS.items():
+            b = from_string(str(board.Board()))
+            for depth in range(1, 6):
+                self.assertEqual(perft.perft(b, board.Board.BLACK, depth), perft.KNOWN_PERFT[depth], backend)
+            self.assertEqual(str(b), str(board.Board()))  # the board is restored
+
+
+@unittest.skipIf(batch is None, "numpy is not installed")
+class TestBoardBatch(unittest.TestCase):
+    def test_matches_boards(self):
+        rng = random.Random(0)
+        boards = [
+            board.from_string('\n'.join(''.join(rng.choice('BW..') for _ in range(8)) for _ in range(8)))
+            for _ in range(200)
+        ]
+        boards_batch = batch.BoardBatch.from_boards(boards)
+        self.assertEqual([str(b) for b in boards_batch.to_boards()], [str(b) for b in boards])
+
+        for color in (board.Board.BLACK, board.Board.WHITE):
+            legal_moves = boards_batch.legal_moves(color)
+            mobility = boards_batch.mobility(color)
+            piece_count = boards_batch.piece_count(color)
+            for i, b in enumerate(boards):
+                moves = {(x, y) for y in range(8) for x in range(8) if legal_moves[i, y, x]}
+                self.assertEqual(moves, b.legal_moves(color))
+                self.assertEqual(mobility[i], len(b.legal_moves(color)))
+                self.assertEqual(piece_count[i], b.piece_count[color])
+
+    def test_weighted_squares(self):
+        weights = [[y * 8 + x for x in range(8)] for y in range(8)]
+        scores = batch.BoardBatch.from_boards([board.Board()]).weighted_squares(weights, board.Board.BLACK)
+        self.assertEqual(list(scores), [(28 + 35) - (27 + 36)])
+
+
+if __name__ == '__main__':
+    unittest.main()
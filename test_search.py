@@ -0,0 +1,424 @@
+import os
+import tempfile
+import time
+import unittest
+
+import advsearch.othello.bitboard as bitboard
+import advsearch.othello.board as board
+import advsearch.othello.gamestate as gamestate
+import advsearch.othello.playout as playout
+import advsearch.search as search
+import advsearch.search.book as book
+import advsearch.search.ordering as ordering
+
+BLACK, WHITE = board.Board.BLACK, board.Board.WHITE
+
+
+def disc_difference(state, color):
+    return state.board.num_pieces(color) - state.board.num_pieces(board.Board.opponent(color))
+
+
+def weighted_discs(state, color):
+    """
+    Evaluation with fractional values, where null windows of integers would not work
+    """
+    score = 0.0
+    for y, row in enumerate(state.board.tiles):
+        for x, piece in enumerate(row):
+            if piece == color:
+                score += ordering.SQUARE_WEIGHTS[y][x] / 7
+            elif piece != board.Board.EMPTY:
+                score -= ordering.SQUARE_WEIGHTS[y][x] / 7
+    return score
+
+
+def minimax(state, depth, color, evaluate=disc_difference):
+    """
+    Plain minimax with the value of the leaves for color, as a reference for the engine
+    """
+    if depth == 0 or state.is_terminal():
+        return evaluate(state, color)
+    values = [minimax(state.next_state(move), depth - 1, color, evaluate) for move in state.legal_moves()]
+    return max(values) if state.player == color else min(values)
+
+
+def random_states(count, seed=0, max_moves=50):
+    """
+    Returns states reached by random games, at various stages of the game
+    """
+    return playout.random_states(count, 4, max_moves, seed)
+
+
+class TestSearch(unittest.TestCase):
+    def test_matches_minimax(self):
+        """
+        The engine returns the minimax value (and a move with that value)
+        with and without a cache
+        """
+        configs = [
+            search.SearchConfig(max_depth=3, cache=cache, ordering=move_ordering)
+            for cache in (None, {}, search.TranspositionTable(), search.TranspositionTable(megabytes=0.001))
+            for move_ordering in (None, ordering.HistoryOrdering())
+        ]
+        for config in configs:
+            engine = search.Search(disc_difference, config)
+            for state in random_states(15):
+                score, move = engine.search(state, 3)
+                self.assertEqual(score, minimax(state, 3, state.player))
+                self.assertEqual(minimax(state.next_state(move), 2, state.player), score)
+
+    def test_algorithms(self):
+        """
+        PVS, aspiration windows, MTD(f) and symmetric cache keys return the minimax value,
+        with integer and fractional evaluations
+        """
+        configs = [
+            search.SearchConfig(algorithm=search.PVS),
+            search.SearchConfig(algorithm=search.PVS, cache=search.TranspositionTable(), aspiration=0.5),
+            search.SearchConfig(algorithm=search.ALPHA_BETA, cache=search.TranspositionTable(), aspiration=3),
+            search.SearchConfig(algorithm=search.MTDF, cache=search.TranspositionTable()),
+            search.SearchConfig(algorithm=search.MTDF, cache={}, ordering=ordering.HistoryOrdering()),
+            search.SearchConfig(algorithm=search.PVS, cache=search.TranspositionTable(), symmetric=True),
+        ]
+        for evaluate in (disc_difference, weighted_discs):
+            for config in configs:
+                engine = search.Search(evaluate, config._replace(max_depth=3))
+                for state in random_states(10, seed=4):
+                    expected = minimax(state, 3, state.player, evaluate)
+                    score, move = engine.iterative_deepening(state, 3)
+                    self.assertEqual(score, expected)
+                    self.assertEqual(minimax(state.next_state(move), 2, state.player, evaluate), score)
+                    self.assertEqual(engine.search(state, 3)[0], score)
+
+    def test_mtdf_needs_cache(self):
+        with self.assertRaises(ValueError):
+            search.Search(disc_difference, search.SearchConfig(algorithm=search.MTDF))
+
+    def test_no_moves(self):
+        b = board.from_string("\n".join(["WWWWWWWW"] * 7 + ["WWWWWWW."]))
+        engine = search.Search(disc_difference)
+        self.assertEqual(engine.best_move(gamestate.GameState(b, WHITE)), search.NO_MOVE)
+
+    def test_time_limit(self):
+        """
+        A search that runs out of time still returns a legal move
+        """
+        engine = search.Search(disc_difference, search.SearchConfig(max_depth=20, time_limit=0.05))
+        state = random_states(1)[0]
+        self.assertIn(engine.best_move(state), state.legal_moves())
+
+    def test_iterative_deepening(self):
+        """
+        With a time limit, the search deepens until the time runs out, returns
+        in time and keeps the result of the last completed depth
+        """
+        state = random_states(1, seed=2)[0]
+        engine = search.Search(disc_difference, search.SearchConfig(max_depth=60, time_limit=0.5))
+        start = time.perf_counter()
+        move = engine.best_move(state)
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertGreaterEqual(engine.depth, 2)
+        self.assertIn(move, state.legal_moves())
+        score = engine.search(state, engine.depth)[0]
+        self.assertEqual(engine.root_scores[move], score)  # the move has the best score at that depth
+
+    def test_endgame(self):
+        """
+        Close to the end, the engine plays the moves of the exact solver
+        """
+        engine = search.Search(disc_difference, search.SearchConfig(max_depth=1, endgame_empties=10))
+        for state in random_states(30, seed=3, max_moves=60):
+            if state.board.num_pieces(board.Board.EMPTY) <= 8:
+                score = engine.endgame.solve(state.board, state.player)[0]
+                after = state.next_state(engine.best_move(state))
+                self.assertEqual(-engine.endgame.solve(after.board, after.player)[0] if after.player != state.player
+                                 else engine.endgame.solve(after.board, after.player)[0], score)
+
+    def test_state_is_not_modified(self):
+        state = random_states(1, seed=1)[0]
+        before = str(state.board), state.player
+        search.Search(disc_difference).best_move(state)
+        self.assertEqual((str(state.board), state.player), before)
+
+
+class TestParallelSearch(unittest.TestCase):
+    def test_matches_sequential(self):
+        """
+        Splitting the root moves between processes gives the same scores as the sequential search
+        """
+        config = search.SearchConfig(max_depth=3, cache=search.TranspositionTable(megabytes=1),
+                                     ordering=ordering.HistoryOrdering())
+        sequential = search.Search(disc_difference, config)
+        parallel = search.ParallelSearch(disc_difference, config, processes=2)
+        try:
+            for state in random_states(8, seed=6):
+                score, move = parallel.iterative_deepening(state, 3)
+                self.assertEqual(score, sequential.iterative_deepening(state, 3)[0])
+                self.assertEqual(minimax(state.next_state(move), 2, state.player), score)
+                self.assertGreater(parallel.nodes, 0)
+        finally:
+            parallel.close()
+
+    def test_time_limit_changes(self):
+        """
+        A time limit set after the workers are created reaches them
+        """
+        config = search.SearchConfig(max_depth=4, time_limit=1e-6)
+        parallel = search.ParallelSearch(disc_difference, config, processes=2)
+        try:
+            parallel.start_pool()
+            parallel.set_time_limit(None)
+            for state in random_states(3, seed=6):
+                score, move = parallel.iterative_deepening(state, 4)
+                self.assertEqual(score, search.Search(disc_difference).search(state, 4)[0])
+        finally:
+            parallel.close()
+
+    def test_stop(self):
+        """
+        Tasks left in the queue once the workers are stopped return without searching,
+        and the next search starts the workers again
+        """
+        parallel = search.ParallelSearch(disc_difference, search.SearchConfig(max_depth=3), processes=2)
+        try:
+            parallel.start_pool()
+            parallel.stop.value = 1
+            state = random_states(1, seed=6)[0]
+            task = (state.to_bytes(), sorted(state.legal_moves())[0], 3, float('inf'), None)
+            self.assertEqual(parallel.pool.apply(search.parallel._search_root_move, task)[1::2], (None, 0))
+            self.assertEqual(parallel.iterative_deepening(state, 3)[0], minimax(state, 3, state.player))
+        finally:
+            parallel.close()
+
+    def test_mtdf(self):
+        """
+        MTD(f) over the parallel root, where every null-window pass that fails low
+        has all its moves failing low, returns the minimax value
+        """
+        for evaluate in (disc_difference, weighted_discs):
+            parallel = search.ParallelSearch(evaluate, search.SearchConfig(
+                algorithm=search.MTDF, cache=search.TranspositionTable(megabytes=1),
+            ), processes=2)
+            try:
+                for state in random_states(6, seed=4):
+                    score, move = parallel.iterative_deepening(state, 3)
+                    self.assertEqual(score, minimax(state, 3, state.player, evaluate))
+                    self.assertEqual(minimax(state.next_state(move), 2, state.player, evaluate), score)
+            finally:
+                parallel.close()
+
+
+class TestLazySMPSearch(unittest.TestCase):
+    def test_matches_minimax(self):
+        """
+        Helpers sharing the table do not change the value found by the main search.
+        Helpers search deeper than the main search and their results are reused, so the
+        positions are close to the end, where every depth that reaches it gives the same value
+        """
+        config = search.SearchConfig(max_depth=8, ordering=ordering.HistoryOrdering())
+        lazy = search.LazySMPSearch(disc_difference, config, processes=2, megabytes=1)
+        states = [state for state in random_states(40, seed=7, max_moves=60)
+                  if state.board.num_pieces(board.Board.EMPTY) <= 7]
+        self.assertGreater(len(states), 3)
+        try:
+            for state in states:
+                score, move = lazy.iterative_deepening(state, 8)
+                self.assertEqual(minimax(state, 8, state.player), score)
+                self.assertEqual(minimax(state.next_state(move), 7, state.player), score)
+        finally:
+            lazy.close()
+
+    def test_midgame(self):
+        """
+        In the middle of the game, the score of the move played is its minimax value
+        at the maximum depth, or one ply deeper when the main search reused the helpers' entries
+        """
+        config = search.SearchConfig(max_depth=3, ordering=ordering.HistoryOrdering())
+        lazy = search.LazySMPSearch(disc_difference, config, processes=2, megabytes=1)
+        try:
+            for state in random_states(5, seed=3, max_moves=30):
+                score, move = lazy.iterative_deepening(state, 3)
+                after = state.next_state(move)
+                self.assertIn(score, [minimax(after, 2, state.player), minimax(after, 3, state.player)])
+                self.assertIn(score, [minimax(state, 3, state.player), minimax(state, 4, state.player)])
+        finally:
+            lazy.close()
+
+    def test_shared_table(self):
+        table = search.SharedTranspositionTable(megabytes=0)
+        attached = search.SharedTranspositionTable(megabytes=0, name=table.name)
+        try:
+            self.assertEqual(table.size, 1)
+            entry = search.CacheEntry(5, 1, -2.5, (3, 4))
+            table[1] = entry
+            self.assertEqual(attached.get(1), entry)
+            attached[2] = search.CacheEntry(1, 0, 0.1, None)
+            self.assertEqual(table.get(2), search.CacheEntry(1, 0, 0.1, None))
+            self.assertEqual(len(table), 2)
+
+            attached.clear()  # only the owner clears the table
+            self.assertIn(1, attached)
+            table.words[2] ^= 1  # an entry whose data does not match its check is ignored
+            self.assertIsNone(attached.get(1))
+            table.clear()
+            self.assertNotIn(2, attached)
+        finally:
+            attached.close()
+            table.close()
+
+
+class TestPonderingSearch(unittest.TestCase):
+    def test_ponder(self):
+        """
+        Pondering fills the table with the predicted reply, goes on if the opponent plays it
+        and stops when the agent searches or the opponent plays another move
+        """
+        config = search.SearchConfig(max_depth=20, time_limit=0.3, ordering=ordering.HistoryOrdering())
+        engine = search.PonderingSearch(disc_difference, config, processes=2, megabytes=1, ponder_time=5)
+        try:
+            state = random_states(1, seed=8)[0]
+            after = state.next_state(engine.best_move(state))
+            engine.ponder(after)
+            self.assertIsNotNone(engine.pondering)
+            replies = {move: after.next_state(move) for move in after.legal_moves()}
+            predicted = [move for move, reply in replies.items() if reply.key() in engine.pondered]
+            self.assertEqual(len(predicted), 1)
+            time.sleep(0.5)
+
+            reply = replies[predicted[0]]
+            self.assertTrue(engine.opponent_moved(reply))
+            self.assertIsNotNone(engine.pondering)
+            self.assertIn(reply.key(), engine.cache)  # the helper already completed some iterations
+            self.assertIn(engine.best_move(reply), reply.legal_moves())
+            self.assertIsNone(engine.pondering)
+            self.assertGreater(engine.ponder_nodes, 0)
+
+            engine.ponder(after)
+            others = [reply for move, reply in replies.items() if move not in predicted]
+            if others:
+                self.assertFalse(engine.opponent_moved(others[0]))
+                self.assertIsNone(engine.pondering)
+        finally:
+            engine.close()
+
+    def test_reply_that_passes(self):
+        """
+        A reply after which the agent must pass is not pondered (the opponent would move again)
+        """
+        b = board.from_string('BBBBWWBB\nBBBBBWB.\nBBWWWWB.\nBBWBBWBW\nBBWBBBBW\nBBWBWBBW\nBBBBBBB.\nBBWWWWWW\n')
+        state = gamestate.GameState(b, WHITE)
+        engine = search.PonderingSearch(disc_difference, search.SearchConfig(max_depth=4), processes=2, megabytes=1)
+        try:
+            engine.start(state)
+            after = state.next_state((7, 1))
+            self.assertEqual(after.legal_moves(), {(7, 2)})
+            self.assertEqual(after.next_state((7, 2)).player, BLACK)  # white passes
+            engine.ponder(after)
+            self.assertIsNone(engine.pondering)
+        finally:
+            engine.close()
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_replacement(self):
+        table = search.TranspositionTable(megabytes=0)  # a single bucket
+        self.assertEqual(table.size, 1)
+        deep, shallow, newer = (search.CacheEntry(depth, 0, 0.0, None) for depth in (5, 1, 2))
+
+        table[1] = deep
+        table[2] = shallow  # does not replace the deeper entry
+        self.assertIs(table.get(1), deep)
+        self.assertIs(table.get(2), shallow)
+        table[3] = shallow  # replaces the always-replace tier
+        self.assertIsNone(table.get(2))
+        self.assertEqual(table.stats()['collisions'], 1)
+
+        table.new_search()
+        table[4] = newer  # the deep entry is from an older search: it is replaced
+        self.assertIs(table.get(4), newer)
+        self.assertIs(table.get(1), deep)  # and moved to the always-replace tier
+        self.assertNotIn(3, table)
+        self.assertEqual(len(table), 2)
+
+        stats = table.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (4, 1))
+        table.clear()
+        self.assertEqual(len(table), 0)
+
+    def test_search_uses_table(self):
+        table = search.TranspositionTable(megabytes=1)
+        engine = search.Search(disc_difference, search.SearchConfig(max_depth=4, cache=table))
+        state = random_states(1, seed=4)[0]
+        engine.best_move(state)
+        nodes = engine.nodes
+        self.assertGreater(table.stats()['entries'], 0)
+        engine.best_move(state)  # same position again: answered from the table
+        self.assertLess(engine.nodes, nodes)
+        self.assertGreater(table.stats()['hits'], 0)
+
+
+class TestMoveOrdering(unittest.TestCase):
+    def test_priorities(self):
+        state = gamestate.GameState(board.Board(), BLACK)
+        moves = {(1, 1), (2, 2), (0, 0), (2, 0), (3, 2), (7, 6)}
+        move_ordering = ordering.HistoryOrdering()
+        self.assertEqual(move_ordering.order(state, moves, 0), [(0, 0), (2, 0), (2, 2), (3, 2), (7, 6), (1, 1)])
+
+        move_ordering.update(state, (7, 6), 1, 3)  # killer at ply 1 only, history for black
+        move_ordering.update(state, (3, 2), 0, 2)
+        self.assertEqual(move_ordering.order(state, moves, 1, hash_move=(1, 1)),
+                         [(1, 1), (0, 0), (7, 6), (3, 2), (2, 0), (2, 2)])
+        self.assertEqual(move_ordering.order(state, moves, 2), [(0, 0), (7, 6), (3, 2), (2, 0), (2, 2), (1, 1)])
+
+        move_ordering.clear()
+        self.assertEqual(move_ordering.killers, [])
+        self.assertEqual(move_ordering.history[BLACK][6][7], 4)
+        self.assertEqual(move_ordering.order(gamestate.GameState(board.Board(), WHITE), moves, 1)[1], (2, 0))
+
+
+class TestOpeningBook(unittest.TestCase):
+    def setUp(self):
+        self.entries = book.build_book(disc_difference, width=2, plies=4, depth=2)
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        book.write_book(self.path, self.entries)
+        self.book = book.OpeningBook(self.path)
+
+    def tearDown(self):
+        self.book.close()
+        os.remove(self.path)
+
+    def test_lookup(self):
+        """
+        Every position of the book is found in all of its orientations, with the transformed
+        move (or an equivalent one, in symmetric positions)
+        """
+        self.assertEqual(len(self.book), len(self.entries))
+        engine = search.Search(disc_difference, search.SearchConfig(max_depth=2))
+        for (player, opponent), (_, score) in self.entries.items():
+            for symmetry in bitboard.SYMMETRIES:
+                p, o = bitboard.transform(player, symmetry), bitboard.transform(opponent, symmetry)
+                color = BLACK if board.popcount(p | o) % 2 == 0 else WHITE  # black moves first
+                black, white = (p, o) if color == BLACK else (o, p)
+                state = gamestate.GameState(board.Board.from_bitboards(black, white), color)
+                move, found_score = self.book.lookup(state)
+                self.assertEqual(self.book.move(state), move)
+                self.assertEqual(found_score, score)
+                self.assertEqual(engine.search(state, 2)[0], score)
+                self.assertEqual(minimax(state.next_state(move), 1, color), score)
+
+    def test_missing(self):
+        state = random_states(1, seed=5)[0]
+        self.assertIsNone(self.book.lookup(state))
+        self.assertIsNone(self.book.move(state))
+        self.assertIsNone(book.open_book(self.path + '.missing'))
+
+    def test_invalid_file(self):
+        with open(self.path, 'r+b') as file:
+            file.write(b'XXXX')
+        with self.assertRaises(ValueError):
+            book.OpeningBook(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()